@@ -0,0 +1,37 @@
+# accounts/badges.py
+"""
+Per-user navbar badge (team + avatar) cached in the default cache.
+
+The context processor runs on every template render, so the lookup is
+cached per user and invalidated from accounts.signals whenever the
+profile, the team or the linked social account changes.
+"""
+from django.core.cache import cache
+
+BADGE_TIMEOUT = 60 * 60
+
+
+def badge_key(user_id):
+    return f"accounts:badge:{user_id}"
+
+
+def get_team_badge(user):
+    """Return {"team": Team|None, "avatar_url": str} for an authenticated user."""
+    key = badge_key(user.pk)
+    badge = cache.get(key)
+    if badge is None:
+        from .principal import principal_for
+
+        # shares the request's Profile + Team lookup with the Principal
+        prof = principal_for(user).profile
+        social = user.socialaccount_set.first()
+        badge = {
+            "team": prof.team if prof else None,
+            "avatar_url": social.get_avatar_url() if social else "",
+        }
+        cache.set(key, badge, BADGE_TIMEOUT)
+    return badge
+
+
+def invalidate_team_badges(user_ids):
+    cache.delete_many([badge_key(uid) for uid in user_ids])
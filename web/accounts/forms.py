@@ -168,3 +168,33 @@ class ProfileForm(forms.ModelForm):
                 attrs={"placeholder": "Example: IR Lead, SIEM Analyst, etc."}
             ),
         }
+
+
+# ------------------------------------------------------
+# Roster import (staff)
+# ------------------------------------------------------
+class RosterImportForm(forms.Form):
+    """
+    Upload a roster CSV for preview; the preview page posts the same text
+    back (roster_text) with apply=1 to write it.
+    """
+
+    file = forms.FileField(
+        label="Roster CSV",
+        required=False,
+        help_text="Columns: username, email, first_name, last_name, display_name, role_in_soc, team.",
+    )
+    roster_text = forms.CharField(required=False, widget=forms.HiddenInput)
+    apply = forms.BooleanField(required=False, widget=forms.HiddenInput)
+
+    def clean(self):
+        cleaned = super().clean()
+        upload = cleaned.get("file")
+        if upload:
+            try:
+                cleaned["roster_text"] = upload.read().decode("utf-8-sig")
+            except UnicodeDecodeError:
+                raise forms.ValidationError("The roster must be a UTF-8 CSV file.")
+        if not cleaned.get("roster_text"):
+            raise forms.ValidationError("Choose a CSV file to import.")
+        return cleaned
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.roster import RosterError, apply_plan, parse_roster, plan_import
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update students, their profiles and team assignments from "
+        "a roster CSV (columns: username, email, first_name, last_name, "
+        "display_name, role_in_soc, team). Use --dry-run to see the diff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Roster CSV file ('-' for stdin).")
+        parser.add_argument("--dry-run", action="store_true", help="Show the changes without writing them.")
+        parser.add_argument("--encoding", default="utf-8-sig")
+        parser.add_argument("--quiet", action="store_true", help="Only print the summary, not every change.")
+
+    def handle(self, *args, **options):
+        if options["path"] == "-":
+            import sys
+            text = sys.stdin.read()
+        else:
+            try:
+                with open(options["path"], encoding=options["encoding"], newline="") as fh:
+                    text = fh.read()
+            except OSError as exc:
+                raise CommandError(str(exc))
+
+        start = time.monotonic()
+        try:
+            plan = plan_import(parse_roster(text))
+        except RosterError as exc:
+            for line, message in exc.errors:
+                self.stderr.write(f"line {line}: {message}")
+            raise CommandError(str(exc))
+
+        if not options["quiet"]:
+            for name in plan.new_teams:
+                self.stdout.write(f"+ team {name}")
+            for change in plan.changes:
+                sign = "+" if change.action == "create" else "~"
+                detail = "; ".join(change.details)
+                self.stdout.write(f"{sign} {change.username}" + (f"  ({detail})" if detail else ""))
+
+        if options["dry_run"]:
+            self.stdout.write(f"Dry run: {plan.summary()}. Nothing written.")
+            return
+
+        apply_plan(plan)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported in {time.monotonic() - start:.2f}s: {plan.summary()}."
+        ))
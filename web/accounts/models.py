@@ -1,5 +1,6 @@
 # accounts/models.py
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.db import models
 import secrets
 
@@ -47,6 +48,13 @@ class Profile(models.Model):
         return self.display_name or self.user.username
 
 
+def user_team_id(user):
+    """Id of the user's accounts.Team, or None (anonymous / no profile / no team)."""
+    from .principal import principal_for
+
+    return principal_for(user).team_id
+
+
 # OPTIONAL: if you want multiple/rotating class codes
 class ClassCode(models.Model):
     code = models.CharField(max_length=64, unique=True)
@@ -76,7 +84,21 @@ class ClassConfig(models.Model):
     def __str__(self):
         return "Class configuration"
 
+    CACHE_KEY = "accounts:classconfig"
+
     @classmethod
     def get_solo(cls):
-        obj, _ = cls.objects.get_or_create(pk=1)
+        """Return the single config row, from cache when possible."""
+        obj = cache.get(cls.CACHE_KEY)
+        if obj is None:
+            obj, _ = cls.objects.get_or_create(pk=1)
+            cache.set(cls.CACHE_KEY, obj, None)
         return obj
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        cache.delete(self.CACHE_KEY)
+
+    def delete(self, *args, **kwargs):
+        cache.delete(self.CACHE_KEY)
+        return super().delete(*args, **kwargs)
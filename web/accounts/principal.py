@@ -0,0 +1,104 @@
+# accounts/principal.py
+"""
+The request's principal: who is asking, which team they are on, and the
+permission decisions already made for them.
+
+PrincipalMiddleware attaches ``request.principal``; code that only has a
+user calls principal_for(user). Either way there is one Principal per
+user object, and AuthenticationMiddleware gives each request its own
+user object, so everything here lives exactly as long as the request.
+
+The team comes from the cached navbar badge when it is warm (no query)
+and otherwise from a single Profile + Team query. Permission checks go
+through decide(), which runs each (action, object) rule once.
+"""
+from functools import cached_property
+
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from .badges import badge_key
+from .models import Profile
+
+
+class Principal:
+    def __init__(self, user):
+        self.user = user
+        self._decisions = {}
+
+    @property
+    def is_authenticated(self):
+        return self.user.is_authenticated
+
+    @property
+    def is_staff(self):
+        return self.user.is_authenticated and self.user.is_staff
+
+    @property
+    def pk(self):
+        return self.user.pk
+
+    @cached_property
+    def profile(self):
+        """The user's Profile (with its team), or None."""
+        if not self.is_authenticated:
+            return None
+        return Profile.objects.select_related("team").filter(user_id=self.user.pk).first()
+
+    @cached_property
+    def team(self):
+        """The user's accounts.Team, or None."""
+        if not self.is_authenticated:
+            return None
+        if "profile" not in self.__dict__:
+            badge = cache.get(badge_key(self.user.pk))
+            if badge is not None:
+                return badge["team"]
+        return self.profile.team if self.profile else None
+
+    @property
+    def team_id(self):
+        return self.team.pk if self.team else None
+
+    # ----- relationship to an owned object (owner_id / team_id) -----
+
+    def on_team_of(self, obj):
+        team_id = getattr(obj, "team_id", None)
+        return bool(team_id) and team_id == self.team_id
+
+    def owns(self, obj):
+        return self.is_authenticated and getattr(obj, "owner_id", None) == self.user.pk
+
+    def is_member(self, obj):
+        """Owner or member of the owning team (the usual editor rule)."""
+        return self.is_authenticated and (self.owns(obj) or self.on_team_of(obj))
+
+    def decide(self, action, obj, rule):
+        """``rule(principal, obj)``, evaluated once per request per object."""
+        key = (action, type(obj), obj.pk)
+        if key not in self._decisions:
+            self._decisions[key] = bool(rule(self, obj))
+        return self._decisions[key]
+
+
+def principal_for(user):
+    """The Principal for ``user``, created on first use and kept on the user."""
+    principal = getattr(user, "_principal", None)
+    if principal is None:
+        principal = Principal(user)
+        try:
+            user._principal = principal
+        except AttributeError:  # e.g. a bare object standing in for a user
+            pass
+    return principal
+
+
+class PrincipalMiddleware:
+    """Sets ``request.principal``; must come after AuthenticationMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.principal = SimpleLazyObject(lambda: principal_for(request.user))
+        return self.get_response(request)
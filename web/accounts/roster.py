@@ -0,0 +1,299 @@
+# accounts/roster.py
+"""
+Bulk roster import: create or update Users, their Profiles and
+accounts.Team membership from a CSV in a handful of queries.
+
+The CSV needs a ``username`` column. The optional columns are email,
+first_name, last_name, display_name, role_in_soc and team (a team name,
+created when missing). An empty cell leaves the stored value alone, and
+a team of ``-`` takes the student off their team.
+
+plan_import() reads the current state and returns a RosterPlan (the diff,
+nothing written); apply_plan() writes it in one transaction with bulk
+INSERT/UPDATEs. New accounts get an unusable password: students sign in
+with Discord or set one through password reset.
+
+Rows naming a staff or superuser account are refused: a roster could
+otherwise change their email and take the account over through a
+password reset. Those accounts are managed in the admin.
+"""
+import csv
+import io
+from dataclasses import dataclass, field
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from .badges import invalidate_team_badges
+from .models import Profile, Team
+
+BATCH_SIZE = 500
+NO_TEAM = "-"
+
+USER_FIELDS = ("email", "first_name", "last_name")
+PROFILE_FIELDS = ("display_name", "role_in_soc")
+COLUMNS = ("username",) + USER_FIELDS + PROFILE_FIELDS + ("team",)
+HEADER_ALIASES = {"team_name": "team", "role": "role_in_soc", "user": "username"}
+
+_username_validator = UnicodeUsernameValidator()
+
+
+class RosterError(Exception):
+    """The CSV can't be imported; ``errors`` lists (line, message)."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} problem(s) in roster")
+
+
+@dataclass
+class RosterRow:
+    line: int
+    username: str
+    values: dict  # column -> non-empty value
+
+
+@dataclass
+class Change:
+    username: str
+    action: str  # "create" | "update"
+    details: list  # human-readable "field: old → new"
+
+
+@dataclass
+class RosterPlan:
+    rows: list
+    changes: list = field(default_factory=list)
+    new_teams: list = field(default_factory=list)
+    unchanged: int = 0
+    # filled in by plan_import for apply_plan
+    users: dict = field(default_factory=dict)
+    profiles: dict = field(default_factory=dict)
+    teams: dict = field(default_factory=dict)
+
+    @property
+    def creates(self):
+        return sum(1 for c in self.changes if c.action == "create")
+
+    @property
+    def updates(self):
+        return sum(1 for c in self.changes if c.action == "update")
+
+    @property
+    def has_changes(self):
+        return bool(self.changes or self.new_teams)
+
+    def summary(self):
+        return (
+            f"{self.creates} new student(s), {self.updates} updated, "
+            f"{self.unchanged} unchanged, {len(self.new_teams)} new team(s)"
+        )
+
+
+def _column(name):
+    name = name.strip().lower().replace(" ", "_")
+    return HEADER_ALIASES.get(name, name)
+
+
+def parse_roster(text):
+    """
+    Parse CSV text into RosterRows. Raises RosterError listing every bad
+    line, so one upload reports all the problems at once.
+    """
+    text = text.lstrip("\ufeff")  # Excel's UTF-8 BOM
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames:
+        raise RosterError([(1, "The file is empty.")])
+    reader.fieldnames = [_column(n or "") for n in reader.fieldnames]
+    if "username" not in reader.fieldnames:
+        raise RosterError([(1, "Missing a 'username' column.")])
+
+    rows, errors, seen = [], [], {}
+    for raw in reader:
+        line = reader.line_num
+        values = {
+            col: (raw.get(col) or "").strip()
+            for col in COLUMNS
+            if (raw.get(col) or "").strip()
+        }
+        username = values.pop("username", "")
+        if not username and not values:
+            continue  # blank line
+        try:
+            _username_validator(username)
+        except ValidationError:
+            errors.append((line, f"Invalid username {username!r}."))
+            continue
+        if len(username) > 150:
+            errors.append((line, f"Username {username!r} is too long."))
+            continue
+        if "email" in values:
+            try:
+                validate_email(values["email"])
+            except ValidationError:
+                errors.append((line, f"Invalid email {values['email']!r}."))
+                continue
+        key = username.lower()
+        if key in seen:
+            errors.append((line, f"{username!r} is already on line {seen[key]}."))
+            continue
+        seen[key] = line
+        rows.append(RosterRow(line, username, values))
+
+    if errors:
+        raise RosterError(errors)
+    return rows
+
+
+def _chunks(items, size=BATCH_SIZE):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def plan_import(rows):
+    """
+    Diff ``rows`` against the database. Reads only; see apply_plan().
+    Raises RosterError if a row matches a staff or superuser account.
+    """
+    plan = RosterPlan(rows=rows)
+
+    usernames = [r.username for r in rows]
+    for chunk in _chunks(usernames):
+        for user in User.objects.filter(username__in=chunk):
+            plan.users[user.username] = user
+    privileged = [
+        (row.line, f"{row.username!r} is a staff account; change it in the admin.")
+        for row in rows
+        if row.username in plan.users
+        and (plan.users[row.username].is_staff or plan.users[row.username].is_superuser)
+    ]
+    if privileged:
+        raise RosterError(privileged)
+    for chunk in _chunks([u.pk for u in plan.users.values()]):
+        for prof in Profile.objects.filter(user_id__in=chunk).select_related("team"):
+            plan.profiles[prof.user_id] = prof
+
+    team_names = {r.values["team"] for r in rows if r.values.get("team", NO_TEAM) != NO_TEAM}
+    for chunk in _chunks(team_names):
+        for team in Team.objects.filter(name__in=chunk):
+            plan.teams[team.name] = team
+    plan.new_teams = sorted(team_names - set(plan.teams))
+
+    for row in rows:
+        user = plan.users.get(row.username)
+        prof = plan.profiles.get(user.pk) if user else None
+        details = []
+        for name in USER_FIELDS:
+            new = row.values.get(name)
+            old = getattr(user, name) if user else ""
+            if new is not None and new != old:
+                details.append(f"{name}: {old or '∅'} → {new}")
+        for name in PROFILE_FIELDS:
+            new = row.values.get(name)
+            old = getattr(prof, name) if prof else ""
+            if new is not None and new != old:
+                details.append(f"{name}: {old or '∅'} → {new}")
+        team = row.values.get("team")
+        old_team = prof.team.name if prof and prof.team else ""
+        if team is not None and (team if team != NO_TEAM else "") != old_team:
+            new_team = "∅" if team == NO_TEAM else team
+            details.append(f"team: {old_team or '∅'} → {new_team}")
+
+        if user is None:
+            plan.changes.append(Change(row.username, "create", details))
+        elif details:
+            plan.changes.append(Change(row.username, "update", details))
+        else:
+            plan.unchanged += 1
+    return plan
+
+
+def apply_plan(plan):
+    """
+    Write a RosterPlan in one transaction. Returns the number of students
+    created or updated.
+    """
+    if not plan.has_changes:
+        return 0
+
+    with transaction.atomic():
+        teams = dict(plan.teams)
+        for team in Team.objects.bulk_create(
+            [Team(name=name) for name in plan.new_teams], batch_size=BATCH_SIZE
+        ):
+            teams[team.name] = team
+
+        # bulk_create skips the post_save signal, so profiles are made below
+        password = make_password(None)
+        new_users = User.objects.bulk_create(
+            [
+                User(
+                    username=row.username,
+                    password=password,
+                    **{f: row.values[f] for f in USER_FIELDS if f in row.values},
+                )
+                for row in plan.rows
+                if row.username not in plan.users
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        if new_users and new_users[0].pk is None:
+            # backends without RETURNING ids
+            created = User.objects.filter(username__in=[u.username for u in new_users])
+            new_users = list(created)
+        users = dict(plan.users)
+        users.update((u.username, u) for u in new_users)
+
+        changed_users, new_profiles, changed_profiles = [], [], []
+        for row in plan.rows:
+            user = users[row.username]
+            if row.username in plan.users:
+                dirty = False
+                for name in USER_FIELDS:
+                    if name in row.values and getattr(user, name) != row.values[name]:
+                        setattr(user, name, row.values[name])
+                        dirty = True
+                if dirty:
+                    changed_users.append(user)
+
+            prof = plan.profiles.get(user.pk)
+            is_new = prof is None
+            if is_new:
+                prof = Profile(user=user)
+            dirty = False
+            for name in PROFILE_FIELDS:
+                if name in row.values and getattr(prof, name) != row.values[name]:
+                    setattr(prof, name, row.values[name])
+                    dirty = True
+            if "team" in row.values:
+                team = None if row.values["team"] == NO_TEAM else teams[row.values["team"]]
+                if prof.team_id != (team.pk if team else None):
+                    prof.team = team
+                    dirty = True
+            if is_new:
+                new_profiles.append(prof)
+            elif dirty:
+                changed_profiles.append(prof)
+
+        User.objects.bulk_update(changed_users, USER_FIELDS, batch_size=BATCH_SIZE)
+        Profile.objects.bulk_create(new_profiles, batch_size=BATCH_SIZE)
+        Profile.objects.bulk_update(
+            changed_profiles, PROFILE_FIELDS + ("team",), batch_size=BATCH_SIZE
+        )
+        touched = [p.user_id for p in new_profiles + changed_profiles]
+        transaction.on_commit(lambda: invalidate_team_badges(touched))
+
+    return plan.creates + plan.updates
+
+
+def import_roster(text, dry_run=False):
+    """parse + plan (+ apply unless ``dry_run``). Returns the RosterPlan."""
+    plan = plan_import(parse_roster(text))
+    if not dry_run:
+        apply_plan(plan)
+    return plan
@@ -1,9 +1,35 @@
-from django.db.models.signals import post_save
+from allauth.socialaccount.models import SocialAccount
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.contrib.auth.models import User
 from django.dispatch import receiver
-from .models import Profile
+
+from .badges import invalidate_team_badges
+from .models import Profile, Team
+
 
 @receiver(post_save, sender=User)
 def ensure_profile(sender, instance, created, **kwargs):
     if created:
         Profile.objects.get_or_create(user=instance)
+
+
+# ----- navbar badge cache invalidation -----
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def profile_changed(sender, instance, **kwargs):
+    invalidate_team_badges([instance.user_id])
+
+
+@receiver(post_save, sender=Team)
+@receiver(pre_delete, sender=Team)
+def team_changed(sender, instance, **kwargs):
+    # pre_delete: members are still attached before SET_NULL runs
+    member_ids = Profile.objects.filter(team=instance).values_list("user_id", flat=True)
+    invalidate_team_badges(member_ids)
+
+
+@receiver(post_save, sender=SocialAccount)
+@receiver(post_delete, sender=SocialAccount)
+def social_account_changed(sender, instance, **kwargs):
+    invalidate_team_badges([instance.user_id])
@@ -1,3 +1,195 @@
-from django.test import TestCase
+from django.contrib.auth.models import AnonymousUser, Permission, User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from socdocs.testing import LOCMEM_CACHES
+
+from .badges import get_team_badge
+from .models import ClassConfig, Profile, Team, user_team_id
+from .principal import principal_for
+from .roster import RosterError, import_roster, parse_roster
+
+ROSTER = """username,email,display_name,team
+ada,ada@example.com,Ada L.,Blue
+grace,grace@example.com,,Red
+"""
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CachedLookupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.team = Team.objects.create(name="Blue")
+        self.user = User.objects.create_user("ada")
+        Profile.objects.filter(user=self.user).update(team=self.team)
+
+    def test_class_config_is_cached_until_saved(self):
+        ClassConfig.get_solo()
+        with self.assertNumQueries(0):
+            config = ClassConfig.get_solo()
+        self.assertTrue(config.students_can_create_teams)
+
+        config.students_can_create_teams = False
+        config.save()
+        self.assertFalse(ClassConfig.get_solo().students_can_create_teams)
+
+    def test_badge_is_cached_per_user(self):
+        self.assertEqual(get_team_badge(self.user)["team"], self.team)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_team_badge(self.user), {"team": self.team, "avatar_url": ""})
+
+    def fresh_badge(self):
+        """The badge as the next request sees it (new user object, new Principal)."""
+        return get_team_badge(User.objects.get(pk=self.user.pk))
+
+    def test_badge_follows_team_and_profile_changes(self):
+        self.fresh_badge()
+        self.team.name = "Navy"
+        self.team.save()
+        self.assertEqual(self.fresh_badge()["team"].name, "Navy")
+
+        profile = Profile.objects.get(user=self.user)
+        profile.team = None
+        profile.save()
+        self.assertIsNone(self.fresh_badge()["team"])
+
+        profile.team = self.team
+        profile.save()
+        self.team.delete()
+        self.assertIsNone(self.fresh_badge()["team"])
+
+    def test_warm_navbar_adds_no_queries(self):
+        self.client.force_login(self.user)
+        url = reverse("accounts:profile")
+        with CaptureQueriesContext(connection) as cold:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as warm:
+            response = self.client.get(url)
+        self.assertContains(response, "Blue")
+        sqls = [q["sql"] for q in warm.captured_queries]
+        self.assertFalse([sql for sql in sqls if "accounts_classconfig" in sql or "socialaccount" in sql])
+        self.assertLess(len(warm), len(cold))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PrincipalTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.team = Team.objects.create(name="Blue")
+        self.user = User.objects.create_user("ada", password="x")
+        Profile.objects.filter(user=self.user).update(team=self.team)
+
+    def test_team_is_loaded_once(self):
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(principal_for(user).team, self.team)
+            self.assertEqual(user_team_id(user), self.team.pk)
+            self.assertIs(principal_for(user), principal_for(user))
+
+    def test_warm_badge_supplies_the_team(self):
+        get_team_badge(self.user)
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(principal_for(user).team_id, self.team.pk)
+
+    def test_anonymous(self):
+        with self.assertNumQueries(0):
+            principal = principal_for(AnonymousUser())
+            self.assertEqual((principal.team, principal.is_staff, principal.owns(self.team)), (None, False, False))
+
+    def test_decisions_are_memoized_per_object(self):
+        principal = principal_for(self.user)
+        calls = []
+
+        def rule(p, obj):
+            calls.append(obj.pk)
+            return p.on_team_of(obj)
+
+        profile = Profile.objects.get(user=self.user)
+        other = Profile.objects.get(user=User.objects.create_user("bob"))
+        self.assertTrue(principal.decide("view", profile, rule))
+        self.assertTrue(principal.decide("view", profile, rule))
+        self.assertFalse(principal.decide("view", other, rule))
+        self.assertTrue(principal.decide("edit", profile, rule))
+        self.assertEqual(calls, [profile.pk, other.pk, profile.pk])
+
+    def test_middleware_shares_the_principal(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("accounts:profile"))
+        request = response.wsgi_request
+        self.assertEqual(request.principal.team, self.team)  # evaluates the lazy object
+        self.assertIs(request.principal._wrapped, principal_for(request.user))
+
+    def test_one_team_lookup_per_request(self):
+        from diagrams.models import Diagram
+
+        diagram = Diagram.objects.create(title="Net", team=self.team, owner=self.user)
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("diagrams:detail", args=[diagram.slug]))
+        self.assertContains(response, "Net")
+        profile_queries = [q for q in queries.captured_queries if 'FROM "accounts_profile"' in q["sql"]]
+        self.assertLessEqual(len(profile_queries), 1, [q["sql"] for q in queries.captured_queries])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RosterImportTests(TestCase):
+    def profile(self, username):
+        return Profile.objects.select_related("team").get(user__username=username)
+
+    def test_parse_errors_are_reported_together(self):
+        with self.assertRaises(RosterError) as ctx:
+            parse_roster("username,email\nbad name,\nok,not-an-email\nok2,\nOK2,\n")
+        self.assertEqual([line for line, _ in ctx.exception.errors], [2, 3, 5])
+        with self.assertRaises(RosterError):
+            parse_roster("email\nada@example.com\n")
+
+    def test_dry_run_writes_nothing(self):
+        plan = import_roster(ROSTER, dry_run=True)
+        self.assertEqual((plan.creates, plan.updates, plan.new_teams), (2, 0, ["Blue", "Red"]))
+        self.assertFalse(User.objects.filter(username__in=["ada", "grace"]).exists())
+        self.assertFalse(Team.objects.exists())
+
+    def test_apply_creates_users_profiles_and_teams(self):
+        import_roster(ROSTER)
+        ada = self.profile("ada")
+        self.assertEqual((ada.user.email, ada.display_name, ada.team.name), ("ada@example.com", "Ada L.", "Blue"))
+        self.assertFalse(ada.user.has_usable_password())
+        self.assertEqual(self.profile("grace").team.name, "Red")
+
+        plan = import_roster(ROSTER)
+        self.assertEqual((plan.unchanged, plan.has_changes), (2, False))
+
+    def test_dash_removes_from_team_and_blank_keeps_value(self):
+        import_roster(ROSTER)
+        plan = import_roster("username,email,team\nada,,-\n")
+        self.assertEqual(plan.changes[0].details, ["team: Blue → ∅"])
+        ada = self.profile("ada")
+        self.assertIsNone(ada.team)
+        self.assertEqual(ada.user.email, "ada@example.com")
+
+    def test_staff_and_superuser_accounts_are_refused(self):
+        User.objects.create_user("prof", email="prof@example.com", is_staff=True)
+        User.objects.create_superuser("root", email="root@example.com")
+        with self.assertRaises(RosterError) as ctx:
+            import_roster("username,email\nada,ada@example.com\nprof,evil@example.com\nroot,evil@example.com\n")
+        self.assertEqual([line for line, _ in ctx.exception.errors], [3, 4])
+        self.assertEqual(User.objects.get(username="prof").email, "prof@example.com")
+        self.assertFalse(User.objects.filter(username="ada").exists())
+
+    def test_view_requires_user_permissions(self):
+        url = reverse("accounts:roster_import")
+        staff = User.objects.create_user("ta", password="x", is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        staff.user_permissions.add(
+            *Permission.objects.filter(content_type__app_label="auth", codename__in=["add_user", "change_user"])
+        )
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.post(url, {"roster_text": ROSTER, "apply": True})
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.assertEqual(self.profile("ada").team.name, "Blue")
@@ -7,4 +7,5 @@ urlpatterns = [
     path("profile/", views.profile, name="profile"),
     path("team/create/", views.team_create, name="team_create"),
     path("team/join/", views.team_join, name="team_join"),
+    path("roster/import/", views.roster_import, name="roster_import"),
 ]
@@ -1,9 +1,13 @@
-from django.contrib.auth.decorators import login_required
+from django.contrib.auth.decorators import login_required, permission_required
 from django.shortcuts import render, redirect
 from django.contrib import messages
 
-from .forms import EnrollCodeForm, CreateTeamForm, JoinTeamForm, ProfileForm
+from .forms import EnrollCodeForm, CreateTeamForm, JoinTeamForm, ProfileForm, RosterImportForm
 from .models import Team, Profile, ClassConfig
+from .roster import RosterError, apply_plan, parse_roster, plan_import
+
+# changes listed on the preview page; the summary always covers everything
+ROSTER_PREVIEW_LIMIT = 300
 
 
 def enroll(request):
@@ -135,3 +139,44 @@ def team_join(request):
         form = JoinTeamForm()
 
     return render(request, "accounts/team_join.html", {"form": form})
+
+
+@login_required
+@permission_required(["auth.add_user", "auth.change_user"], raise_exception=True)
+def roster_import(request):
+    """
+    Bulk-create/update students and team assignments from a CSV, for
+    users who may add and change accounts (the same permissions the
+    admin asks for). Uploading shows a dry-run diff; confirming posts the
+    same CSV back.
+    """
+    plan = errors = None
+    if request.method == "POST":
+        form = RosterImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                plan = plan_import(parse_roster(form.cleaned_data["roster_text"]))
+            except RosterError as exc:
+                errors = exc.errors
+            else:
+                if form.cleaned_data["apply"]:
+                    apply_plan(plan)
+                    messages.success(request, f"Roster imported: {plan.summary()}.")
+                    return redirect("accounts:roster_import")
+                form = RosterImportForm(initial={
+                    "roster_text": form.cleaned_data["roster_text"],
+                    "apply": True,
+                })
+    else:
+        form = RosterImportForm()
+
+    return render(
+        request,
+        "accounts/roster_import.html",
+        {
+            "form": form,
+            "plan": plan,
+            "errors": errors,
+            "preview": plan.changes[:ROSTER_PREVIEW_LIMIT] if plan else [],
+        },
+    )
@@ -0,0 +1,178 @@
+# benchmarks/connections.py
+"""
+Connection-management benchmark: how much of each request is spent
+opening a database connection, per connection mode, under concurrency.
+
+Several threads drive a cheap login-required view through the test
+client. The test client deliberately skips close_old_connections(), so
+each worker calls it at the start and end of every request, exactly as
+the request_started/request_finished handlers do under gunicorn. Time
+spent in DatabaseWrapper.connect() is recorded separately from the total
+request time.
+
+Modes:
+  per_request  CONN_MAX_AGE=0, a fresh connection for every request
+  persistent   CONN_MAX_AGE>0 with health checks, one connection per thread
+  pool         psycopg 3 pool (PostgreSQL only, psycopg_pool installed)
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from django.db import close_old_connections, connections
+from django.test import Client
+from django.urls import reverse
+
+from .runner import percentile
+
+MODES = ("per_request", "persistent", "pool")
+
+
+def pool_available(alias="default"):
+    if connections[alias].vendor != "postgresql":
+        return False
+    try:
+        import psycopg_pool  # noqa: F401
+        from django.db.backends.postgresql.base import is_psycopg3
+    except ImportError:
+        return False
+    return is_psycopg3
+
+
+def mode_settings(mode, max_age=600, pool_size=None):
+    """Changes to the connection's settings_dict for ``mode``."""
+    if mode == "per_request":
+        return {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False, "pool": None}
+    if mode == "persistent":
+        return {"CONN_MAX_AGE": max_age, "CONN_HEALTH_CHECKS": True, "pool": None}
+    if mode == "pool":
+        return {
+            "CONN_MAX_AGE": 0,
+            "CONN_HEALTH_CHECKS": False,
+            "pool": {"min_size": 1, "max_size": pool_size or 4, "timeout": 30},
+        }
+    raise ValueError(f"unknown mode {mode!r}")
+
+
+@contextmanager
+def connection_mode(mode, alias="default", **kwargs):
+    """
+    Apply ``mode`` to the alias' settings for the duration. Connections made
+    in new threads read the same settings dict, so this covers them too.
+    """
+    settings_dict = connections.settings[alias]
+    options = settings_dict.setdefault("OPTIONS", {})
+    saved = {
+        "CONN_MAX_AGE": settings_dict.get("CONN_MAX_AGE", 0),
+        "CONN_HEALTH_CHECKS": settings_dict.get("CONN_HEALTH_CHECKS", False),
+        "pool": options.get("pool"),
+    }
+    changes = mode_settings(mode, **kwargs)
+    connections[alias].close()
+
+    def apply(values):
+        settings_dict["CONN_MAX_AGE"] = values["CONN_MAX_AGE"]
+        settings_dict["CONN_HEALTH_CHECKS"] = values["CONN_HEALTH_CHECKS"]
+        if values["pool"]:
+            options["pool"] = values["pool"]
+        else:
+            options.pop("pool", None)
+
+    apply(changes)
+    try:
+        yield
+    finally:
+        if changes["pool"]:
+            connections[alias].close_pool()
+        apply(saved)
+
+
+class ConnectTimer:
+    """Times every DatabaseWrapper.connect() on the alias' backend class."""
+
+    def __init__(self, alias="default"):
+        self.wrapper_class = type(connections[alias])
+        self.lock = threading.Lock()
+        self.count = 0
+        self.seconds = 0.0
+
+    def __enter__(self):
+        original = self.original = self.wrapper_class.connect
+        timer = self
+
+        def connect(wrapper):
+            start = time.perf_counter()
+            try:
+                return original(wrapper)
+            finally:
+                with timer.lock:
+                    timer.count += 1
+                    timer.seconds += time.perf_counter() - start
+
+        self.wrapper_class.connect = connect
+        return self
+
+    def __exit__(self, *exc):
+        self.wrapper_class.connect = self.original
+
+
+def _worker(user, url, requests, samples, errors, barrier):
+    try:
+        client = Client()
+        client.force_login(user)
+        barrier.wait()
+        for _ in range(requests):
+            start = time.perf_counter()
+            close_old_connections()  # request_started
+            response = client.get(url)
+            close_old_connections()  # request_finished
+            samples.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise RuntimeError(f"GET {url} returned {response.status_code}")
+    except Exception as exc:  # reported by the caller
+        errors.append(exc)
+        barrier.abort()
+    finally:
+        connections.close_all()
+
+
+def run_mode(mode, user, concurrency=8, requests=100, url=None, **kwargs):
+    """Run one mode; returns a dict of latency and connect-cost figures."""
+    url = url or reverse("grading:list")
+    samples, errors = [], []
+    mark = {}
+    with connection_mode(mode, **kwargs), ConnectTimer() as timer:
+
+        def start_clock():
+            # runs once, after every worker has logged in
+            mark.update(connects=timer.count, seconds=timer.seconds, start=time.perf_counter())
+
+        barrier = threading.Barrier(concurrency + 1, action=start_clock)
+        threads = [
+            threading.Thread(target=_worker, args=(user, url, requests, samples, errors, barrier))
+            for _ in range(concurrency)
+        ]
+        for t in threads:
+            t.start()
+        try:
+            barrier.wait()  # only the request loop is timed, not the logins
+        except threading.BrokenBarrierError:
+            pass
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - mark.get("start", 0)
+    if errors:
+        raise errors[0]
+
+    total = len(samples)
+    connects = timer.count - mark["connects"]
+    connect_seconds = timer.seconds - mark["seconds"]
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "req_per_s": round(total / elapsed, 1),
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "connects": connects,
+        "connect_ms_per_request": round(connect_seconds * 1000 / total, 3),
+    }
@@ -0,0 +1,136 @@
+import json
+import platform
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from benchmarks.runner import build_scenarios, compare, run_all
+from benchmarks.seeding import Plan, seed_class
+
+DEFAULT_BASELINE = Path(__file__).resolve().parents[2] / "baseline.json"
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database with a realistic class and benchmark the "
+        "hot views (p50/p95 latency, queries per request, peak memory). "
+        "Compares against a JSON baseline and fails on regressions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=3)
+        defaults = Plan()
+        parser.add_argument("--students", type=int, default=defaults.students)
+        parser.add_argument("--team-size", type=int, default=defaults.team_size)
+        parser.add_argument("--milestones", type=int, default=defaults.milestones)
+        parser.add_argument("--criteria", type=int, default=defaults.criteria_per_milestone)
+        parser.add_argument("--docs-per-team", type=int, default=defaults.docs_per_team)
+        parser.add_argument("--policies-per-team", type=int, default=defaults.policies_per_team)
+        parser.add_argument("--diagrams-per-team", type=int, default=defaults.diagrams_per_team)
+        parser.add_argument("--body-kb", type=int, default=defaults.body_kb, help="Size of each doc body.")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument(
+            "--only",
+            action="append",
+            help="Run just this scenario (repeatable).",
+        )
+        parser.add_argument("--output", help="Write the results as JSON here.")
+        parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+        parser.add_argument(
+            "--write-baseline",
+            action="store_true",
+            help="Overwrite the baseline with these results instead of comparing.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.5,
+            help="Allowed latency/memory growth over the baseline (0.5 = 50%%).",
+        )
+
+    def handle(self, *args, **options):
+        # Never touch the real database, cache or media: everything runs
+        # against a test database and temporary directories.
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                with override_settings(
+                    CACHES=_temp_caches(tmp),
+                    MEDIA_ROOT=str(Path(tmp) / "media"),
+                    ALLOWED_HOSTS=["testserver"],
+                    INSTRUMENTATION_ENABLED=False,
+                ):
+                    results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.report(results)
+
+        report = {
+            "meta": {
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "iterations": options["iterations"],
+            },
+            "scenarios": results,
+        }
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2) + "\n")
+
+        baseline_path = Path(options["baseline"])
+        if options["write_baseline"]:
+            baseline_path.write_text(json.dumps(report, indent=2) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {baseline_path}"))
+            return
+
+        if not baseline_path.exists():
+            self.stdout.write(f"No baseline at {baseline_path}; skipping comparison.")
+            return
+        baseline = json.loads(baseline_path.read_text())["scenarios"]
+        problems = compare(results, baseline, options["tolerance"])
+        if problems:
+            for line in problems:
+                self.stderr.write(line)
+            raise CommandError(f"{len(problems)} regression(s) against {baseline_path}")
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    def run(self, options):
+        self.stdout.write("Seeding…")
+        plan = Plan(
+            students=options["students"],
+            team_size=options["team_size"],
+            milestones=options["milestones"],
+            criteria_per_milestone=options["criteria"],
+            docs_per_team=options["docs_per_team"],
+            policies_per_team=options["policies_per_team"],
+            diagrams_per_team=options["diagrams_per_team"],
+            body_kb=options["body_kb"],
+            image_variants=2,
+        )
+        handles = seed_class(plan, seed=options["seed"])
+        return run_all(
+            build_scenarios(handles),
+            iterations=options["iterations"],
+            warmup=options["warmup"],
+            only=options["only"],
+        )
+
+    def report(self, results):
+        self.stdout.write(f"{'view':<20}{'p50 ms':>10}{'p95 ms':>10}{'queries':>10}{'peak KB':>10}")
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<20}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['queries']:>10}{r['peak_kb']:>10}"
+            )
+
+
+def _temp_caches(tmp):
+    caches = {}
+    for alias, config in settings.CACHES.items():
+        caches[alias] = {**config, "LOCATION": str(Path(tmp) / "cache" / alias)}
+    return caches
@@ -0,0 +1,79 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from benchmarks.connections import MODES, pool_available, run_mode
+from grading.models import Milestone
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare database connection modes (per-request, persistent, pooled) "
+        "under concurrent requests and report how much of each request goes "
+        "to opening connections. Runs against a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=8, help="Worker threads.")
+        parser.add_argument("--requests", type=int, default=100, help="Requests per thread.")
+        parser.add_argument("--max-age", type=int, default=600, help="CONN_MAX_AGE for the persistent mode.")
+        parser.add_argument("--pool-size", type=int, help="Pool max_size (default: --concurrency).")
+        parser.add_argument("--mode", action="append", choices=MODES, help="Run just this mode (repeatable).")
+        parser.add_argument("--output", help="Write the results as JSON here.")
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            old_name = connection.settings_dict["NAME"]
+            if connection.vendor == "sqlite":
+                # an in-memory test database ignores close(), which would hide
+                # the per-request cost; use a file instead
+                connection.settings_dict.setdefault("TEST", {})["NAME"] = str(Path(tmp) / "bench.sqlite3")
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                with override_settings(ALLOWED_HOSTS=["testserver"], INSTRUMENTATION_ENABLED=False):
+                    results = self.run(options)
+            finally:
+                connection.close()
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(
+            f"{'mode':<14}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'connects':>10}{'connect ms/req':>16}"
+        )
+        for mode, r in results.items():
+            self.stdout.write(
+                f"{mode:<14}{r['req_per_s']:>9}{r['p50_ms']:>9}{r['p95_ms']:>9}"
+                f"{r['connects']:>10}{r['connect_ms_per_request']:>16}"
+            )
+        if options["output"]:
+            report = {"meta": {"database": connection.vendor}, "modes": results}
+            Path(options["output"]).write_text(json.dumps(report, indent=2) + "\n")
+
+    def run(self, options):
+        user = User.objects.create_user("bench-student", password="bench")
+        for i in range(5):
+            Milestone.objects.create(title=f"Milestone {i}", description="")
+
+        modes = options["mode"] or list(MODES)
+        if "pool" in modes and not pool_available():
+            if options["mode"]:
+                raise CommandError("The pool mode needs PostgreSQL with psycopg 3 and psycopg_pool.")
+            self.stdout.write("Skipping pool: needs PostgreSQL with psycopg 3 and psycopg_pool.")
+            modes.remove("pool")
+
+        results = {}
+        for mode in modes:
+            self.stdout.write(f"Running {mode}…")
+            results[mode] = run_mode(
+                mode,
+                user,
+                concurrency=options["concurrency"],
+                requests=options["requests"],
+                max_age=options["max_age"],
+                pool_size=options["pool_size"] or options["concurrency"],
+            )
+        return results
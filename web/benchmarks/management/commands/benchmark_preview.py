@@ -0,0 +1,66 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from benchmarks.preview import MODES, run_mode
+
+
+def _file_caches(root):
+    """Fresh file-backed caches shaped like the real ones."""
+    return {
+        alias: {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(Path(root) / alias),
+            "TIMEOUT": None if alias == "markdown" else 300,
+        }
+        for alias in ("default", "markdown", "markdown_fragments")
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure live-preview throughput with many editors typing at once, "
+        "comparing markdownx's markdownify view with the cached preview. "
+        "Uses throwaway caches; the database is not touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--editors", type=int, default=30, help="Concurrent editors (threads).")
+        parser.add_argument("--steps", type=int, default=20, help="Edits per editor.")
+        parser.add_argument("--kb", type=int, default=40, help="Size of each editor's body.")
+        parser.add_argument("--undo-rate", type=float, default=0.15, help="Share of edits that are undos.")
+        parser.add_argument("--late-rate", type=float, default=0.1, help="Share of edits followed by a late, stale request.")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--mode", action="append", choices=MODES, help="Run just this mode (repeatable).")
+        parser.add_argument("--output", help="Write the results as JSON here.")
+
+    def handle(self, *args, **options):
+        results = {}
+        for mode in options["mode"] or MODES:
+            self.stdout.write(f"Running {mode}…")
+            with tempfile.TemporaryDirectory() as tmp, override_settings(CACHES=_file_caches(tmp)):
+                results[mode] = run_mode(
+                    mode,
+                    editors=options["editors"],
+                    steps=options["steps"],
+                    kb=options["kb"],
+                    undo_rate=options["undo_rate"],
+                    late_rate=options["late_rate"],
+                    seed=options["seed"],
+                )
+
+        self.stdout.write(
+            f"{'mode':<12}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+            f"{'rendered':>10}{'hits':>7}{'superseded':>12}"
+        )
+        for mode, r in results.items():
+            self.stdout.write(
+                f"{mode:<12}{r['req_per_s']:>9}{r['p50_ms']:>9}{r['p95_ms']:>9}"
+                f"{r['rendered']:>10}{r['cache_hits']:>7}{r['superseded']:>12}"
+            )
+        if options["output"]:
+            meta = {key: options[key] for key in ("editors", "steps", "kb", "undo_rate", "late_rate", "seed")}
+            Path(options["output"]).write_text(json.dumps({"meta": meta, "modes": results}, indent=2) + "\n")
@@ -0,0 +1,87 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.seeding import BATCH_SIZE, PASSWORD, Plan, seed_class
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic class (teams, students, docs, policies, diagrams, "
+        "milestones, submissions and criterion scores) with bulk inserts. "
+        "Deterministic for a given --seed; use --rows to size it."
+    )
+
+    def add_arguments(self, parser):
+        defaults = Plan()
+        parser.add_argument(
+            "--rows",
+            type=int,
+            help="Target total row count; scales the number of students.",
+        )
+        parser.add_argument("--students", type=int, default=defaults.students)
+        parser.add_argument("--team-size", type=int, default=defaults.team_size)
+        parser.add_argument("--milestones", type=int, default=defaults.milestones)
+        parser.add_argument("--criteria", type=int, default=defaults.criteria_per_milestone)
+        parser.add_argument("--docs-per-team", type=int, default=defaults.docs_per_team)
+        parser.add_argument("--policies-per-team", type=int, default=defaults.policies_per_team)
+        parser.add_argument("--diagrams-per-team", type=int, default=defaults.diagrams_per_team)
+        parser.add_argument("--body-kb", type=int, default=defaults.body_kb)
+        parser.add_argument("--images", type=int, default=defaults.image_variants,
+                            help="Distinct generated diagram images.")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--prefix", default="seed",
+                            help="Prefix for usernames, team names and slugs.")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("--index", action="store_true",
+                            help="Rebuild the search index afterwards.")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Print the plan and row counts only.")
+
+    def handle(self, *args, **options):
+        plan_options = dict(
+            team_size=options["team_size"],
+            milestones=options["milestones"],
+            criteria_per_milestone=options["criteria"],
+            docs_per_team=options["docs_per_team"],
+            policies_per_team=options["policies_per_team"],
+            diagrams_per_team=options["diagrams_per_team"],
+            body_kb=options["body_kb"],
+            image_variants=options["images"],
+        )
+        if options["rows"]:
+            plan = Plan.for_rows(options["rows"], **plan_options)
+        else:
+            plan = Plan(students=options["students"], **plan_options)
+
+        self.stdout.write(f"Plan: {plan.describe()}")
+        self.stdout.write(f"Expected rows: {plan.total_rows():,}")
+        if options["dry_run"]:
+            for name, count in plan.row_counts().items():
+                self.stdout.write(f"  {name}: {count:,}")
+            return
+
+        from django.contrib.auth.models import User
+        if User.objects.filter(username=f"{options['prefix']}-staff").exists():
+            raise CommandError(
+                f"A class with prefix {options['prefix']!r} already exists; "
+                "pick another --prefix."
+            )
+
+        start = time.monotonic()
+        seed_class(
+            plan,
+            seed=options["seed"],
+            prefix=options["prefix"],
+            batch_size=options["batch_size"],
+            log=lambda msg: self.stdout.write(f"  {msg}"),
+        )
+        self.stdout.write(f"Seeded in {time.monotonic() - start:.1f}s")
+
+        if options["index"]:
+            from django.core.management import call_command
+            call_command("rebuild_search_index", stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. Every generated user's password is {PASSWORD!r}."
+        ))
@@ -0,0 +1,140 @@
+# benchmarks/preview.py
+"""
+Live-preview throughput with many editors typing at once.
+
+Each editor thread starts from its own seeded runbook and keeps editing
+near a cursor that drifts through the body, posting the whole body after
+every edit the way the editor does once typing pauses. Now and then it
+undoes the last edit (the same body again), and now and then a request
+from two edits ago turns up late. Views are called directly through
+RequestFactory, so only the preview work is timed.
+
+Modes:
+  markdownx  markdownx's MarkdownifyView: a full render every time
+  cached     socdocs.preview.markdown_preview
+"""
+import random
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.test import RequestFactory
+from markdownx.views import MarkdownifyView
+
+from socdocs.preview import markdown_preview
+from socdocs.rendering import chunk_memo
+
+from .runner import percentile
+from .seeding import WORDS, markdown_body
+
+MODES = ("markdownx", "cached")
+URL = "/markdownx/markdownify/"
+
+
+def _view(mode):
+    if mode == "markdownx":
+        return MarkdownifyView.as_view()
+    if mode == "cached":
+        return markdown_preview
+    raise ValueError(f"unknown mode {mode!r}")
+
+
+class Editor:
+    """One person typing into one body."""
+
+    def __init__(self, number, kb, seed):
+        self.rng = random.Random(seed * 1000 + number)
+        self.user = User(pk=number + 1, username=f"editor-{number}")
+        self.id = f"bench-{seed}-{number}"
+        self.body = markdown_body(self.rng, kb)
+        self.cursor = self.rng.randrange(len(self.body))
+        self.history = []
+        self.seq = 0
+
+    def edit(self):
+        self.history.append(self.body)
+        self.cursor = min(len(self.body), max(0, self.cursor + self.rng.randint(-40, 200)))
+        word = " " + self.rng.choice(WORDS)
+        self.body = self.body[:self.cursor] + word + self.body[self.cursor:]
+        self.cursor += len(word)
+
+    def undo(self):
+        if self.history:
+            self.body = self.history.pop()
+
+    def request(self, factory, content=None, seq=None):
+        if seq is None:
+            self.seq += 1
+            seq = self.seq
+        data = {"content": self.body if content is None else content, "editor": self.id, "seq": seq}
+        request = factory.post(URL, data)
+        request.user = self.user
+        return request
+
+
+def _worker(mode, editor, steps, undo_rate, late_rate, samples, outcomes, errors, barrier):
+    view = _view(mode)
+    factory = RequestFactory()
+    try:
+        barrier.wait()
+        for _ in range(steps):
+            if editor.rng.random() < undo_rate:
+                editor.undo()
+            else:
+                editor.edit()
+            requests = [editor.request(factory)]
+            if len(editor.history) >= 2 and editor.rng.random() < late_rate:
+                # a request from two edits ago arriving after this one
+                requests.append(editor.request(factory, editor.history[-2], editor.seq - 2))
+            for request in requests:
+                start = time.perf_counter()
+                response = view(request)
+                samples.append(time.perf_counter() - start)
+                if response.status_code == 409:
+                    outcomes.append("superseded")
+                elif response.status_code == 200:
+                    outcomes.append(response.get("X-Preview-Cache", "miss"))
+                else:
+                    raise RuntimeError(f"preview returned {response.status_code}")
+    except Exception as exc:  # reported by the caller
+        errors.append(exc)
+        barrier.abort()
+
+
+def run_mode(mode, editors=30, steps=20, kb=40, undo_rate=0.15, late_rate=0.1, seed=1):
+    """Run one mode; returns a dict of throughput and latency figures."""
+    people = [Editor(n, kb, seed) for n in range(editors)]
+    chunk_memo.clear()  # start cold, like a fresh worker
+    samples, outcomes, errors = [], [], []
+    mark = {}
+    barrier = threading.Barrier(editors + 1, action=lambda: mark.update(start=time.perf_counter()))
+    threads = [
+        threading.Thread(
+            target=_worker,
+            args=(mode, editor, steps, undo_rate, late_rate, samples, outcomes, errors, barrier),
+        )
+        for editor in people
+    ]
+    for t in threads:
+        t.start()
+    try:
+        barrier.wait()
+    except threading.BrokenBarrierError:
+        pass
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - mark.get("start", 0)
+    if errors:
+        raise errors[0]
+
+    total = len(samples)
+    return {
+        "editors": editors,
+        "requests": total,
+        "req_per_s": round(total / elapsed, 1),
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "rendered": outcomes.count("miss"),
+        "cache_hits": outcomes.count("hit"),
+        "superseded": outcomes.count("superseded"),
+    }
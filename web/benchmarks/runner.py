@@ -0,0 +1,118 @@
+# benchmarks/runner.py
+"""
+Drive the hot views through the Django test client and collect
+p50/p95 latency, queries per request and peak Python memory.
+
+Latency and query counts come from the same timed loop; peak memory is
+measured in a separate single request under tracemalloc, since tracing
+slows everything else down.
+"""
+import time
+import tracemalloc
+from collections import namedtuple
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+Scenario = namedtuple("Scenario", "name user url")
+
+
+def build_scenarios(handles):
+    """The views we care about, as the user who normally hits them."""
+    student = handles["student"]
+    staff = handles["staff"]
+    doc = handles["doc"]
+    return [
+        Scenario("docs_index", student, reverse("docs:index")),
+        Scenario("doc_view", staff, reverse("docs:detail", args=[doc.slug])),
+        Scenario("doc_section", staff, reverse("docs:section", args=[doc.slug, doc.toc[-1][1]])),
+        Scenario("policy_list", student, reverse("policies:list")),
+        Scenario("diagram_list", student, reverse("diagrams:list")),
+        Scenario("team_matrix", staff, reverse("grading:teams")),
+        Scenario("export_csv", staff, reverse("grading:export")),
+        Scenario(
+            "grade_submission",
+            staff,
+            reverse("grading:grade_submission", args=[handles["submission"].pk]),
+        ),
+    ]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = round(pct / 100 * (len(ordered) - 1))
+    return ordered[index]
+
+
+def _get(client, url):
+    response = client.get(url)
+    if response.streaming:
+        # the export does its work while being consumed
+        b"".join(response.streaming_content)
+    if response.status_code not in (200, 302):
+        raise RuntimeError(f"GET {url} returned {response.status_code}")
+    return response
+
+
+def run_scenario(scenario, iterations=20, warmup=3):
+    client = Client()
+    client.force_login(scenario.user)
+
+    for _ in range(warmup):
+        _get(client, scenario.url)
+
+    timings = []
+    queries = []
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            _get(client, scenario.url)
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(len(ctx.captured_queries))
+
+    tracemalloc.start()
+    try:
+        _get(client, scenario.url)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "p50_ms": round(percentile(timings, 50), 2),
+        "p95_ms": round(percentile(timings, 95), 2),
+        "queries": max(queries),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def run_all(scenarios, iterations=20, warmup=3, only=None):
+    results = {}
+    for scenario in scenarios:
+        if only and scenario.name not in only:
+            continue
+        results[scenario.name] = run_scenario(scenario, iterations, warmup)
+    return results
+
+
+def compare(results, baseline, tolerance=0.5):
+    """
+    Regressions against a baseline as a list of messages.
+
+    Query counts must not grow at all; latency and memory may grow by
+    ``tolerance`` (0.5 = 50%) before they count, since they depend on
+    the machine running the benchmark.
+    """
+    problems = []
+    for name, old in baseline.items():
+        new = results.get(name)
+        if new is None:
+            continue
+        if new["queries"] > old["queries"]:
+            problems.append(f"{name}: queries {old['queries']} -> {new['queries']}")
+        for metric in ("p95_ms", "peak_kb"):
+            limit = old[metric] * (1 + tolerance)
+            if new[metric] > limit:
+                problems.append(f"{name}: {metric} {old[metric]} -> {new[metric]} (limit {limit:.1f})")
+    return problems
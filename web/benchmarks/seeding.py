@@ -0,0 +1,448 @@
+# benchmarks/seeding.py
+"""
+Deterministic bulk generator for a synthetic class.
+
+Everything is written with bulk_create in batches, so save() and the
+post_save signals never run. The expensive per-row work is done once
+instead:
+  - one password hash shared by every generated user
+  - a small pool of markdown bodies, each rendered once; Policy and
+    Diagram rows get the stored HTML/excerpt copied from the pool
+  - a small pool of Pillow-generated diagram images, shared by path
+Profiles are created explicitly (the ensure_profile signal is skipped) and
+the search index is left alone unless the caller rebuilds it.
+"""
+import io
+import math
+import random
+from dataclasses import dataclass, fields
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils.text import slugify
+
+from accounts.models import Profile, Team as AccountTeam
+from diagrams.models import Diagram
+from docs.models import DocCategory, DocHeading, DocPage
+from docs.toc import anchor_headings
+from grading.gradebook import percent_of
+from grading.models import (
+    Criterion,
+    CriterionScore,
+    GradebookEntry,
+    Milestone,
+    Submission,
+    Team as GradingTeam,
+)
+from policies.models import Policy
+from socdocs.rendering import make_excerpt, markdown_config_hash, render_markdown
+
+BATCH_SIZE = 2000
+PASSWORD = "seed-password"
+
+WORDS = (
+    "alert triage siem firewall endpoint phishing escalation analyst incident "
+    "containment eradication recovery ioc hash beacon lateral movement ticket "
+    "playbook runbook splunk sysmon edr vlan segmentation backup retention "
+    "log source correlation rule severity shift handoff"
+).split()
+
+
+@dataclass
+class Plan:
+    """How many of everything to create."""
+
+    students: int = 32
+    team_size: int = 4
+    milestones: int = 6
+    criteria_per_milestone: int = 4
+    docs_per_team: int = 5
+    policies_per_team: int = 3
+    diagrams_per_team: int = 2
+    categories: int = 5
+    body_kb: int = 16
+    body_variants: int = 12
+    image_variants: int = 8
+
+    @property
+    def teams(self):
+        return max(1, math.ceil(self.students / self.team_size))
+
+    def row_counts(self):
+        teams = self.teams
+        submissions = self.students * self.milestones
+        return {
+            "users": self.students + 1,  # + the staff account
+            "profiles": self.students + 1,
+            "teams": teams * 2,  # accounts.Team + grading.Team
+            "categories": self.categories,
+            "docs": teams * self.docs_per_team,
+            "policies": teams * self.policies_per_team,
+            "diagrams": teams * self.diagrams_per_team,
+            "milestones": self.milestones,
+            "criteria": self.milestones * self.criteria_per_milestone,
+            "submissions": submissions,
+            "criterion_scores": submissions * self.criteria_per_milestone,
+            "gradebook_entries": submissions,
+        }
+
+    def total_rows(self):
+        return sum(self.row_counts().values())
+
+    @classmethod
+    def for_rows(cls, rows, **overrides):
+        """
+        Scale the student count so the plan lands close to ``rows`` rows,
+        keeping every other ratio as given.
+        """
+        plan = cls(**overrides)
+        # rows grow linearly per whole team; fit a line through two sizes
+        plan.students = plan.team_size
+        one_team = plan.total_rows()
+        plan.students = plan.team_size * 2
+        per_student = (plan.total_rows() - one_team) / plan.team_size
+        fixed = one_team - per_student * plan.team_size
+        plan.students = max(1, round((rows - fixed) / per_student))
+        return plan
+
+    def describe(self):
+        return ", ".join(f"{f.name}={getattr(self, f.name)}" for f in fields(self))
+
+
+def markdown_body(rng, kb):
+    """Roughly ``kb`` KB of markdown with headings, lists, a table and code."""
+    parts = []
+    size = 0
+    section = 0
+    while size < kb * 1024:
+        section += 1
+        block = [
+            f"## Section {section}: {rng.choice(WORDS).title()} {rng.choice(WORDS)}",
+            "",
+            " ".join(rng.choice(WORDS) for _ in range(80)) + ".",
+            "",
+            *(f"- {rng.choice(WORDS)} {rng.choice(WORDS)} **{rng.choice(WORDS)}**" for _ in range(6)),
+            "",
+            "| Field | Value | Owner |",
+            "|-------|-------|-------|",
+            *(f"| {rng.choice(WORDS)} | {rng.randint(1, 999)} | {rng.choice(WORDS)} |" for _ in range(5)),
+            "",
+            "    index=main sourcetype=syslog | stats count by host",
+            "",
+        ]
+        text = "\n".join(block)
+        parts.append(text)
+        size += len(text)
+    return "\n".join(parts)
+
+
+def diagram_image(rng, index, width=1600, height=1000):
+    """A PNG that looks vaguely like a network diagram (boxes and links)."""
+    from PIL import Image, ImageDraw
+
+    img = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(img)
+    boxes = []
+    for _ in range(rng.randint(8, 16)):
+        x = rng.randint(20, width - 220)
+        y = rng.randint(20, height - 120)
+        boxes.append((x + 100, y + 50))
+        draw.rectangle([x, y, x + 200, y + 100], outline="navy", width=3)
+        draw.text((x + 10, y + 10), rng.choice(WORDS), fill="black")
+    for a, b in zip(boxes, boxes[1:]):
+        draw.line([a, b], fill="gray", width=2)
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return ContentFile(buf.getvalue())
+
+
+def _batched(objs, batch_size):
+    batch = []
+    for obj in objs:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ClassSeeder:
+    def __init__(self, plan, seed=1, prefix="seed", batch_size=BATCH_SIZE, log=None):
+        self.plan = plan
+        self.rng = random.Random(seed)
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.log = log or (lambda msg: None)
+        self.counts = {}
+
+    def bulk(self, model, objs, label=None):
+        """bulk_create in batches; returns the pks (in order)."""
+        pks = []
+        for batch in _batched(objs, self.batch_size):
+            created = model.objects.bulk_create(batch, batch_size=self.batch_size)
+            pks.extend(obj.pk for obj in created)
+        label = label or model._meta.verbose_name_plural
+        self.counts[label] = self.counts.get(label, 0) + len(pks)
+        self.log(f"{label}: {len(pks)}")
+        return pks
+
+    def run(self):
+        with transaction.atomic():
+            return self._run()
+
+    def _run(self):
+        plan = self.plan
+        rng = self.rng
+        p = self.prefix
+
+        # ---- shared pools (the only per-item expensive work) ----
+        bodies = [markdown_body(rng, plan.body_kb) for _ in range(plan.body_variants)]
+        rendered = [render_markdown(b) for b in bodies]
+        excerpts = [make_excerpt(h) for h in rendered]
+        tocs = [anchor_headings(h)[1] for h in rendered]
+        config_hash = markdown_config_hash()
+        images = [
+            default_storage.save(f"diagrams/seed/{p}-{i:02d}.png", diagram_image(rng, i))
+            for i in range(plan.image_variants)
+        ]
+
+        # ---- people ----
+        password = make_password(PASSWORD)
+        staff = User.objects.create(
+            username=f"{p}-staff", password=password, is_staff=True
+        )
+        team_count = plan.teams
+        account_team_ids = self.bulk(
+            AccountTeam,
+            (AccountTeam(name=f"{p} Team {i:04d}", join_code=f"{p}-{i:06d}") for i in range(team_count)),
+            label="teams",
+        )
+        grading_team_ids = self.bulk(
+            GradingTeam,
+            (GradingTeam(name=f"{p} Team {i:04d}") for i in range(team_count)),
+            label="grading teams",
+        )
+        student_ids = self.bulk(
+            User,
+            (
+                User(
+                    username=f"{p}-s{i:06d}",
+                    email=f"{p}-s{i:06d}@example.com",
+                    first_name=rng.choice(WORDS).title(),
+                    password=password,
+                )
+                for i in range(plan.students)
+            ),
+            label="users",
+        )
+        # (the staff account got its profile from the post_save signal)
+        self.bulk(
+            Profile,
+            (
+                Profile(user_id=uid, team_id=account_team_ids[i // plan.team_size])
+                for i, uid in enumerate(student_ids)
+            ),
+            label="profiles",
+        )
+
+        # ---- content ----
+        category_ids = self.bulk(
+            DocCategory,
+            (DocCategory(name=f"{p} category {i}", slug=f"{p}-category-{i}") for i in range(plan.categories)),
+            label="categories",
+        )
+        doc_visibilities = [DocPage.VISIBILITY_TEAM, DocPage.VISIBILITY_CLASS]
+        doc_variants = []
+
+        def doc(t, team_id, d):
+            category_id = rng.choice(category_ids)
+            visibility = rng.choice(doc_visibilities)
+            v = rng.randrange(len(bodies))
+            doc_variants.append(v)
+            return DocPage(
+                title=f"Runbook {t:04d}-{d}",
+                slug=f"{p}-runbook-{t:04d}-{d}",
+                category_id=category_id,
+                team_id=team_id,
+                visibility=visibility,
+                body=bodies[v],
+                toc=tocs[v],
+                author=staff,
+            )
+
+        doc_ids = self.bulk(
+            DocPage,
+            (
+                doc(t, team_id, d)
+                for t, team_id in enumerate(account_team_ids)
+                for d in range(plan.docs_per_team)
+            ),
+            label="docs",
+        )
+        # bulk_create skips DocPage.save, which normally fills these in
+        self.bulk(
+            DocHeading,
+            (
+                DocHeading(page_id=pk, position=i, level=level, anchor=anchor, text=text)
+                for pk, v in zip(doc_ids, doc_variants)
+                for i, (level, anchor, text) in enumerate(tocs[v])
+            ),
+            label="doc headings",
+        )
+        categories = [c for c, _ in Policy.CATEGORY_CHOICES]
+
+        def policy(t, team_id, n):
+            v = rng.randrange(len(bodies))
+            title = f"{rng.choice(WORDS).title()} policy {t:04d}-{n}"
+            return Policy(
+                title=title,
+                slug=f"{p}-{slugify(title)}",
+                category=rng.choice(categories),
+                team_id=team_id,
+                owner_id=student_ids[min(t * plan.team_size, len(student_ids) - 1)],
+                visibility=rng.choice(["team", "class", "global"]),
+                approved=rng.random() < 0.7,
+                content=bodies[v],
+                content_html=rendered[v],
+                content_excerpt=excerpts[v],
+                rendered_with=config_hash,
+            )
+
+        self.bulk(
+            Policy,
+            (
+                policy(t, team_id, n)
+                for t, team_id in enumerate(account_team_ids)
+                for n in range(plan.policies_per_team)
+            ),
+            label="policies",
+        )
+
+        def diagram(t, team_id, n):
+            v = rng.randrange(len(bodies))
+            return Diagram(
+                title=f"Network diagram {t:04d}-{n}",
+                slug=f"{p}-diagram-{t:04d}-{n}",
+                team_id=team_id,
+                owner_id=student_ids[min(t * plan.team_size, len(student_ids) - 1)],
+                image=rng.choice(images) if images else None,
+                visibility=rng.choice(["team", "class", "global"]),
+                approved=rng.random() < 0.7,
+                notes=bodies[v],
+                notes_html=rendered[v],
+                notes_excerpt=excerpts[v],
+                rendered_with=config_hash,
+            )
+
+        self.bulk(
+            Diagram,
+            (
+                diagram(t, team_id, n)
+                for t, team_id in enumerate(account_team_ids)
+                for n in range(plan.diagrams_per_team)
+            ),
+            label="diagrams",
+        )
+
+        # ---- grading ----
+        milestone_ids = self.bulk(
+            Milestone,
+            (
+                Milestone(title=f"Milestone {i:02d}", description="Generated milestone.", max_points=100)
+                for i in range(plan.milestones)
+            ),
+            label="milestones",
+        )
+        criteria = {}
+        crit_ids = self.bulk(
+            Criterion,
+            (
+                Criterion(milestone_id=m, label=f"Criterion {c}", max_points=25, weight=1.0)
+                for m in milestone_ids
+                for c in range(plan.criteria_per_milestone)
+            ),
+            label="criteria",
+        )
+        for i, crit_id in enumerate(crit_ids):
+            criteria.setdefault(milestone_ids[i // plan.criteria_per_milestone], []).append(crit_id)
+
+        # Submissions and their scores go in lock-step, one batch at a time,
+        # so memory stays flat however many students there are.
+        comments = ["", "", "Good detail", "Missing evidence", "Nice runbook"]
+        first_submission = None
+        submission_rows = (
+            (uid, grading_team_ids[i // plan.team_size], m)
+            for i, uid in enumerate(student_ids)
+            for m in milestone_ids
+        )
+        usernames = {uid: f"{p}-s{i:06d}" for i, uid in enumerate(student_ids)}
+        team_names = {tid: f"{p} Team {i:04d}" for i, tid in enumerate(grading_team_ids)}
+        submissions = scores = 0
+        for batch in _batched(submission_rows, self.batch_size):
+            created = Submission.objects.bulk_create(
+                [
+                    Submission(
+                        student_id=uid,
+                        team_id=team_id,
+                        milestone_id=m,
+                        graded=rng.random() < 0.8,
+                        score=rng.randint(40, 100),
+                    )
+                    for uid, team_id, m in batch
+                ]
+            )
+            first_submission = first_submission or created[0]
+            submissions += len(created)
+            GradebookEntry.objects.bulk_create(
+                [
+                    GradebookEntry(
+                        submission_id=s.pk,
+                        student_id=s.student_id,
+                        milestone_id=s.milestone_id,
+                        team_id=s.team_id,
+                        username=usernames[s.student_id],
+                        team_name=team_names[s.team_id],
+                        score=s.score,
+                        graded=s.graded,
+                        percent=percent_of(s.score, 100),
+                        submitted_at=s.submitted_at,
+                    )
+                    for s in created
+                ]
+            )
+            for score_batch in _batched(
+                (
+                    CriterionScore(
+                        submission_id=s.pk,
+                        criterion_id=crit_id,
+                        points=rng.randint(0, 25),
+                        comment=rng.choice(comments),
+                    )
+                    for s in created
+                    for crit_id in criteria.get(s.milestone_id, [])
+                ),
+                self.batch_size,
+            ):
+                CriterionScore.objects.bulk_create(score_batch)
+                scores += len(score_batch)
+        self.counts["submissions"] = submissions
+        self.counts["criterion scores"] = scores
+        self.counts["gradebook entries"] = submissions
+        self.log(f"submissions: {submissions}")
+        self.log(f"criterion scores: {scores}")
+
+        return {
+            "staff": staff,
+            "student": User.objects.get(pk=student_ids[0]) if student_ids else None,
+            "doc": DocPage.objects.get(pk=doc_ids[0]) if doc_ids else None,
+            "submission": first_submission,
+        }
+
+
+def seed_class(plan=None, seed=1, prefix="seed", batch_size=BATCH_SIZE, log=None):
+    """Generate a class for ``plan`` and return handles for the benchmarks."""
+    return ClassSeeder(plan or Plan(), seed, prefix, batch_size, log).run()
@@ -1,7 +1,20 @@
 from django.contrib import admin
-from .models import Diagram
+from .models import Diagram, DiagramRendition
+
+
+class DiagramRenditionInline(admin.TabularInline):
+    model = DiagramRendition
+    extra = 0
+    fields = ("kind", "format", "file", "width", "height", "size")
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
 
 @admin.register(Diagram)
 class DiagramAdmin(admin.ModelAdmin):
     list_display = ("title","owner","created_at")
     search_fields = ("title","notes","fossflow_url","owner__username")
+    inlines = [DiagramRenditionInline]
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from diagrams.models import Diagram
+from diagrams.renditions import build_renditions
+
+
+class Command(BaseCommand):
+    help = (
+        "Build thumbnail/web renditions for diagram images. Only diagrams "
+        "with an image and no renditions are processed unless --all is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Rebuild renditions for every diagram with an image.",
+        )
+
+    def handle(self, *args, **options):
+        qs = Diagram.objects.exclude(image="").exclude(image__isnull=True)
+        if not options["all"]:
+            qs = qs.filter(renditions__isnull=True)
+
+        count = failed = 0
+        for pk in qs.values_list("pk", flat=True).distinct().iterator():
+            try:
+                build_renditions(pk)
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"Diagram {pk}: {exc}")
+                continue
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Built renditions for {count} diagram(s)."))
+        if failed:
+            self.stdout.write(self.style.WARNING(f"{failed} diagram(s) failed."))
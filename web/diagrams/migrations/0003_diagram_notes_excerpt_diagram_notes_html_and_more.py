@@ -0,0 +1,28 @@
+# Generated by Django 5.1.1 on 2026-10-17 17:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diagrams', '0002_alter_diagram_options_remove_diagram_fossflow_url_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diagram',
+            name='notes_excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name='diagram',
+            name='notes_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='diagram',
+            name='rendered_with',
+            field=models.CharField(blank=True, editable=False, max_length=12),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.1 on 2026-10-17 17:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_classconfig_profile_display_name_profile_role_in_soc'),
+        ('diagrams', '0003_diagram_notes_excerpt_diagram_notes_html_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='diagram',
+            index=models.Index(fields=['title', 'id'], name='diagrams_di_title_52c968_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.1 on 2026-10-17 17:56
+
+import diagrams.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diagrams', '0004_diagram_diagrams_di_title_52c968_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diagram',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='diagram',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='DiagramRendition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('thumb', 'Thumbnail'), ('web', 'Web')], max_length=10)),
+                ('format', models.CharField(choices=[('webp', 'WebP'), ('png', 'PNG'), ('jpeg', 'JPEG')], max_length=10)),
+                ('file', models.ImageField(upload_to=diagrams.models.rendition_upload_to)),
+                ('width', models.PositiveIntegerField(default=0)),
+                ('height', models.PositiveIntegerField(default=0)),
+                ('size', models.PositiveIntegerField(default=0, help_text='Bytes.')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('diagram', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='renditions', to='diagrams.diagram')),
+            ],
+            options={
+                'unique_together': {('diagram', 'kind', 'format')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.1 on 2026-10-17 17:58
+
+import diagrams.models
+import mediastore.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diagrams', '0005_diagram_image_height_diagram_image_width_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='diagram',
+            name='image',
+            field=models.ImageField(blank=True, help_text='Upload a PNG/JPG export of your diagram.', null=True, storage=mediastore.storage.get_cas_storage, upload_to='diagrams/'),
+        ),
+        migrations.AlterField(
+            model_name='diagramrendition',
+            name='file',
+            field=models.ImageField(storage=mediastore.storage.get_cas_storage, upload_to=diagrams.models.rendition_upload_to),
+        ),
+    ]
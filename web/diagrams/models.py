@@ -1,10 +1,62 @@
+import os
+
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import User
 from django.utils.text import slugify
 from markdownx.models import MarkdownxField
-from markdownx.utils import markdownify
 
-from accounts.models import Team  # use the team model from accounts
+from mediastore.storage import get_cas_storage
+from socdocs.rendering import (
+    EXCERPT_LENGTH,
+    make_excerpt,
+    markdown_config_hash,
+    render_incremental,
+    render_markdown,
+)
+
+from accounts.models import Team, user_team_id  # use the team model from accounts
+
+
+PUBLISHED_VISIBILITIES = ("class", "global")
+
+
+class DiagramQuerySet(models.QuerySet):
+    """
+    Visibility rules from diagrams.views.can_view_diagram / can_edit_diagram
+    compiled to SQL, so lists never have to test rows one by one.
+    """
+
+    def published(self):
+        return self.filter(approved=True, visibility__in=PUBLISHED_VISIBILITIES)
+
+    def unpublished(self):
+        return self.exclude(approved=True, visibility__in=PUBLISHED_VISIBILITIES)
+
+    def editable_by(self, user):
+        """Staff, the owner, or any member of the owning team."""
+        if not user.is_authenticated:
+            return self.none()
+        if user.is_staff:
+            return self
+        return self.filter(self._member_q(user))
+
+    def visible_to(self, user):
+        """Published rows for everyone; drafts/team-only rows for editors."""
+        if user.is_authenticated and user.is_staff:
+            return self
+        allowed = Q(approved=True, visibility__in=PUBLISHED_VISIBILITIES)
+        if user.is_authenticated:
+            allowed |= self._member_q(user)
+        return self.filter(allowed)
+
+    @staticmethod
+    def _member_q(user):
+        q = Q(owner=user)
+        team_id = user_team_id(user)
+        if team_id:
+            q |= Q(team_id=team_id)
+        return q
 
 
 class Diagram(models.Model):
@@ -35,10 +87,16 @@ class Diagram(models.Model):
     # Either upload an image OR paste a URL to Lucidchart / draw.io / etc.
     image = models.ImageField(
         upload_to="diagrams/",
+        storage=get_cas_storage,
         blank=True,
         null=True,
         help_text="Upload a PNG/JPG export of your diagram.",
     )
+    # Recorded when the renditions are built (see diagrams.renditions); not
+    # width_field/height_field, which would open the file on every load.
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+
     external_url = models.URLField(
         blank=True,
         help_text="Optional link to Lucidchart, draw.io, Excalidraw, etc.",
@@ -49,6 +107,11 @@ class Diagram(models.Model):
         help_text="Describe the diagram, assumptions, data flows, etc. (Markdown).",
     )
 
+    # Rendered copies of `notes`, refreshed on save (see rerender_markdown)
+    notes_html = models.TextField(blank=True, editable=False)
+    notes_excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, editable=False)
+    rendered_with = models.CharField(max_length=12, blank=True, editable=False)
+
     visibility = models.CharField(
         max_length=10,
         choices=VISIBILITY_CHOICES,
@@ -62,17 +125,142 @@ class Diagram(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = DiagramQuerySet.as_manager()
+
     class Meta:
         ordering = ["title"]
+        indexes = [
+            # keyset pagination on the list page
+            models.Index(fields=["title", "id"]),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remembered so save() can tell whether a new image was uploaded
+        if "image" in instance.__dict__:
+            instance._saved_image = instance.__dict__["image"]
+        return instance
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        self.refresh_html()
+        # a deferred, untouched image can't have changed
+        image_loaded = "image" in self.__dict__
         super().save(*args, **kwargs)
 
+        if not image_loaded:
+            return
+        image_name = self.image.name if self.image else ""
+        if image_name != str(getattr(self, "_saved_image", None) or ""):
+            self._saved_image = image_name
+            from .renditions import schedule_renditions
+
+            schedule_renditions(self.pk)
+
+    # ---- renditions (prefetch "renditions" on list pages) ----
+
+    def _renditions(self, fmt=None):
+        return sorted(
+            (r for r in self.renditions.all() if fmt is None or r.format == fmt),
+            key=lambda r: r.width,
+        )
+
+    def rendition(self, kind, fmt):
+        for r in self.renditions.all():
+            if r.kind == kind and r.format == fmt:
+                return r
+        return None
+
+    @property
+    def thumbnail(self):
+        """Fallback-format thumbnail, or None while renditions are pending."""
+        for r in self.renditions.all():
+            if r.kind == DiagramRendition.KIND_THUMB and r.format != DiagramRendition.FORMAT_WEBP:
+                return r
+        return None
+
+    @property
+    def thumbnail_webp(self):
+        return self.rendition(DiagramRendition.KIND_THUMB, DiagramRendition.FORMAT_WEBP)
+
+    @property
+    def web_image(self):
+        """Largest fallback-format rendition, used as the detail <img> src."""
+        fallback = [r for r in self._renditions() if r.format != DiagramRendition.FORMAT_WEBP]
+        return fallback[-1] if fallback else None
+
+    @property
+    def srcset(self):
+        return _srcset(r for r in self._renditions() if r.format != DiagramRendition.FORMAT_WEBP)
+
+    @property
+    def srcset_webp(self):
+        return _srcset(self._renditions(DiagramRendition.FORMAT_WEBP))
+
+    @property
+    def is_public(self):
+        """Approved and published: visible to everyone, including anonymous users."""
+        return self.approved and self.visibility in PUBLISHED_VISIBILITIES
+
     @property
     def html_notes(self):
-        return markdownify(self.notes or "")
+        # Rows saved before the HTML columns existed fall back to rendering.
+        if self.notes_html or not self.notes:
+            return self.notes_html
+        return render_markdown(self.notes)
+
+    def refresh_html(self):
+        self.notes_html = render_incremental(self.notes)
+        self.notes_excerpt = make_excerpt(self.notes_html)
+        self.rendered_with = markdown_config_hash()
 
     def __str__(self):
         return self.title
+
+
+def _srcset(renditions):
+    return ", ".join(f"{r.file.url} {r.width}w" for r in renditions)
+
+
+def rendition_upload_to(instance, filename):
+    """Renditions live next to the original upload."""
+    directory = os.path.dirname(instance.diagram.image.name) or "diagrams"
+    return f"{directory}/{filename}"
+
+
+class DiagramRendition(models.Model):
+    """A resized copy of Diagram.image, built off the request path."""
+
+    KIND_THUMB = "thumb"
+    KIND_WEB = "web"
+    KIND_CHOICES = [
+        (KIND_THUMB, "Thumbnail"),
+        (KIND_WEB, "Web"),
+    ]
+
+    FORMAT_WEBP = "webp"
+    FORMAT_PNG = "png"
+    FORMAT_JPEG = "jpeg"
+    FORMAT_CHOICES = [
+        (FORMAT_WEBP, "WebP"),
+        (FORMAT_PNG, "PNG"),
+        (FORMAT_JPEG, "JPEG"),
+    ]
+
+    diagram = models.ForeignKey(Diagram, on_delete=models.CASCADE, related_name="renditions")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    # identical renditions of a shared upload are stored once, like the original
+    file = models.ImageField(upload_to=rendition_upload_to, storage=get_cas_storage)
+    width = models.PositiveIntegerField(default=0)
+    height = models.PositiveIntegerField(default=0)
+    size = models.PositiveIntegerField(default=0, help_text="Bytes.")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = [("diagram", "kind", "format")]
+
+    def __str__(self):
+        return f"{self.diagram} · {self.kind}.{self.format} ({self.width}×{self.height})"
@@ -0,0 +1,132 @@
+# diagrams/renditions.py
+"""
+Resized copies of uploaded diagram images.
+
+Students upload full-resolution screenshots (often 8–15 MB), so every
+image gets a thumbnail for the list page and a web-sized copy for the
+detail page, each as WebP plus a PNG/JPEG fallback. They are written next
+to the original and recorded as DiagramRendition rows with dimensions.
+
+Building them is CPU-heavy, so Diagram.save() only enqueues a background
+job (diagrams.tasks.build_diagram_renditions) for the jobs worker. The
+job bumps the diagram's updated_at when it finishes, since the detail
+page's ETag and Last-Modified are taken from it.
+"""
+import io
+import os
+
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+# kind -> maximum width in pixels (never upscaled)
+RENDITION_WIDTHS = {
+    "thumb": 320,
+    "web": 1280,
+}
+
+# EXIF orientations that turn the image a quarter turn (width <-> height)
+ROTATED_ORIENTATIONS = (5, 6, 7, 8)
+
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+
+
+def schedule_renditions(diagram_id):
+    """Queue a rebuild; repeated saves before it runs share one job."""
+    from .tasks import build_diagram_renditions
+
+    build_diagram_renditions.enqueue(diagram_id, _key=f"diagram-renditions:{diagram_id}")
+
+
+def _encode(img, fmt):
+    buf = io.BytesIO()
+    if fmt == "webp":
+        img.save(buf, "WEBP", quality=WEBP_QUALITY, method=4)
+    elif fmt == "jpeg":
+        img.convert("RGB").save(buf, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        img.save(buf, "PNG", optimize=True)
+    return buf.getvalue()
+
+
+def _fallback_format(img):
+    """Keep PNG for screenshots/line art with transparency or a PNG source."""
+    if img.format == "PNG" or img.mode in ("RGBA", "LA", "P"):
+        return "png"
+    return "jpeg"
+
+
+def build_renditions(diagram_id):
+    """
+    (Re)build every rendition of a diagram's current image.
+    Returns the number of renditions written.
+    """
+    from PIL import ExifTags, Image, ImageOps
+
+    from .models import Diagram, DiagramRendition
+
+    diagram = Diagram.objects.filter(pk=diagram_id).first()
+    if diagram is None:
+        return 0
+
+    existing = {(r.kind, r.format): r for r in diagram.renditions.all()}
+    if not diagram.image:
+        delete_renditions(existing.values())
+        Diagram.objects.filter(pk=diagram.pk).update(
+            image_width=None, image_height=None, updated_at=timezone.now()
+        )
+        return 0
+
+    with diagram.image.open("rb") as fh:
+        source = Image.open(fh)
+        source_format = source.format
+        # the original's size: draft() below shrinks JPEGs as they decode
+        source_size = source.size
+        if source.getexif().get(ExifTags.Base.Orientation) in ROTATED_ORIENTATIONS:
+            source_size = source_size[::-1]
+        # JPEG can decode straight at a reduced scale
+        source.draft("RGB", (max(RENDITION_WIDTHS.values()),) * 2)
+        source = ImageOps.exif_transpose(source)
+        source.load()
+    source.format = source_format
+    if source.mode not in ("RGB", "RGBA"):
+        has_alpha = source.mode in ("LA", "PA") or "transparency" in source.info
+        source = source.convert("RGBA" if has_alpha else "RGB")
+
+    fallback = _fallback_format(source)
+    stem = os.path.splitext(os.path.basename(diagram.image.name))[0]
+    written = 0
+    keep = set()
+    for kind, max_width in RENDITION_WIDTHS.items():
+        img = source
+        if img.width > max_width:
+            height = round(img.height * max_width / img.width)
+            img = img.resize((max_width, height), Image.LANCZOS)
+
+        for fmt in (DiagramRendition.FORMAT_WEBP, fallback):
+            data = _encode(img, fmt)
+            rendition = existing.get((kind, fmt)) or DiagramRendition(
+                diagram=diagram, kind=kind, format=fmt
+            )
+            old_name = rendition.file.name
+            ext = "jpg" if fmt == "jpeg" else fmt
+            rendition.width, rendition.height = img.size
+            rendition.size = len(data)
+            rendition.file.save(f"{stem}.{kind}.{ext}", ContentFile(data), save=False)
+            rendition.save()
+            if old_name and old_name != rendition.file.name:
+                rendition.file.storage.delete(old_name)
+            keep.add((kind, fmt))
+            written += 1
+
+    delete_renditions(r for key, r in existing.items() if key not in keep)
+    Diagram.objects.filter(pk=diagram.pk).update(
+        image_width=source_size[0], image_height=source_size[1], updated_at=timezone.now()
+    )
+    return written
+
+
+def delete_renditions(renditions):
+    for rendition in renditions:
+        rendition.file.delete(save=False)
+        rendition.delete()
@@ -0,0 +1,9 @@
+# diagrams/tasks.py
+from jobs.queue import task
+
+from .renditions import build_renditions
+
+
+@task
+def build_diagram_renditions(diagram_id):
+    return {"renditions": build_renditions(diagram_id)}
@@ -1,3 +1,131 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from itertools import product
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import ExifTags, Image
+
+from accounts.models import Profile, Team
+from socdocs.testing import LOCMEM_CACHES
+
+from .models import Diagram, DiagramRendition
+from .renditions import build_renditions
+from .views import can_edit_diagram, can_view_diagram
+
+
+def image_upload(size, fmt="PNG", name="diagram.png", orientation=None):
+    buf = io.BytesIO()
+    exif = Image.Exif()
+    if orientation:
+        exif[ExifTags.Base.Orientation] = orientation
+    Image.new("RGB", size, "steelblue").save(buf, fmt, exif=exif)
+    return SimpleUploadedFile(name, buf.getvalue())
+
+
+class MediaRootMixin:
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RenditionTests(MediaRootMixin, TestCase):
+    def build(self, upload):
+        diagram = Diagram.objects.create(title="Network", image=upload)
+        build_renditions(diagram.pk)
+        diagram.refresh_from_db()
+        return diagram
+
+    def test_large_jpeg_keeps_its_full_size(self):
+        diagram = self.build(image_upload((4000, 3000), "JPEG", "photo.jpg"))
+        self.assertEqual((diagram.image_width, diagram.image_height), (4000, 3000))
+        sizes = {
+            (r.kind, r.format): (r.width, r.height)
+            for r in diagram.renditions.all()
+        }
+        self.assertEqual(sizes, {
+            ("thumb", "webp"): (320, 240),
+            ("thumb", "jpeg"): (320, 240),
+            ("web", "webp"): (1280, 960),
+            ("web", "jpeg"): (1280, 960),
+        })
+
+    def test_exif_rotation_swaps_the_stored_size(self):
+        diagram = self.build(image_upload((400, 300), "JPEG", "phone.jpg", orientation=6))
+        self.assertEqual((diagram.image_width, diagram.image_height), (300, 400))
+        self.assertEqual(diagram.rendition(DiagramRendition.KIND_WEB, "jpeg").width, 300)
+
+    def test_finished_renditions_change_the_etag(self):
+        diagram = Diagram.objects.create(
+            title="Network", image=image_upload((400, 300)), visibility="global", approved=True
+        )
+        url = reverse("diagrams:detail", args=[diagram.slug])
+        self.client.get(url)  # sets the CSRF cookie
+        response = self.client.get(url)
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.assertEqual(build_renditions(diagram.pk), 4)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "full size (400×300)")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class VisibilityMatrixTests(TestCase):
+    """visible_to / editable_by must agree with can_view_diagram / can_edit_diagram."""
+
+    def setUp(self):
+        blue = Team.objects.create(name="Blue")
+        red = Team.objects.create(name="Red")
+        owner = User.objects.create_user("owner")
+        self.users = {
+            "owner": owner,
+            "teammate": User.objects.create_user("teammate"),
+            "outsider": User.objects.create_user("outsider"),
+            "loner": User.objects.create_user("loner"),
+            "staff": User.objects.create_user("prof", is_staff=True),
+        }
+        Profile.objects.filter(user__username__in=["owner", "teammate"]).update(team=blue)
+        Profile.objects.filter(user__username="outsider").update(team=red)
+
+        for n, (visibility, approved, team, has_owner) in enumerate(
+            product(["team", "class", "global"], [False, True], [blue, None], [True, False])
+        ):
+            Diagram.objects.create(
+                title=f"Diagram {n}", notes="x", visibility=visibility, approved=approved,
+                team=team, owner=owner if has_owner else None,
+            )
+
+    def test_querysets_match_object_rules(self):
+        diagrams = list(Diagram.objects.all())
+        for name, user in [*self.users.items(), ("anon", AnonymousUser())]:
+            with self.subTest(user=name):
+                self.assertEqual(
+                    set(Diagram.objects.visible_to(user)),
+                    {d for d in diagrams if can_view_diagram(user, d)},
+                )
+                self.assertEqual(
+                    set(Diagram.objects.editable_by(user)),
+                    {d for d in diagrams if can_edit_diagram(user, d)},
+                )
+
+    def test_expected_counts(self):
+        published = 8  # approved class/global rows
+        counts = {
+            name: Diagram.objects.visible_to(user).count()
+            for name, user in [*self.users.items(), ("anon", AnonymousUser())]
+        }
+        self.assertEqual(
+            counts,
+            # of the 16 unpublished rows, 8 are Blue's and 8 are owned (4 both)
+            {"owner": 20, "teammate": 16, "outsider": published, "loner": published, "staff": 24, "anon": published},
+        )
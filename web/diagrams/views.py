@@ -7,18 +7,25 @@ from django.conf import settings
 
 from .models import Diagram
 from .forms import DiagramForm
-from accounts.models import Team
+from accounts.principal import principal_for
+from socdocs.conditional import conditional_detail, set_content_cache_headers
+from socdocs.pagination import paginate
 
 
-# -------- Helper to get the accounts.Team --------
-def get_user_team(user):
-    """
-    Return the accounts.Team for this user, or None.
-    Uses the Profile.team relationship we use everywhere else
-    (like the navbar).
-    """
-    prof = getattr(user, "profile", None)
-    return getattr(prof, "team", None) if prof else None
+def _edit_rule(principal, diagram):
+    return principal.is_staff or principal.is_member(diagram)
+
+
+def _view_rule(principal, diagram):
+    if principal.is_staff:
+        return True
+    if not diagram.approved or diagram.visibility == "team":
+        return _edit_rule(principal, diagram)
+    return diagram.visibility in ("class", "global")
+
+
+def _publish_rule(principal, diagram):
+    return principal.is_staff or principal.on_team_of(diagram)
 
 
 def can_edit_diagram(user, diagram: Diagram) -> bool:
@@ -28,16 +35,7 @@ def can_edit_diagram(user, diagram: Diagram) -> bool:
     - owner
     - any member of the diagram's team
     """
-    if not user.is_authenticated:
-        return False
-    if user.is_staff:
-        return True
-    if user == diagram.owner:
-        return True
-    user_team = get_user_team(user)
-    if diagram.team and user_team == diagram.team:
-        return True
-    return False
+    return principal_for(user).decide("edit", diagram, _edit_rule)
 
 
 def can_view_diagram(user, diagram: Diagram) -> bool:
@@ -46,30 +44,12 @@ def can_view_diagram(user, diagram: Diagram) -> bool:
     - Approved + class/global: anyone can view (even anon).
     - Team-only or unapproved: only owner, team members, or staff.
     """
-    # Staff can always see
-    if user.is_authenticated and user.is_staff:
-        return True
+    return principal_for(user).decide("view", diagram, _view_rule)
 
-    # Unapproved
-    if not diagram.approved:
-        if not user.is_authenticated:
-            return False
-        if can_edit_diagram(user, diagram):
-            return True
-        return False
 
-    # Approved: handle by visibility
-    if diagram.visibility in ("class", "global"):
-        return True
-
-    if diagram.visibility == "team":
-        if not user.is_authenticated:
-            return False
-        if can_edit_diagram(user, diagram):
-            return True
-        return False
-
-    return False
+def can_publish_diagram(user, diagram: Diagram) -> bool:
+    """Staff, or members of the diagram's team."""
+    return principal_for(user).decide("publish", diagram, _publish_rule)
 
 
 def diagram_list(request):
@@ -79,23 +59,24 @@ def diagram_list(request):
       - Team-only / draft diagrams for the current user's team (if any).
     """
 
-    # Approved diagrams visible to the whole class/global
-    published = Diagram.objects.filter(
-        approved=True,
-        visibility__in=["class", "global"],
-    ).order_by("title")
+    visible = (
+        Diagram.objects.visible_to(request.user)
+        .select_related("team")
+        .prefetch_related("renditions")
+        .defer("notes", "notes_html")
+    )
+
+    # Approved diagrams visible to the whole class/global, one page at a time
+    published = paginate(request, visible.published(), ("title", "id"))
 
     user_team = None
     team_diagrams = []
 
     if request.user.is_authenticated:
-        user_team = get_user_team(request.user)
+        user_team = request.principal.team
         if user_team:
             # Team’s own diagrams (including non-approved or team-only)
-            team_diagrams = (
-                Diagram.objects.filter(team=user_team)
-                .order_by("title")
-            )
+            team_diagrams = visible.filter(team=user_team).order_by("title")
 
     return render(
         request,
@@ -108,18 +89,27 @@ def diagram_list(request):
     )
 
 
+@conditional_detail("diagram", lambda request: Diagram.objects.visible_to(request.user))
 def diagram_detail(request, slug):
-    diagram = get_object_or_404(Diagram, slug=slug)
-
-    if not can_view_diagram(request.user, diagram):
-        raise Http404("Diagram not found")
+    # same rules as can_view_diagram, applied in the query
+    diagram = get_object_or_404(
+        Diagram.objects.visible_to(request.user)
+        .select_related("team", "owner")
+        .prefetch_related("renditions"),
+        slug=slug,
+    )
 
-    return render(request, "diagrams/detail.html", {"diagram": diagram})
+    response = render(
+        request,
+        "diagrams/detail.html",
+        {"diagram": diagram, "on_team": request.principal.on_team_of(diagram)},
+    )
+    return set_content_cache_headers(request, response, diagram.is_public)
 
 
 @login_required
 def diagram_create(request):
-    user_team = get_user_team(request.user)
+    user_team = request.principal.team
 
     if request.method == "POST":
         form = DiagramForm(request.POST, request.FILES)
@@ -182,10 +172,8 @@ def diagram_publish(request, slug):
     """
     diagram = get_object_or_404(Diagram, slug=slug)
 
-    if not request.user.is_staff:
-        user_team = get_user_team(request.user)
-        if not (diagram.team and user_team == diagram.team):
-            raise Http404("Diagram not found")
+    if not can_publish_diagram(request.user, diagram):
+        raise Http404("Diagram not found")
 
     if request.method == "POST":
         diagram.visibility = "class"
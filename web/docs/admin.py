@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import DocPage, DocCategory
+from .models import DocCategory, DocHeading, DocPage
 
 
 @admin.register(DocCategory)
@@ -14,3 +14,17 @@ class DocPageAdmin(admin.ModelAdmin):
     list_filter = ("category", "team", "author")
     search_fields = ("title", "body")
     prepopulated_fields = {"slug": ("title",)}
+
+
+@admin.register(DocHeading)
+class DocHeadingAdmin(admin.ModelAdmin):
+    list_display = ("text", "anchor", "level", "page")
+    search_fields = ("text", "anchor", "page__title")
+    list_select_related = ("page",)
+
+    # rows are rebuilt from DocPage.toc on every save
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand
+
+from diagrams.models import Diagram
+from docs.models import RENDER_KIND, DocPage
+from policies.models import Policy
+from docs.toc import anchor_headings
+from socdocs.rendering import markdown_config_hash, render_incremental, store_render
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill/refresh the stored HTML for policies and diagrams and warm "
+        "the DocPage render cache and heading index. Only policy/diagram rows "
+        "rendered with an older markdown configuration are touched unless "
+        "--all is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-render every row, not just stale ones.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        current = markdown_config_hash()
+        batch_size = options["batch_size"]
+
+        for model, fields in (
+            (Policy, ["content_html", "content_excerpt", "rendered_with"]),
+            (Diagram, ["notes_html", "notes_excerpt", "rendered_with"]),
+        ):
+            qs = model.objects.all()
+            if not options["all"]:
+                qs = qs.exclude(rendered_with=current)
+
+            count = 0
+            batch = []
+            for obj in qs.iterator(chunk_size=batch_size):
+                obj.refresh_html()
+                batch.append(obj)
+                if len(batch) >= batch_size:
+                    model.objects.bulk_update(batch, fields)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                model.objects.bulk_update(batch, fields)
+                count += len(batch)
+
+            self.stdout.write(f"{model.__name__}: re-rendered {count}")
+
+        # DocPage HTML lives in the markdown cache, keyed on the config hash,
+        # so a config change simply means warming the new keys. The headings
+        # come from the same render; rows whose toc moved are refreshed.
+        count = refreshed = 0
+        pages = DocPage.objects.only("pk", "updated_at", "body", "toc")
+        for page in pages.iterator(chunk_size=batch_size):
+            html, toc = anchor_headings(render_incremental(page.body))
+            store_render(RENDER_KIND, page.pk, page.updated_at, page.body, html=html)
+            if toc != page.toc:
+                page.toc = toc
+                DocPage.objects.filter(pk=page.pk).update(toc=toc)
+                page.sync_headings()
+                refreshed += 1
+            count += 1
+        self.stdout.write(f"DocPage: warmed {count}, refreshed headings on {refreshed}")
+
+        self.stdout.write(self.style.SUCCESS("Markdown rendering is up to date."))
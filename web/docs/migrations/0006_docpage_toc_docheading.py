@@ -0,0 +1,54 @@
+# Generated by Django 5.1.1 on 2026-10-17 18:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate(apps, schema_editor):
+    from docs.toc import anchor_headings
+    from socdocs.rendering import render_incremental
+
+    DocPage = apps.get_model("docs", "DocPage")
+    DocHeading = apps.get_model("docs", "DocHeading")
+    batch = []
+    for page in DocPage.objects.only("pk", "body").order_by("pk").iterator(chunk_size=200):
+        _, toc = anchor_headings(render_incremental(page.body))
+        DocPage.objects.filter(pk=page.pk).update(toc=toc)
+        batch.extend(
+            DocHeading(page_id=page.pk, position=position, level=level, anchor=anchor, text=text)
+            for position, (level, anchor, text) in enumerate(toc)
+        )
+        if len(batch) >= 1000:
+            DocHeading.objects.bulk_create(batch)
+            batch = []
+    DocHeading.objects.bulk_create(batch)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('docs', '0005_docpage_visibility_alter_docpage_team'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='docpage',
+            name='toc',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.CreateModel(
+            name='DocHeading',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('level', models.PositiveSmallIntegerField()),
+                ('anchor', models.CharField(max_length=255)),
+                ('text', models.CharField(max_length=255)),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='headings', to='docs.docpage')),
+            ],
+            options={
+                'ordering': ['page', 'position'],
+                'unique_together': {('page', 'anchor')},
+            },
+        ),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
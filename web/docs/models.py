@@ -1,8 +1,19 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import User
 from markdownx.models import MarkdownxField
 from django.utils.text import slugify
-from accounts.models import Team
+from accounts.models import Team, user_team_id
+from socdocs.rendering import cached_render, render_incremental, store_render
+from .toc import anchor_headings
+
+# Cache kind for DocPage HTML. The HTML carries heading ids, so it is kept
+# apart from entries rendered before headings were anchored.
+RENDER_KIND = "docpage-anchored"
+
+
+def _anchored_html(html):
+    return anchor_headings(html)[0]
 
 
 class DocCategory(models.Model):
@@ -18,6 +29,33 @@ class DocCategory(models.Model):
         return self.name
 
 
+class DocPageQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Same rules as docs.views.doc_view, as a single WHERE:
+        published or global docs for everyone, team-only docs for the
+        owning team, everything for staff.
+        """
+        if user.is_authenticated and user.is_staff:
+            return self
+        allowed = Q(visibility=DocPage.VISIBILITY_CLASS) | Q(team__isnull=True)
+        team_id = user_team_id(user)
+        if team_id:
+            allowed |= Q(team_id=team_id)
+        return self.filter(allowed)
+
+    def editable_by(self, user):
+        """Staff edit everything; students edit their own team's docs."""
+        if not user.is_authenticated:
+            return self.none()
+        if user.is_staff:
+            return self
+        team_id = user_team_id(user)
+        if not team_id:
+            return self.none()
+        return self.filter(team_id=team_id)
+
+
 class DocPage(models.Model):
     VISIBILITY_TEAM = "team"
     VISIBILITY_CLASS = "class"  # published to whole class
@@ -54,17 +92,94 @@ class DocPage(models.Model):
     )
 
     body = MarkdownxField()
+    # [[level, anchor, text], ...] for every heading, refreshed on save
+    toc = models.JSONField(default=list, blank=True, editable=False)
     author = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     updated_at = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = DocPageQuerySet.as_manager()
+
     class Meta:
         ordering = ["title"]
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        # updated_at still holds the previous revision until auto_now kicks in
+        previous_updated_at = self.updated_at if self.pk else None
+        previous_toc = self.toc if self.pk else []
+        # Render before the write so the headings go into the same row.
+        html, self.toc = anchor_headings(render_incremental(self.body))
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "body" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "toc"}
         super().save(*args, **kwargs)
+        # Store the HTML now so the next page view is a cache read, and drop
+        # the HTML for the revision we just replaced.
+        store_render(
+            RENDER_KIND,
+            self.pk,
+            self.updated_at,
+            self.body,
+            previous_updated_at=previous_updated_at,
+            html=html,
+        )
+        if self.toc != previous_toc:
+            self.sync_headings()
+
+    def sync_headings(self):
+        """Replace this page's DocHeading rows with the entries in toc."""
+        self.headings.all().delete()
+        DocHeading.objects.bulk_create(
+            DocHeading(page=self, position=position, level=level, anchor=anchor, text=text)
+            for position, (level, anchor, text) in enumerate(self.toc)
+        )
+
+    @property
+    def is_public(self):
+        """Visible to everyone, including anonymous users."""
+        return self.visibility == self.VISIBILITY_CLASS or self.team_id is None
+
+    @property
+    def html(self):
+        """Rendered body, served from the markdown cache when possible."""
+        return cached_render(
+            RENDER_KIND, self.pk, self.updated_at, self.body, postprocess=_anchored_html
+        )
 
     def __str__(self):
         return self.title
+
+
+class DocHeadingQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """Headings of the docs DocPageQuerySet.visible_to lets ``user`` see."""
+        return self.filter(page__in=DocPage.objects.visible_to(user))
+
+    def matching(self, q):
+        # a substring scan, but of short heading rows rather than bodies
+        return self.filter(text__icontains=q)
+
+
+class DocHeading(models.Model):
+    """
+    One heading of a DocPage, copied from DocPage.toc on save. Section
+    links and heading search read this table, never the rendered body.
+    """
+
+    page = models.ForeignKey(DocPage, on_delete=models.CASCADE, related_name="headings")
+    position = models.PositiveIntegerField()
+    level = models.PositiveSmallIntegerField()
+    anchor = models.CharField(max_length=255)
+    text = models.CharField(max_length=255)
+
+    objects = DocHeadingQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["page", "position"]
+        # also the index section links are resolved through
+        unique_together = [("page", "anchor")]
+
+    def __str__(self):
+        return f"{self.page} § {self.text}"
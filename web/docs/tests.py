@@ -1,3 +1,271 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser, User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from markdownx.utils import markdownify
+
+from accounts.models import Profile, Team
+from accounts.principal import principal_for
+from socdocs import blocks
+from socdocs.preview import preview_cache_key
+from socdocs.rendering import (
+    EXCERPT_LENGTH,
+    get_cache,
+    get_fragment_cache,
+    make_excerpt,
+    object_cache_key,
+    render_chunks,
+    render_incremental,
+)
+from socdocs.testing import LOCMEM_CACHES
+
+from .models import RENDER_KIND, DocHeading, DocPage
+from .views import _team_rule
+
+SECTION = """## Section {n}
+
+Intro paragraph for section {n} with *emphasis* and a [link][ref].
+
+- first item
+- second item
+
+- loose item after a blank line
+
+    indented code
+    more code
+
+    code after a blank line
+
+> quoted
+> text
+
+> second quote merges with the first
+
+| Field | Value |
+|-------|-------|
+| host  | {n}   |
+
+Setext heading {n}
+------------------
+"""
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class IncrementalRenderTests(SimpleTestCase):
+    def runbook(self, sections=60, tail='\n[ref]: https://example.com/runbook "Runbook"\n'):
+        return "\n".join(SECTION.format(n=n) for n in range(sections)) + tail
+
+    def test_matches_markdownify(self):
+        for text in (
+            self.runbook(),
+            self.runbook(tail=""),
+            self.runbook(tail="\n<div>\n\nraw html\n\n</div>\n"),
+            self.runbook(tail="\n> [ref]: https://example.com/quoted\n"),
+            "   \n" + self.runbook(),
+            self.runbook().replace("\n", "\r\n"),
+        ):
+            self.assertEqual(render_incremental(text), markdownify(text))
+
+    def test_small_edit_renders_one_chunk(self):
+        text = self.runbook()
+        chunks, references = blocks.split_document(text)
+        self.assertGreater(len(chunks), 3)
+        render_chunks(chunks, references)
+
+        edited = text.replace("host  | 30 ", "host  | 31 ")
+        chunks, references = blocks.split_document(edited)
+        html, rendered = render_chunks(chunks, references)
+        self.assertEqual(rendered, 1)
+        self.assertEqual(html, markdownify(edited))
+
+    def test_definitions_outside_blocks_are_not_split(self):
+        text = self.runbook(tail="\nText then [ref]: https://example.com/inline\n")
+        chunks, _ = blocks.split_document(text)
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(render_incremental(text), markdownify(text))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RenderCacheTests(TestCase):
+    def test_html_is_rendered_on_save_and_keyed_on_revision(self):
+        page = DocPage.objects.create(title="Runbook", body="# One")
+        first_key = object_cache_key(RENDER_KIND, page.pk, page.updated_at)
+        self.assertIn("One</h1>", get_cache().get(first_key))
+
+        with mock.patch("socdocs.rendering.markdownify") as render:
+            page = DocPage.objects.get(pk=page.pk)
+            self.assertIn("One</h1>", page.html)
+        render.assert_not_called()
+
+        page.body = "# Two"
+        page.save()
+        self.assertIsNone(get_cache().get(first_key))
+        self.assertIn("Two</h1>", DocPage.objects.get(pk=page.pk).html)
+
+    def test_config_change_changes_the_key(self):
+        page = DocPage.objects.create(title="Runbook", body="# One")
+        key = object_cache_key(RENDER_KIND, page.pk, page.updated_at)
+        with mock.patch("socdocs.rendering.markdown_config_hash", return_value="other"):
+            self.assertNotEqual(object_cache_key(RENDER_KIND, page.pk, page.updated_at), key)
+
+
+class ExcerptTests(SimpleTestCase):
+    def test_entities_are_decoded_before_truncating(self):
+        self.assertEqual(make_excerpt(markdownify("A & B, 1 < 2")), "A & B, 1 < 2")
+        excerpt = make_excerpt("<p>" + "&amp;" * EXCERPT_LENGTH + "</p>", words=1)
+        self.assertEqual(excerpt, "&" * EXCERPT_LENGTH)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PreviewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("writer", password="x")
+        self.client.force_login(self.user)
+        self.url = reverse("markdown_preview")
+
+    def post(self, content, **extra):
+        return self.client.post(self.url, {"content": content, **extra})
+
+    def test_renders_like_markdownify_and_caches(self):
+        first = self.post("# Title\n\nSome *text*.")
+        self.assertEqual(first.content.decode(), markdownify("# Title\n\nSome *text*."))
+        self.assertEqual(first["X-Preview-Cache"], "miss")
+        self.assertEqual(self.post("# Title\n\nSome *text*.")["X-Preview-Cache"], "hit")
+        # kept out of the cache that holds saved DocPage renders
+        key = preview_cache_key("# Title\n\nSome *text*.")
+        self.assertIsNone(get_cache().get(key))
+        self.assertIsNotNone(get_fragment_cache().get(key))
+
+    def test_superseded_requests_are_rejected(self):
+        self.assertEqual(self.post("two", editor="e1", seq=2).status_code, 200)
+        late = self.post("one", editor="e1", seq=1)
+        self.assertEqual(late.status_code, 409)
+        self.assertEqual(self.post("one", editor="e2", seq=1).status_code, 200)
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.post("text").status_code, 403)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class HeadingIndexTests(TestCase):
+    BODY = "# Runbook\n\n## Restart the *proxy*\n\ntext\n\n### Check logs\n\n## Restart the proxy\n"
+
+    def setUp(self):
+        self.page = DocPage.objects.create(
+            title="Proxy runbook", body=self.BODY, visibility=DocPage.VISIBILITY_CLASS
+        )
+
+    def test_save_stores_toc_headings_and_anchored_html(self):
+        self.assertEqual(self.page.toc, [
+            [1, "runbook", "Runbook"],
+            [2, "restart-the-proxy", "Restart the proxy"],
+            [3, "check-logs", "Check logs"],
+            [2, "restart-the-proxy-2", "Restart the proxy"],
+        ])
+        self.assertEqual(
+            list(self.page.headings.values_list("anchor", flat=True)),
+            [anchor for _, anchor, _ in self.page.toc],
+        )
+        self.assertIn('<h3 id="check-logs">Check logs</h3>', self.page.html)
+
+        self.page.body = "## Only heading\n"
+        self.page.save()
+        self.assertEqual(list(self.page.headings.values_list("anchor", flat=True)), ["only-heading"])
+
+    def test_section_link_redirects_without_rendering(self):
+        detail = reverse("docs:detail", args=[self.page.slug])
+        with mock.patch("socdocs.rendering.markdownify") as render:
+            response = self.client.get(reverse("docs:section", args=[self.page.slug, "check-logs"]))
+            self.assertRedirects(response, f"{detail}#check-logs", fetch_redirect_response=False)
+            response = self.client.get(reverse("docs:section", args=[self.page.slug, "gone"]))
+            self.assertRedirects(response, detail, fetch_redirect_response=False)
+        render.assert_not_called()
+
+        team = Team.objects.create(name="Blue")
+        hidden = DocPage.objects.create(title="Hidden", body="## Secret\n", team=team)
+        response = self.client.get(reverse("docs:section", args=[hidden.slug, "secret"]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_search_lists_matching_sections(self):
+        response = self.client.get(reverse("search:results"), {"q": "check"})
+        self.assertContains(response, reverse("docs:section", args=[self.page.slug, "check-logs"]))
+        self.assertEqual(DocHeading.objects.visible_to(response.wsgi_request.user).count(), 4)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.page = DocPage.objects.create(
+            title="Proxy runbook", body="## Restart\n", visibility=DocPage.VISIBILITY_CLASS
+        )
+
+    def test_etag_tracks_csrf_messages_and_render_version(self):
+        url = reverse("docs:detail", args=[self.page.slug])
+        user = User.objects.create_user("reader", password="x")
+        self.client.force_login(user)
+        self.client.get(url)  # sets the CSRF cookie
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # a new login rotates the CSRF secret the page's forms carry
+        self.client.logout()
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        self.client.get(url)
+        etag = self.client.get(url)["ETag"]
+        # a teamless student is bounced back to the unchanged doc with an error
+        self.client.get(reverse("grading:submit_from_doc", args=[self.page.slug]))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, "You must be on a team")
+        with mock.patch("socdocs.conditional.markdown_config_hash", return_value="changed"):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class VisibilityMatrixTests(TestCase):
+    """visible_to / editable_by must agree with the per-page rules."""
+
+    def setUp(self):
+        blue = Team.objects.create(name="Blue")
+        red = Team.objects.create(name="Red")
+        self.users = {
+            "member": User.objects.create_user("member"),
+            "outsider": User.objects.create_user("outsider"),
+            "loner": User.objects.create_user("loner"),
+            "staff": User.objects.create_user("prof", is_staff=True),
+            "anon": AnonymousUser(),
+        }
+        Profile.objects.filter(user__username="member").update(team=blue)
+        Profile.objects.filter(user__username="outsider").update(team=red)
+        author = self.users["member"]
+        for visibility in (DocPage.VISIBILITY_TEAM, DocPage.VISIBILITY_CLASS):
+            for team in (blue, red, None):
+                DocPage.objects.create(
+                    title=f"{visibility} {team}", body="# Heading", visibility=visibility, team=team, author=author
+                )
+
+    @staticmethod
+    def can_view(user, page):
+        principal = principal_for(user)
+        return principal.is_staff or page.is_public or principal.on_team_of(page)
+
+    def test_querysets_match_page_rules(self):
+        pages = list(DocPage.objects.all())
+        for name, user in self.users.items():
+            with self.subTest(user=name):
+                visible = {p for p in pages if self.can_view(user, p)}
+                self.assertEqual(set(DocPage.objects.visible_to(user)), visible)
+                self.assertEqual(
+                    set(DocPage.objects.editable_by(user)),
+                    {p for p in pages if principal_for(user).decide("edit", p, _team_rule)},
+                )
+                self.assertEqual({h.page for h in DocHeading.objects.visible_to(user)}, visible)
+
+    def test_detail_view_follows_visible_to(self):
+        self.client.force_login(self.users["outsider"])
+        for page in DocPage.objects.all():
+            expected = 200 if page.is_public or page.team.name == "Red" else 404
+            self.assertEqual(self.client.get(reverse("docs:detail", args=[page.slug])).status_code, expected, page)
@@ -0,0 +1,91 @@
+# docs/toc.py
+"""
+Headings and table of contents for rendered docs.
+
+anchor_headings() gives every <h1>–<h6> in rendered HTML an id and lists
+them as compact [level, anchor, text] entries; DocPage keeps that list in
+its ``toc`` column and copies it into DocHeading, so the page view can
+draw a table of contents and section links can be resolved without
+rendering anything. toc_tree() nests the flat list for the template.
+
+Anchors are slugs of the heading text ("section" when that is empty),
+with -2, -3… added to repeats. A heading that already carries an id
+(raw HTML in the body) keeps it.
+"""
+import re
+from html import unescape
+
+from django.utils.html import strip_tags
+from django.utils.text import slugify
+
+HEADING_RE = re.compile(r"<h([1-6])(\s[^>]*)?>(.*?)</h\1\s*>", re.IGNORECASE | re.DOTALL)
+ID_RE = re.compile(r"""\bid\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE)
+ANCHOR_MAX_LENGTH = 80
+TEXT_MAX_LENGTH = 255
+
+
+def _existing_id(attrs):
+    match = ID_RE.search(attrs or "")
+    if not match:
+        return None
+    return unescape(next(group for group in match.groups() if group is not None))
+
+
+def heading_text(inner_html):
+    """Plain text of a heading's inner HTML, whitespace collapsed."""
+    return " ".join(unescape(strip_tags(inner_html)).split())
+
+
+def anchor_headings(html):
+    """
+    Return (html, entries): the HTML with an id on every heading, and one
+    [level, anchor, text] entry per heading in document order. Headings
+    whose id repeats an earlier one, or could not be a URL path segment,
+    are left out of the entries.
+    """
+    used = {_existing_id(m.group(2)) for m in HEADING_RE.finditer(html)} - {None, ""}
+    seen = set()
+    entries = []
+
+    def anchor_for(text):
+        base = slugify(text)[:ANCHOR_MAX_LENGTH].strip("-") or "section"
+        anchor, n = base, 1
+        while anchor in used:
+            n += 1
+            anchor = f"{base}-{n}"
+        used.add(anchor)
+        return anchor
+
+    def replace(match):
+        level, attrs, inner = match.groups()
+        text = heading_text(inner)
+        anchor = _existing_id(attrs)
+        if anchor:
+            tag = match.group(0)
+        else:
+            anchor = anchor_for(text)
+            tag = f'<h{level} id="{anchor}"{attrs or ""}>{inner}</h{level}>'
+        if anchor not in seen and len(anchor) <= TEXT_MAX_LENGTH and "/" not in anchor:
+            seen.add(anchor)
+            entries.append([int(level), anchor, text[:TEXT_MAX_LENGTH]])
+        return tag
+
+    return HEADING_RE.sub(replace, html), entries
+
+
+def toc_tree(entries):
+    """
+    Nest flat [level, anchor, text] entries into
+    [{"level", "anchor", "text", "children": [...]}, ...]. A heading sits
+    under the nearest earlier heading of a smaller level, so skipped
+    levels (h2 straight to h4) still nest.
+    """
+    root = []
+    stack = []  # (level, children list)
+    for level, anchor, text in entries:
+        node = {"level": level, "anchor": anchor, "text": text, "children": []}
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        (stack[-1][1] if stack else root).append(node)
+        stack.append((level, node["children"]))
+    return root
@@ -9,4 +9,5 @@ urlpatterns = [
     path("<slug:slug>/", views.doc_view, name="detail"),
     path("<slug:slug>/edit/", views.doc_edit, name="edit"),
     path("<slug:slug>/publish/", views.doc_publish, name="publish"),  # <-- NEW
+    path("<slug:slug>/section/<str:anchor>/", views.doc_section, name="section"),
 ]
@@ -1,65 +1,117 @@
+from itertools import groupby
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
-from django.http import Http404
+from django.db.models import Case, IntegerField, Value, When
+from django.db.models.functions import Coalesce
+from django.http import Http404, HttpResponseForbidden
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 
-from markdownx.utils import markdownify
-
-from accounts.models import Profile
+from accounts.principal import principal_for
+from socdocs.conditional import conditional_detail, set_content_cache_headers
+from socdocs.pagination import paginate
 from .forms import DocPageForm
-from .models import DocCategory, DocPage
+from .models import RENDER_KIND, DocCategory, DocHeading, DocPage
+from .toc import toc_tree
 
 
-def _user_team(user):
-    """Return the user's team or None (handles missing profile)."""
-    if not user.is_authenticated:
-        return None
-    try:
-        return user.profile.team
-    except Profile.DoesNotExist:
-        return None
+def _team_rule(principal, page):
+    """Edit/publish: staff, or members of the page's team."""
+    return principal.is_staff or principal.on_team_of(page)
 
 
-def docs_index(request):
-    qs = DocPage.objects.select_related("category", "team").order_by("title")
+# Published docs are listed by category (uncategorized last), then title.
+PUBLIC_KEYS = ("uncategorized", "category_name", "title", "id")
 
-    # Docs visible to the whole class (includes global docs with no team)
-    public_pages = qs.filter(visibility="class")
+
+def docs_index(request):
+    qs = (
+        DocPage.objects.visible_to(request.user)
+        .select_related("category", "team")
+        .defer("body", "toc")
+    )
+
+    # Docs visible to the whole class (includes global docs with no team),
+    # one page at a time, grouped by category in a single ordered pass.
+    public_qs = qs.filter(visibility="class").annotate(
+        uncategorized=Case(
+            When(category__isnull=True, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+        category_name=Coalesce("category__name", Value("")),
+    )
+    page = paginate(request, public_qs, PUBLIC_KEYS)
+    public_groups = [
+        (pages[0].category, pages)
+        for pages in (
+            list(group) for _, group in groupby(page, key=lambda p: p.category_id)
+        )
+    ]
 
     # Docs for the current user's team (team-only + published)
     team_pages = None
-    profile = getattr(request.user, "profile", None)
-    if profile and profile.team_id:
-        team_pages = qs.filter(team=profile.team)
-
-    categories = DocCategory.objects.order_by("name")
+    team_id = request.principal.team_id
+    if team_id:
+        team_pages = qs.filter(team_id=team_id).order_by("title")
 
     context = {
-        "categories": categories,
-        "public_pages": public_pages,
+        "page": page,
+        "public_groups": public_groups,  # [(category or None, [pages…]), ...]
         "team_pages": team_pages,
     }
     return render(request, "docs/index.html", context)
 
 
+@conditional_detail(
+    "docpage", lambda request: DocPage.objects.visible_to(request.user), render_kind=RENDER_KIND
+)
 def doc_view(request, slug):
     """
     - Published (visibility=class): visible to everyone.
     - Team-only (visibility=team):
          - Staff OR members of that team only.
     - Global instructor docs: typically visibility=class, team=None.
-    """
-    page = get_object_or_404(DocPage, slug=slug)
 
-    if page.visibility == DocPage.VISIBILITY_TEAM and page.team:
-        if not request.user.is_staff:
-            team = _user_team(request.user)
-            if team != page.team:
-                raise Http404("Document not found")
+    The rules live in DocPageQuerySet.visible_to, so an invisible doc is
+    simply not found.
+    """
+    page = get_object_or_404(
+        DocPage.objects.visible_to(request.user).select_related("team", "category", "author"),
+        slug=slug,
+    )
+
+    html = page.html
+    response = render(
+        request,
+        "docs/view.html",
+        {
+            "page": page,
+            "html": html,
+            "toc": toc_tree(page.toc),
+            "on_team": request.principal.on_team_of(page),
+        },
+    )
+    return set_content_cache_headers(request, response, page.is_public)
+
+
+def doc_section(request, slug, anchor):
+    """
+    Link to one section of a doc: /docs/<slug>/section/<anchor>/.
 
-    html = markdownify(page.body)
-    return render(request, "docs/view.html", {"page": page, "html": html})
+    Resolved from DocHeading alone and answered with a redirect to the
+    heading's anchor on the doc page, so following a section link never
+    renders anything. A heading that has since been renamed or removed
+    lands on the top of the doc instead.
+    """
+    visible = DocPage.objects.visible_to(request.user)
+    url = reverse("docs:detail", args=[slug])
+    if DocHeading.objects.filter(page__in=visible, page__slug=slug, anchor=anchor).exists():
+        return redirect(f"{url}#{anchor}")
+    if visible.filter(slug=slug).exists():
+        return redirect(url)
+    raise Http404("No such doc.")
 
 
 @login_required
@@ -70,7 +122,7 @@ def doc_create(request):
     - Staff can create global docs (team=None) which we usually treat
       as published to class.
     """
-    team = _user_team(request.user)
+    team = request.principal.team
 
     if not request.user.is_staff and not team:
         messages.error(
@@ -108,15 +160,9 @@ def doc_edit(request, slug):
     page = get_object_or_404(DocPage, slug=slug)
 
     # -------- Permission check --------
-    if not request.user.is_staff:
-        try:
-            profile = request.user.profile
-        except Profile.DoesNotExist:
-            return HttpResponseForbidden("You do not have permission to edit this page.")
-
-        # Must belong to the same team as the page
-        if not page.team or profile.team_id != page.team_id:
-            return HttpResponseForbidden("You do not have permission to edit this page.")
+    # Staff, or members of the same team as the page
+    if not principal_for(request.user).decide("edit", page, _team_rule):
+        return HttpResponseForbidden("You do not have permission to edit this page.")
 
     # -------- Handle form --------
     if request.method == "POST":
@@ -158,12 +204,10 @@ def doc_publish(request, slug):
       - Only staff can edit it.
     """
     page = get_object_or_404(DocPage, slug=slug)
-    team = _user_team(request.user)
 
     # Only staff OR members of the owning team can publish
-    if not request.user.is_staff:
-        if not (page.team and team == page.team):
-            raise Http404("Document not found")
+    if not principal_for(request.user).decide("publish", page, _team_rule):
+        raise Http404("Document not found")
 
     if request.method == "POST":
         page.visibility = DocPage.VISIBILITY_CLASS
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Team, Milestone, Criterion, Submission, Evidence, CriterionScore
+from .models import Team, Milestone, Criterion, Submission, Evidence, CriterionScore, GradebookEntry
+from .tasks import rescore_milestone
 
 class CriterionInline(admin.TabularInline):
     model = Criterion
@@ -10,6 +11,12 @@ class MilestoneAdmin(admin.ModelAdmin):
     list_display = ("title","due_date","max_points")
     inlines = [CriterionInline]
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # criterion weights may have changed: rescore graded work in the background
+        if change:
+            rescore_milestone.enqueue(form.instance.pk, _key=f"rescore-milestone:{form.instance.pk}")
+
 class EvidenceInline(admin.TabularInline):
     model = Evidence
     extra = 0
@@ -28,4 +35,14 @@ class SubmissionAdmin(admin.ModelAdmin):
 @admin.register(Team)
 class TeamAdmin(admin.ModelAdmin):
     list_display = ("name",)
-    filter_horizontal = ("members",)
\ No newline at end of file
+    filter_horizontal = ("members",)
+@admin.register(GradebookEntry)
+class GradebookEntryAdmin(admin.ModelAdmin):
+    # maintained from Submission; rebuild with `manage.py rebuild_gradebook`
+    list_display = ("username","milestone","team_name","score","percent","graded","updated_at")
+    list_filter = ("graded","milestone")
+    search_fields = ("username","team_name")
+    readonly_fields = [f.name for f in GradebookEntry._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from grading.gradebook import rebuild_gradebook
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the materialized gradebook (GradebookEntry) from submissions. "
+        "Entries are normally kept in step as grades are saved; run this after "
+        "bulk imports or raw SQL changes."
+    )
+
+    def handle(self, *args, **options):
+        count = rebuild_gradebook()
+        self.stdout.write(self.style.SUCCESS(f"Gradebook rebuilt: {count} entries."))
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.1 on 2026-10-17 17:57
+
+import mediastore.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grading', '0005_remove_submission_doc_submission_doc_page'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='evidence',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=mediastore.storage.get_cas_storage, upload_to='evidence/'),
+        ),
+    ]
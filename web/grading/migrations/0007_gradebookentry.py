@@ -0,0 +1,63 @@
+# Generated by Django 5.1.1 on 2026-10-17 18:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate(apps, schema_editor):
+    Submission = apps.get_model("grading", "Submission")
+    GradebookEntry = apps.get_model("grading", "GradebookEntry")
+    batch = []
+    rows = Submission.objects.select_related("student", "milestone", "team").order_by("pk")
+    for sub in rows.iterator(chunk_size=1000):
+        max_points = sub.milestone.max_points
+        batch.append(GradebookEntry(
+            submission_id=sub.pk,
+            student_id=sub.student_id,
+            milestone_id=sub.milestone_id,
+            team_id=sub.team_id,
+            username=sub.student.username,
+            team_name=sub.team.name if sub.team else "",
+            score=sub.score,
+            graded=sub.graded,
+            percent=round(sub.score * 100 / max_points, 2) if max_points else None,
+            submitted_at=sub.submitted_at,
+        ))
+        if len(batch) >= 1000:
+            GradebookEntry.objects.bulk_create(batch)
+            batch = []
+    GradebookEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grading', '0006_alter_evidence_file'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradebookEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('username', models.CharField(max_length=150)),
+                ('team_name', models.CharField(blank=True, max_length=64)),
+                ('score', models.FloatField(default=0)),
+                ('graded', models.BooleanField(default=False)),
+                ('percent', models.FloatField(blank=True, null=True)),
+                ('submitted_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('milestone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gradebook_entries', to='grading.milestone')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gradebook_entries', to=settings.AUTH_USER_MODEL)),
+                ('submission', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='gradebook_entry', to='grading.submission')),
+                ('team', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='gradebook_entries', to='grading.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['username', 'student', 'milestone'], name='grading_gra_usernam_c753cc_idx'), models.Index(fields=['team', 'milestone', 'graded'], name='grading_gra_team_id_08b34d_idx')],
+                'unique_together': {('student', 'milestone')},
+            },
+        ),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
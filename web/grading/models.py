@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+from mediastore.storage import get_cas_storage
+
 # ⬇️ add this import at top
 # (string reference also works, so this import is *optional* but nice)
 # from docs.models import DocPage
@@ -64,7 +66,7 @@ class Evidence(models.Model):
     submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name="evidence")
     title = models.CharField(max_length=200)
     link = models.URLField(blank=True)
-    file = models.FileField(upload_to="evidence/", blank=True, null=True)
+    file = models.FileField(upload_to="evidence/", storage=get_cas_storage, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
 
@@ -76,3 +78,37 @@ class CriterionScore(models.Model):
 
     class Meta:
         unique_together = [("submission", "criterion")]
+
+
+class GradebookEntry(models.Model):
+    """
+    Denormalized gradebook row, one per submission (so per student ×
+    milestone). Kept in step by grading.gradebook.sync_entries() whenever a
+    submission is saved or rescored, and rebuilt from scratch with
+    ``manage.py rebuild_gradebook``. The instructor views and exports read
+    this table instead of aggregating Submission/CriterionScore.
+
+    ``username`` and ``team_name`` are copies taken when the entry was last
+    synced, i.e. the team the work was graded under.
+    """
+    submission = models.OneToOneField(Submission, on_delete=models.CASCADE, related_name="gradebook_entry")
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="gradebook_entries")
+    milestone = models.ForeignKey(Milestone, on_delete=models.CASCADE, related_name="gradebook_entries")
+    team = models.ForeignKey(Team, on_delete=models.SET_NULL, null=True, blank=True, related_name="gradebook_entries")
+    username = models.CharField(max_length=150)
+    team_name = models.CharField(max_length=64, blank=True)
+    score = models.FloatField(default=0)
+    graded = models.BooleanField(default=False)
+    percent = models.FloatField(null=True, blank=True)  # of Milestone.max_points
+    submitted_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [("student", "milestone")]
+        indexes = [
+            models.Index(fields=["username", "student", "milestone"]),  # exports
+            models.Index(fields=["team", "milestone", "graded"]),  # team matrix
+        ]
+
+    def __str__(self):
+        return f"{self.username} – {self.milestone_id}: {self.score}"
@@ -0,0 +1,73 @@
+# grading/services.py
+"""
+Bulk scoring helpers shared by the grading views (and anything that needs
+to rescore after a rubric change).
+"""
+from django.db.models import F, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .gradebook import sync_entries
+from .models import Criterion, CriterionScore, Submission
+
+
+def _submission_ids(submissions):
+    """Accept a queryset, Submission instances or plain pks."""
+    if hasattr(submissions, "values_list"):
+        return submissions.values("pk")
+    return [getattr(s, "pk", s) for s in submissions]
+
+
+def ensure_criterion_scores(submissions):
+    """
+    Make sure every submission has a CriterionScore row for each criterion
+    of its milestone. Missing rows are inserted with one bulk INSERT;
+    existing ones are left alone thanks to the unique constraint.
+    """
+    submissions = list(submissions)
+    milestone_ids = {s.milestone_id for s in submissions}
+    criteria = {}
+    for crit_id, milestone_id in Criterion.objects.filter(
+        milestone_id__in=milestone_ids
+    ).values_list("id", "milestone_id"):
+        criteria.setdefault(milestone_id, []).append(crit_id)
+
+    CriterionScore.objects.bulk_create(
+        [
+            CriterionScore(submission_id=s.pk, criterion_id=crit_id)
+            for s in submissions
+            for crit_id in criteria.get(s.milestone_id, [])
+        ],
+        ignore_conflicts=True,
+        batch_size=1000,
+    )
+
+
+def weighted_total():
+    """Correlated subquery: sum(points × criterion weight) for the outer Submission."""
+    totals = (
+        CriterionScore.objects.filter(submission=OuterRef("pk"))
+        .order_by()
+        .values("submission")
+        .annotate(total=Sum(F("points") * F("criterion__weight"), output_field=FloatField()))
+        .values("total")
+    )
+    return Coalesce(Subquery(totals), Value(0.0), output_field=FloatField())
+
+
+def recompute_scores(submissions, graded=None):
+    """
+    Recompute Submission.score from its criterion scores in a single UPDATE.
+
+    ``submissions`` may be a queryset (kept as a subquery, so thousands of
+    rows still cost one statement), instances or pks. Pass ``graded=True``
+    to mark them graded in the same statement. The matching gradebook
+    entries are refreshed afterwards. Returns the row count.
+    """
+    changes = {"score": weighted_total()}
+    if graded is not None:
+        changes["graded"] = graded
+    ids = _submission_ids(submissions)
+    updated = Submission.objects.filter(pk__in=ids).update(**changes)
+    if updated:
+        sync_entries(ids)
+    return updated
@@ -0,0 +1,40 @@
+from django.contrib.auth.models import User
+from django.db.models import F, Value
+from django.db.models.functions import Round
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .gradebook import sync_entries
+from .models import GradebookEntry, Milestone, Submission
+
+
+# ----- keep the materialized gradebook in step -----
+
+@receiver(post_save, sender=Submission)
+def submission_saved(sender, instance, raw=False, **kwargs):
+    # bulk score updates go through services.recompute_scores instead
+    if not raw:
+        sync_entries([instance.pk])
+
+
+@receiver(post_save, sender=Milestone)
+def milestone_saved(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    # max_points may have changed; percent is the only derived column
+    if instance.max_points:
+        percent = Round(F("score") * Value(100.0) / Value(float(instance.max_points)), 2)
+    else:
+        percent = None
+    GradebookEntry.objects.filter(milestone=instance).update(percent=percent)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # skip e.g. the last_login update on every sign-in
+    if update_fields is not None and "username" not in update_fields:
+        return
+    if not created and not raw:
+        GradebookEntry.objects.filter(student=instance).exclude(
+            username=instance.username
+        ).update(username=instance.username)
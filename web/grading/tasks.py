@@ -0,0 +1,38 @@
+# grading/tasks.py
+import tempfile
+import uuid
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+from jobs.queue import task
+
+from . import exports
+from .models import Submission
+from .services import recompute_scores
+
+EXPORT_DIR = "exports"
+
+
+@task
+def rescore_milestone(milestone_id):
+    """Recompute graded scores after a rubric (criterion weight) change."""
+    updated = recompute_scores(Submission.objects.filter(milestone_id=milestone_id, graded=True))
+    return {"updated": updated}
+
+
+@task
+def export_gradebook(export_format=exports.FORMAT_LONG, columns=()):
+    """
+    Write a gradebook export to storage for download from the job page.
+    Rows are written to a temporary file as they are produced, so a large
+    export never sits in memory whole.
+    """
+    with tempfile.TemporaryFile() as tmp:
+        for line in exports.gradebook_csv(export_format, columns):
+            tmp.write(line.encode("utf-8"))
+        size = tmp.tell()
+        tmp.seek(0)
+        name = default_storage.save(f"{EXPORT_DIR}/{uuid.uuid4().hex}.csv", File(tmp))
+    filename = "grades.csv" if export_format == exports.FORMAT_LONG else "grades-wide.csv"
+    return {"file": name, "filename": filename, "bytes": size}
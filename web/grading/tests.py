@@ -1,3 +1,357 @@
-from django.test import TestCase
+import csv
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs.models import Job
+from socdocs.testing import LOCMEM_CACHES
+
+from . import exports
+from .gradebook import build_team_matrix
+from .models import Criterion, CriterionScore, GradebookEntry, Milestone, Submission, Team
+from .services import ensure_criterion_scores, recompute_scores
+from .tasks import export_gradebook
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TeamMatrixTests(TestCase):
+    def make_class(self, n_teams, n_milestones):
+        milestones = [
+            Milestone.objects.create(title=f"M{i}", description="") for i in range(n_milestones)
+        ]
+        for t in range(n_teams):
+            team = Team.objects.create(name=f"Team {Team.objects.count()}")
+            for s in range(2):
+                student = User.objects.create(username=f"{team.name}-{s}".replace(" ", ""))
+                for i, m in enumerate(milestones):
+                    Submission.objects.create(
+                        milestone=m,
+                        student=student,
+                        team=team,
+                        graded=(s == 0),
+                        score=10 * (i + 1),
+                    )
+        return milestones
+
+    def test_cells(self):
+        self.make_class(1, 2)
+        matrix = build_team_matrix()
+        team = matrix.teams[0]
+        m0, m1 = matrix.milestones
+        cell = matrix.cell(team.id, m1.id)
+        self.assertEqual((cell.count, cell.graded, cell.ungraded), (2, 1, 1))
+        self.assertEqual((cell.avg, cell.min, cell.max), (20, 20, 20))
+        self.assertEqual(matrix.cell(team.id, 0).count, 0)
+
+    def test_matrix_query_count_is_constant(self):
+        self.make_class(3, 4)
+        with self.assertNumQueries(3):
+            build_team_matrix()
+
+        self.make_class(5, 2)
+        with self.assertNumQueries(3):
+            build_team_matrix()
+
+    def test_view_query_count_does_not_grow(self):
+        staff = User.objects.create_user("prof", password="x", is_staff=True)
+        self.client.force_login(staff)
+        url = reverse("grading:teams")
+        self.client.get(url)  # first hit creates ClassConfig/Profile rows
+
+        self.make_class(2, 2)
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.make_class(6, 3)
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.assertEqual(len(small), len(large))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ScoringServiceTests(TestCase):
+    def setUp(self):
+        self.milestone = Milestone.objects.create(title="M1", description="")
+        self.depth = Criterion.objects.create(milestone=self.milestone, label="Depth", weight=2)
+        self.style = Criterion.objects.create(milestone=self.milestone, label="Style", weight=0.5)
+        other = Milestone.objects.create(title="M2", description="")
+        Criterion.objects.create(milestone=other, label="Other")
+        self.subs = [
+            Submission.objects.create(milestone=self.milestone, student=User.objects.create(username=name))
+            for name in ("amy", "bob")
+        ]
+
+    def test_ensure_criterion_scores_fills_gaps_in_one_insert(self):
+        CriterionScore.objects.create(submission=self.subs[0], criterion=self.depth, points=4)
+        with self.assertNumQueries(2):
+            ensure_criterion_scores(self.subs)
+        self.assertEqual(CriterionScore.objects.count(), 4)
+        self.assertEqual(CriterionScore.objects.get(submission=self.subs[0], criterion=self.depth).points, 4)
+
+        ensure_criterion_scores(self.subs)
+        self.assertEqual(CriterionScore.objects.count(), 4)
+
+    def test_recompute_scores_uses_weights(self):
+        ensure_criterion_scores(self.subs)
+        CriterionScore.objects.filter(criterion=self.depth).update(points=3)
+        CriterionScore.objects.filter(submission=self.subs[0], criterion=self.style).update(points=4)
+
+        self.assertEqual(recompute_scores(Submission.objects.filter(milestone=self.milestone), graded=True), 2)
+        self.assertEqual(
+            list(Submission.objects.order_by("student__username").values_list("score", "graded")),
+            [(8.0, True), (6.0, True)],
+        )
+
+    def test_recompute_scores_without_criterion_rows_is_zero(self):
+        Submission.objects.filter(pk=self.subs[0].pk).update(score=9)
+        recompute_scores([self.subs[0].pk])
+        self.subs[0].refresh_from_db()
+        self.assertEqual((self.subs[0].score, self.subs[0].graded), (0.0, False))
+
+    def test_rubric_weight_change_rescores_existing_rows(self):
+        ensure_criterion_scores(self.subs)
+        CriterionScore.objects.filter(criterion=self.depth).update(points=5)
+        recompute_scores(self.subs)
+        self.depth.weight = 1
+        self.depth.save()
+        recompute_scores(self.subs)
+        self.assertEqual(set(Submission.objects.values_list("score", flat=True)), {5.0})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class GradeMilestoneTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("prof", password="x", is_staff=True))
+        self.milestone = Milestone.objects.create(title="M1", description="")
+        self.criteria = [
+            Criterion.objects.create(milestone=self.milestone, label="Depth", weight=2),
+            Criterion.objects.create(milestone=self.milestone, label="Style"),
+        ]
+        self.url = reverse("grading:grade_milestone", args=[self.milestone.pk])
+
+    def add_submissions(self, *names):
+        return [
+            Submission.objects.create(milestone=self.milestone, student=User.objects.create(username=name))
+            for name in names
+        ]
+
+    def form_data(self, overrides=(), graded=()):
+        """POST data echoing every score, with {(submission, criterion): points} changed."""
+        data = {}
+        for cs in CriterionScore.objects.filter(submission__milestone=self.milestone):
+            points = dict(overrides).get((cs.submission_id, cs.criterion_id), cs.points)
+            data[f"cs-{cs.pk}-points"] = points
+            data[f"cs-{cs.pk}-comment"] = cs.comment
+        for sub in graded:
+            data[f"graded-{sub.pk}"] = "1"
+        return data
+
+    def test_staff_only(self):
+        self.client.force_login(User.objects.create_user("student"))
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    def test_get_creates_missing_scores_in_constant_queries(self):
+        self.client.get(self.url)  # warm the session and navbar caches
+        self.add_submissions("amy", "bob")
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.get(self.url)
+        self.assertContains(response, "amy")
+        self.assertEqual(CriterionScore.objects.count(), 4)
+
+        self.add_submissions(*(f"s{n}" for n in range(10)))
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(self.url)
+        self.assertEqual(len(small), len(large))
+
+    def test_post_saves_changed_rows_and_marks_them_graded(self):
+        amy, bob, cal = self.add_submissions("amy", "bob", "cal")
+        self.client.get(self.url)
+        depth, style = self.criteria
+        response = self.client.post(
+            self.url, self.form_data({(amy.pk, depth.pk): 4, (amy.pk, style.pk): 1}, graded=[bob])
+        )
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+
+        scores = {
+            s.student.username: (s.score, s.graded)
+            for s in Submission.objects.select_related("student")
+        }
+        self.assertEqual(scores, {"amy": (9.0, True), "bob": (0.0, True), "cal": (0.0, False)})
+        self.assertEqual(GradebookEntry.objects.get(submission=amy).score, 9.0)
+
+    def test_invalid_points_save_nothing(self):
+        (amy,) = self.add_submissions("amy")
+        self.client.get(self.url)
+        response = self.client.post(self.url, self.form_data({(amy.pk, self.criteria[0].pk): "lots"}))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(CriterionScore.objects.exclude(points=0).exists())
+        self.assertFalse(Submission.objects.filter(graded=True).exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class GradebookSyncTests(TestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name="Red")
+        self.milestone = Milestone.objects.create(title="M1", description="", max_points=50)
+        criterion = Criterion.objects.create(milestone=self.milestone, label="Depth", weight=2)
+        self.subs = []
+        for n in range(3):
+            student = User.objects.create(username=f"student{n}")
+            sub = Submission.objects.create(milestone=self.milestone, student=student, team=self.team)
+            CriterionScore.objects.create(submission=sub, criterion=criterion, points=5 * (n + 1))
+            self.subs.append(sub)
+
+    def entry(self, sub):
+        return GradebookEntry.objects.get(submission=sub)
+
+    def test_submission_save_creates_and_refreshes_entry(self):
+        sub = self.subs[0]
+        entry = self.entry(sub)
+        self.assertEqual((entry.username, entry.team_name, entry.graded), ("student0", "Red", False))
+
+        sub.score, sub.graded = 20, True
+        sub.save()
+        entry = self.entry(sub)
+        self.assertEqual((entry.score, entry.graded, entry.percent), (20, True, 40))
+
+    def test_recompute_scores_with_queryset_and_pks(self):
+        recompute_scores(Submission.objects.filter(pk__in=[s.pk for s in self.subs[:2]]), graded=True)
+        self.assertEqual(
+            [(e.score, e.graded) for e in map(self.entry, self.subs)],
+            [(10, True), (20, True), (0, False)],
+        )
+
+        recompute_scores([self.subs[2].pk], graded=True)
+        entry = self.entry(self.subs[2])
+        self.assertEqual((entry.score, entry.graded, entry.percent), (30, True, 60))
+
+    def test_max_points_change_recomputes_percent(self):
+        recompute_scores([s.pk for s in self.subs])
+        self.milestone.max_points = 40
+        self.milestone.save()
+        self.assertEqual([self.entry(s).percent for s in self.subs], [25, 50, 75])
+
+        self.milestone.max_points = 0
+        self.milestone.save()
+        self.assertEqual([self.entry(s).percent for s in self.subs], [None] * 3)
+
+    def test_username_change_is_copied(self):
+        student = self.subs[1].student
+        student.username = "renamed"
+        student.save()
+        self.assertEqual(self.entry(self.subs[1]).username, "renamed")
+
+        student.last_login = timezone.now()
+        with self.assertNumQueries(1):
+            student.save(update_fields=["last_login"])
+
+    def test_rebuild_gradebook(self):
+        GradebookEntry.objects.all().delete()
+        Submission.objects.filter(pk=self.subs[0].pk).update(score=12, graded=True)
+        call_command("rebuild_gradebook", stdout=StringIO())
+        self.assertEqual(GradebookEntry.objects.count(), 3)
+        entry = self.entry(self.subs[0])
+        self.assertEqual((entry.score, entry.graded, entry.percent), (12, True, 24))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ExportCsvTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("prof", password="x", is_staff=True))
+        self.m1 = Milestone.objects.create(title="M1", description="")
+        self.m2 = Milestone.objects.create(title="M2", description="")
+        self.crit = Criterion.objects.create(milestone=self.m1, label="Depth")
+        team = Team.objects.create(name="Red")
+        self.add_student("bob", team, {self.m1: 7})
+        self.add_student("amy", team, {self.m1: 9, self.m2: None})
+
+    def add_student(self, username, team, scores):
+        student = User.objects.create(username=username)
+        for milestone, score in scores.items():
+            sub = Submission.objects.create(
+                milestone=milestone, student=student, team=team,
+                graded=score is not None, score=score or 0,
+            )
+            if milestone == self.m1:
+                CriterionScore.objects.create(submission=sub, criterion=self.crit, points=score, comment="ok")
+
+    def export(self, **params):
+        response = self.client.get(reverse("grading:export"), params)
+        self.assertTrue(response.streaming)
+        return list(csv.reader(b"".join(response.streaming_content).decode().splitlines()))
+
+    def test_long_format_with_optional_columns(self):
+        rows = self.export(col=["team", "criteria", "comments"])
+        self.assertEqual(
+            rows[0],
+            ["username", "milestone", "team", "score", "graded", "submitted_at",
+             "M1 · Depth", "M1 · Depth (comment)"],
+        )
+        self.assertEqual([r[:5] for r in rows[1:]], [
+            ["amy", "M1", "Red", "9.0", "True"],
+            ["amy", "M2", "Red", "0.0", "False"],
+            ["bob", "M1", "Red", "7.0", "True"],
+        ])
+        self.assertEqual(rows[1][6:], ["9.0", "ok"])
+        self.assertEqual(rows[2][6:], ["", ""])
+
+    def test_wide_format_one_row_per_student(self):
+        rows = self.export(format="wide", col="team")
+        self.assertEqual(rows, [
+            ["username", "team", "M1", "M2"],
+            ["amy", "Red", "9.0", ""],
+            ["bob", "Red", "7.0", ""],
+        ])
+
+    def test_query_count_does_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as small:
+            self.export(col="criteria")
+        team = Team.objects.create(name="Blue")
+        for n in range(20):
+            self.add_student(f"extra{n}", team, {self.m1: n, self.m2: n})
+        with CaptureQueriesContext(connection) as large:
+            self.export(col="criteria")
+        self.assertEqual(len(small), len(large))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ExportJobTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=self.media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_export_file_is_written_and_purged_with_its_job(self):
+        milestone = Milestone.objects.create(title="M1", description="")
+        for n in range(3):
+            student = User.objects.create(username=f"student{n}")
+            Submission.objects.create(milestone=milestone, student=student, graded=True, score=n)
+
+        result = export_gradebook()
+        with default_storage.open(result["file"]) as f:
+            content = f.read()
+        self.assertEqual(content.decode("utf-8"), "".join(exports.gradebook_csv()))
+        self.assertEqual(result["bytes"], len(content))
+
+        Job.objects.create(
+            task="grading.tasks.export_gradebook",
+            status=Job.STATUS_SUCCEEDED,
+            finished_at=timezone.now() - timedelta(days=30),
+            result=result,
+        )
+        call_command("purge_jobs", stdout=StringIO())
+        self.assertFalse(Job.objects.exists())
+        self.assertFalse(default_storage.exists(result["file"]))
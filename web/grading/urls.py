@@ -8,6 +8,7 @@ from .views import (
     submit_from_doc,
     milestone_submissions,   # NEW
     grade_submission,        # NEW
+    grade_milestone,
 )
 
 app_name = "grading"
@@ -28,6 +29,11 @@ urlpatterns = [
         milestone_submissions,
         name="milestone_submissions",
     ),
+    path(
+        "milestone/<int:pk>/grade/",
+        grade_milestone,
+        name="grade_milestone",
+    ),
     path(
         "submission/<int:pk>/grade/",
         grade_submission,
@@ -2,16 +2,18 @@ from django import forms
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponse
-from django.db.models import Avg
+from django.http import HttpResponse, StreamingHttpResponse
 from django.contrib import messages
 from django.urls import reverse
 from django.forms import inlineformset_factory
 
-import csv
-
-from .models import Milestone, Submission, Evidence, Team, Criterion, CriterionScore
+from . import exports
+from .gradebook import build_team_matrix
+from .models import Milestone, Submission, Evidence, Team, Criterion, CriterionScore, GradebookEntry
+from .services import ensure_criterion_scores, recompute_scores
+from .tasks import export_gradebook
 from docs.models import DocPage
+from socdocs.pagination import paginate
 
 
 # ----- Forms -----
@@ -83,8 +85,12 @@ def milestone_list(request):
 
 @login_required
 def view_scores(request):
-    """Show this student's scores."""
-    subs = Submission.objects.select_related("milestone").filter(student=request.user)
+    """Show this student's scores (from the materialized gradebook)."""
+    subs = (
+        GradebookEntry.objects.select_related("milestone")
+        .filter(student=request.user)
+        .order_by("milestone__due_date", "milestone_id")
+    )
     return render(request, "grading/scores.html", {"subs": subs})
 
 
@@ -147,12 +153,12 @@ def submit_from_doc(request, slug):
     page = get_object_or_404(DocPage, slug=slug)
 
     # Must be team-based and user must be on that team (accounts.Profile.team)
-    profile = getattr(request.user, "profile", None)
-    if not profile or not profile.team:
+    principal = request.principal
+    if not principal.team:
         messages.error(request, "You must be on a team before submitting documentation.")
         return redirect("docs:detail", slug=page.slug)
 
-    if not page.team or page.team != profile.team:
+    if not principal.on_team_of(page):
         messages.error(request, "You can only submit documentation for your own team’s pages.")
         return redirect("docs:detail", slug=page.slug)
 
@@ -198,42 +204,44 @@ def submit_from_doc(request, slug):
 
 @login_required
 def export_csv(request):
-    """Instructor-only: export all grades as CSV."""
+    """
+    Instructor-only: stream all grades as CSV.
+
+    ?format=long (one row per submission, default) or wide (one row per
+    student, one column per milestone); ?col=team|criteria|comments adds
+    optional columns and may be repeated. ?background=1 runs the export as
+    a background job instead.
+    """
     if not request.user.is_staff:
         return HttpResponse(status=403)
 
-    resp = HttpResponse(content_type="text/csv")
-    resp["Content-Disposition"] = "attachment; filename=grades.csv"
-    w = csv.writer(resp)
-    w.writerow(["username", "milestone", "score", "graded", "submitted_at"])
+    export_format = request.GET.get("format", exports.FORMAT_LONG)
+    if export_format not in exports.FORMATS:
+        export_format = exports.FORMAT_LONG
+    columns = request.GET.getlist("col")
 
-    for s in Submission.objects.select_related("student", "milestone"):
-        w.writerow(
-            [s.student.username, s.milestone.title, s.score, s.graded, s.submitted_at]
-        )
+    # ?background=1: build the file in a job and follow it on the job page
+    if request.GET.get("background"):
+        job = export_gradebook.enqueue(export_format, columns, _user=request.user)
+        return redirect("jobs:status", pk=job.pk)
 
+    resp = StreamingHttpResponse(
+        exports.gradebook_csv(export_format, columns),
+        content_type="text/csv",
+    )
+    filename = "grades.csv" if export_format == exports.FORMAT_LONG else "grades-wide.csv"
+    resp["Content-Disposition"] = f"attachment; filename={filename}"
     return resp
 
 
 @staff_member_required
 def team_matrix(request):
-    teams = Team.objects.all().order_by("name")
-    milestones = Milestone.objects.all().order_by("title")
-    # average score per (team, milestone)
-    grid = {}
-    for t in teams:
-        row = {}
-        for m in milestones:
-            avg = (
-                Submission.objects.filter(team=t, milestone=m, graded=True)
-                .aggregate(Avg("score"))["score__avg"]
-            )
-            row[m.id] = avg
-        grid[t.id] = row
+    # whole grid (avg/count/min/max per team × milestone) in one grouped query
+    matrix = build_team_matrix()
     return render(
         request,
         "grading/team_matrix.html",
-        {"teams": teams, "milestones": milestones, "grid": grid},
+        {"milestones": matrix.milestones, "rows": list(matrix.rows())},
     )
 
 
@@ -246,11 +254,12 @@ def milestone_submissions(request, pk):
     Staff view: show all submissions for a given milestone.
     """
     milestone = get_object_or_404(Milestone, pk=pk)
-    submissions = (
+    submissions = paginate(
+        request,
         Submission.objects
         .filter(milestone=milestone)
-        .select_related("student", "team")
-        .order_by("student__username")
+        .select_related("student", "team"),
+        ("student__username", "id"),
     )
     return render(
         request,
@@ -271,25 +280,16 @@ def grade_submission(request, pk):
     milestone = submission.milestone
 
     # Ensure there is a CriterionScore for each Criterion in this milestone
-    criteria = milestone.criteria.all().order_by("id")
-    for crit in criteria:
-        CriterionScore.objects.get_or_create(
-            submission=submission,
-            criterion=crit,
-        )
+    ensure_criterion_scores([submission])
+    scores = CriterionScore.objects.select_related("criterion").order_by("criterion_id")
 
     if request.method == "POST":
-        formset = CriterionScoreFormSet(request.POST, instance=submission)
+        formset = CriterionScoreFormSet(request.POST, instance=submission, queryset=scores)
         if formset.is_valid():
             formset.save()
 
-            # Recalculate total score
-            total = 0
-            for cs in submission.criterion_scores.select_related("criterion"):
-                total += cs.points * float(cs.criterion.weight)
-            submission.score = total
-            submission.graded = True
-            submission.save()
+            # Recalculate total score (weighted sum done in the database)
+            recompute_scores([submission], graded=True)
 
             messages.success(
                 request,
@@ -297,7 +297,7 @@ def grade_submission(request, pk):
             )
             return redirect("grading:milestone_submissions", pk=milestone.pk)
     else:
-        formset = CriterionScoreFormSet(instance=submission)
+        formset = CriterionScoreFormSet(instance=submission, queryset=scores)
 
     # Pair up forms with their criterion for nicer display
     rows = []
@@ -321,3 +321,69 @@ def grade_submission(request, pk):
             "rows": rows,
         },
     )
+
+
+@staff_member_required
+def grade_milestone(request, pk):
+    """
+    Staff view: grade every submission of a milestone on one page.
+
+    Loads submissions, criteria and scores in a fixed number of queries and
+    saves the whole grid with one bulk_update plus two scoring UPDATEs.
+    """
+    milestone = get_object_or_404(Milestone, pk=pk)
+    submissions = list(
+        Submission.objects
+        .filter(milestone=milestone)
+        .select_related("student", "team")
+        .order_by("student__username")
+    )
+    criteria = list(milestone.criteria.order_by("id"))
+
+    ensure_criterion_scores(submissions)
+    scores = {
+        (cs.submission_id, cs.criterion_id): cs
+        for cs in CriterionScore.objects.filter(submission__milestone=milestone)
+    }
+
+    data = request.POST if request.method == "POST" else None
+    rows = []
+    for sub in submissions:
+        forms_for_sub = [
+            CriterionScoreForm(
+                data,
+                instance=scores[(sub.pk, crit.pk)],
+                prefix=f"cs-{scores[(sub.pk, crit.pk)].pk}",
+            )
+            for crit in criteria
+        ]
+        rows.append({"submission": sub, "forms": forms_for_sub})
+
+    if data is not None and all(f.is_valid() for row in rows for f in row["forms"]):
+        changed = []
+        graded_ids = []
+        for row in rows:
+            sub = row["submission"]
+            row_changed = [f.instance for f in row["forms"] if f.has_changed()]
+            changed += row_changed
+            if row_changed or data.get(f"graded-{sub.pk}"):
+                graded_ids.append(sub.pk)
+
+        CriterionScore.objects.bulk_update(changed, ["points", "comment"], batch_size=500)
+        recompute_scores(graded_ids, graded=True)
+        recompute_scores(
+            Submission.objects.filter(milestone=milestone).exclude(pk__in=graded_ids),
+            graded=False,
+        )
+
+        messages.success(
+            request,
+            f"Saved {len(changed)} criterion scores for {milestone.title}.",
+        )
+        return redirect("grading:grade_milestone", pk=milestone.pk)
+
+    return render(
+        request,
+        "grading/grade_milestone.html",
+        {"milestone": milestone, "criteria": criteria, "rows": rows},
+    )
@@ -0,0 +1,26 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "task", "status", "attempts", "run_at", "created_at", "finished_at")
+    list_filter = ("status", "task")
+    search_fields = ("task", "key")
+    readonly_fields = (
+        "task", "args", "kwargs", "key", "attempts", "locked_by", "locked_at",
+        "result", "last_error", "created_by", "created_at", "finished_at",
+    )
+    actions = ["retry"]
+
+    @admin.action(description="Retry selected jobs now")
+    def retry(self, request, queryset):
+        count = queryset.exclude(status=Job.STATUS_RUNNING).update(
+            status=Job.STATUS_QUEUED,
+            attempts=0,
+            run_at=timezone.now(),
+            finished_at=None,
+        )
+        self.message_user(request, f"{count} job(s) queued again.")
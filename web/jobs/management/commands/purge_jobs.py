@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete finished jobs older than --days (failed jobs are kept longer), "
+        "along with any result file they left in storage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=7)
+        parser.add_argument("--failed-days", type=int, default=30)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        succeeded = self.purge(Job.objects.filter(
+            status=Job.STATUS_SUCCEEDED,
+            finished_at__lt=now - timedelta(days=options["days"]),
+        ))
+        failed = self.purge(Job.objects.filter(
+            status=Job.STATUS_FAILED,
+            finished_at__lt=now - timedelta(days=options["failed_days"]),
+        ))
+        self.stdout.write(self.style.SUCCESS(f"Purged {succeeded} succeeded and {failed} failed job(s)."))
+
+    def purge(self, jobs):
+        """Delete ``jobs`` and the files named in their results (see jobs.views.job_download)."""
+        for result in jobs.exclude(result__isnull=True).values_list("result", flat=True).iterator():
+            name = result.get("file") if isinstance(result, dict) else None
+            if name:
+                default_storage.delete(name)
+        deleted, _ = jobs.delete()
+        return deleted
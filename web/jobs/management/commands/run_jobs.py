@@ -0,0 +1,65 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs.queue import claim, due_jobs, execute, worker_id
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs. Several workers may run at once; each "
+        "job is claimed atomically. Stops cleanly on SIGTERM/SIGINT after "
+        "the current job."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run every due job, then exit (cron / CI).",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=2.0,
+            help="Seconds to wait when the queue is empty.",
+        )
+        parser.add_argument(
+            "--max-jobs",
+            type=int,
+            default=0,
+            help="Exit after this many jobs (0 = no limit), e.g. to recycle memory.",
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        worker = worker_id()
+        self.stdout.write(f"Worker {worker} started.")
+        done = 0
+        while not self.stopping:
+            close_old_connections()
+            job = claim(due_jobs(), worker)
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
+                continue
+
+            start = time.monotonic()
+            job = execute(job)
+            self.stdout.write(
+                f"{job.task} #{job.pk}: {job.status} in {time.monotonic() - start:.2f}s"
+            )
+            done += 1
+            if options["max_jobs"] and done >= options["max_jobs"]:
+                break
+
+        self.stdout.write(f"Worker {worker} stopped after {done} job(s).")
+
+    def stop(self, signum, frame):
+        self.stopping = True
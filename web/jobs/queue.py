@@ -0,0 +1,157 @@
+# jobs/queue.py
+"""
+Database-backed background jobs.
+
+Declare work with ``@task`` in an app's ``tasks.py`` and enqueue it with
+``my_task.enqueue(*args, **kwargs)``; ``manage.py run_jobs`` executes it.
+Arguments must be JSON-serializable (pass pks, not instances).
+
+Jobs are inserted in the caller's transaction, so a job never runs
+against data that was rolled back. With JOBS_IMMEDIATE=True (the default
+when DEBUG is on) jobs still get a row but run in-process right after
+the transaction commits, so no worker is needed in development.
+"""
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(func=None, *, name=None, max_attempts=None):
+    """Register ``func`` as a background task."""
+
+    def register(f):
+        f.task_name = name or f"{f.__module__}.{f.__name__}"
+        f.max_attempts = max_attempts or getattr(settings, "JOBS_MAX_ATTEMPTS", 3)
+        f.enqueue = partial(enqueue, f)
+        _registry[f.task_name] = f
+        return f
+
+    return register(func) if func else register
+
+
+def get_task(name):
+    if name not in _registry:
+        # not imported yet (e.g. a task module outside <app>/tasks.py)
+        import_string(name)
+    return _registry[name]
+
+
+def enqueue(func, *args, _key="", _delay=0, _user=None, **kwargs):
+    """
+    Queue ``func(*args, **kwargs)``. ``_key`` coalesces with an identical
+    queued job, ``_delay`` (seconds) postpones it, ``_user`` is recorded
+    as created_by for status pages.
+    """
+    name = func if isinstance(func, str) else func.task_name
+    if _key:
+        existing = Job.objects.filter(key=_key, status=Job.STATUS_QUEUED).first()
+        if existing:
+            return existing
+
+    job = Job.objects.create(
+        task=name,
+        args=list(args),
+        kwargs=kwargs,
+        key=_key,
+        max_attempts=getattr(func, "max_attempts", getattr(settings, "JOBS_MAX_ATTEMPTS", 3)),
+        run_at=timezone.now() + timedelta(seconds=_delay),
+        created_by=_user if _user is not None and _user.is_authenticated else None,
+    )
+    if getattr(settings, "JOBS_IMMEDIATE", False):
+        transaction.on_commit(partial(_run_immediately, job.pk))
+    return job
+
+
+def _run_immediately(job_id):
+    job = claim(Job.objects.filter(pk=job_id), worker_id())
+    if job is not None:
+        execute(job)
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def due_jobs():
+    """Queued jobs that are due, plus running jobs whose worker died."""
+    now = timezone.now()
+    lease = timedelta(seconds=getattr(settings, "JOBS_LEASE_SECONDS", 600))
+    return Job.objects.filter(
+        Q(status=Job.STATUS_QUEUED, run_at__lte=now)
+        | Q(status=Job.STATUS_RUNNING, locked_at__lt=now - lease)
+    )
+
+
+def claim(candidates, worker):
+    """
+    Atomically take one job from ``candidates``.
+
+    Each candidate is claimed with a conditional UPDATE that only matches
+    while the row is still in the state we read, so two workers can never
+    both win. This works the same on SQLite and PostgreSQL.
+    """
+    for job in candidates.order_by("run_at", "id")[:10]:
+        now = timezone.now()
+        claimed = Job.objects.filter(
+            pk=job.pk, status=job.status, locked_at=job.locked_at
+        ).update(
+            status=Job.STATUS_RUNNING,
+            locked_by=worker,
+            locked_at=now,
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=job.pk)
+    return None
+
+
+def retry_delay(attempts):
+    base = getattr(settings, "JOBS_RETRY_DELAY", 30)
+    return min(base * 2 ** (attempts - 1), 3600)
+
+
+def execute(job):
+    """Run a claimed job and record the outcome. Returns the job."""
+    try:
+        func = get_task(job.task)
+        result = func(*job.args, **job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning(
+            "Job %s (%s) failed, attempt %s/%s",
+            job.pk, job.task, job.attempts, job.max_attempts,
+            exc_info=True,
+        )
+        job.last_error = error
+        job.locked_by = ""
+        job.locked_at = None
+        if job.attempts < job.max_attempts:
+            job.status = Job.STATUS_QUEUED
+            job.run_at = timezone.now() + timedelta(seconds=retry_delay(job.attempts))
+        else:
+            job.status = Job.STATUS_FAILED
+            job.finished_at = timezone.now()
+        job.save(update_fields=["status", "run_at", "last_error", "locked_by", "locked_at", "finished_at"])
+        return job
+
+    job.status = Job.STATUS_SUCCEEDED
+    job.result = result
+    job.finished_at = timezone.now()
+    job.locked_by = ""
+    job.save(update_fields=["status", "result", "finished_at", "locked_by"])
+    return job
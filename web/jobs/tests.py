@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from socdocs.testing import LOCMEM_CACHES
+
+from .models import Job
+from .queue import claim, due_jobs, execute, retry_delay, task
+
+CALLS = []
+
+
+@task(name="jobs.tests.record", max_attempts=3)
+def record(value):
+    CALLS.append(value)
+    return {"value": value}
+
+
+@task(name="jobs.tests.explode", max_attempts=3)
+def explode():
+    raise RuntimeError("boom")
+
+
+class Snapshot:
+    """Candidates as another worker read them, before anyone claimed them."""
+
+    def __init__(self, jobs):
+        self.jobs = list(jobs)
+
+    def order_by(self, *fields):
+        return self.jobs
+
+
+@override_settings(CACHES=LOCMEM_CACHES, JOBS_IMMEDIATE=False, JOBS_RETRY_DELAY=10, JOBS_LEASE_SECONDS=600)
+class QueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_enqueue_coalesces_on_key(self):
+        first = record.enqueue(1, _key="same")
+        self.assertEqual(record.enqueue(2, _key="same"), first)
+        self.assertEqual(Job.objects.count(), 1)
+        record.enqueue(3, _delay=60)
+        self.assertEqual(list(due_jobs()), [first])
+
+    def test_claim_and_run(self):
+        job = record.enqueue(7)
+        claimed = claim(due_jobs(), "worker-a")
+        self.assertEqual((claimed.pk, claimed.status, claimed.locked_by, claimed.attempts),
+                         (job.pk, Job.STATUS_RUNNING, "worker-a", 1))
+        self.assertIsNone(claim(due_jobs(), "worker-b"))
+
+        done = execute(claimed)
+        done.refresh_from_db()
+        self.assertEqual((done.status, done.result, done.locked_by), (Job.STATUS_SUCCEEDED, {"value": 7}, ""))
+        self.assertEqual(CALLS, [7])
+
+    def test_two_workers_racing_for_one_job(self):
+        job = record.enqueue(1)
+        seen_by_b = Snapshot(due_jobs())
+        self.assertEqual(claim(due_jobs(), "worker-a").pk, job.pk)
+        # b read the job while it was still queued; its UPDATE must not match
+        self.assertIsNone(claim(seen_by_b, "worker-b"))
+        job.refresh_from_db()
+        self.assertEqual((job.locked_by, job.attempts), ("worker-a", 1))
+
+    def test_failures_retry_with_backoff_then_fail(self):
+        job = explode.enqueue()
+        delays = []
+        for attempt in (1, 2):
+            before = timezone.now()
+            with self.assertLogs("jobs.queue", "WARNING"):
+                failed = execute(claim(Job.objects.filter(pk=job.pk), "w"))
+            self.assertEqual((failed.status, failed.attempts), (Job.STATUS_QUEUED, attempt))
+            self.assertIn("RuntimeError: boom", failed.last_error)
+            self.assertEqual((failed.locked_by, failed.locked_at), ("", None))
+            delays.append(round((failed.run_at - before).total_seconds()))
+            self.assertFalse(due_jobs().filter(pk=job.pk).exists())
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        self.assertEqual(delays, [10, 20])
+
+        with self.assertLogs("jobs.queue", "WARNING"):
+            failed = execute(claim(Job.objects.filter(pk=job.pk), "w"))
+        failed.refresh_from_db()
+        self.assertEqual((failed.status, failed.attempts), (Job.STATUS_FAILED, 3))
+        self.assertIsNotNone(failed.finished_at)
+        self.assertFalse(due_jobs().exists())
+
+    def test_retry_delay_is_capped(self):
+        self.assertEqual([retry_delay(n) for n in (1, 2, 3)], [10, 20, 40])
+        self.assertEqual(retry_delay(20), 3600)
+
+    def test_expired_lease_is_recovered(self):
+        job = record.enqueue(5)
+        claim(due_jobs(), "crashed")
+        self.assertFalse(due_jobs().exists())
+
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(seconds=601))
+        recovered = claim(due_jobs(), "worker-b")
+        self.assertEqual((recovered.pk, recovered.locked_by, recovered.attempts), (job.pk, "worker-b", 2))
+        execute(recovered)
+        self.assertEqual(CALLS, [5])
@@ -0,0 +1,38 @@
+from django.contrib.auth.decorators import login_required
+from django.core.files.storage import default_storage
+from django.http import Http404
+from django.shortcuts import get_object_or_404, render
+
+from mediastore.serving import send_file
+
+from .models import Job
+
+
+def _visible_job(request, pk):
+    """Staff see every job; everyone else only the jobs they started."""
+    qs = Job.objects.all()
+    if not request.user.is_staff:
+        qs = qs.filter(created_by=request.user)
+    return get_object_or_404(qs, pk=pk)
+
+
+@login_required
+def job_status(request, pk):
+    job = _visible_job(request, pk)
+    return render(request, "jobs/status.html", {"job": job})
+
+
+@login_required
+def job_download(request, pk):
+    job = _visible_job(request, pk)
+    result = job.result or {}
+    name = result.get("file")
+    if job.status != Job.STATUS_SUCCEEDED or not name or not default_storage.exists(name):
+        raise Http404("No file for this job.")
+    return send_file(
+        request,
+        default_storage,
+        name,
+        as_attachment=True,
+        filename=result.get("filename") or name.rsplit("/", 1)[-1],
+    )
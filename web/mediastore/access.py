@@ -0,0 +1,36 @@
+# mediastore/access.py
+"""
+Who may download a stored file.
+
+Files are shared between rows (the content-addressed store keeps one copy
+of identical uploads), so access is decided per *name*: a user may fetch
+a file if they can see at least one row that references it. Each app
+registers its file fields with a ``visible(user, queryset)`` filter that
+applies the same rules as its views (see mediastore.rules).
+
+Names no row references are only served under MEDIA_PUBLIC_PREFIXES
+(e.g. images embedded in markdown); everything else is a 404.
+"""
+from django.conf import settings
+
+RULES = []  # (model, field name, visible(user, queryset) -> queryset)
+
+
+def register(model, field_name, visible):
+    RULES.append((model, field_name, visible))
+
+
+def _referencing(model, field_name, name):
+    return model._default_manager.filter(**{field_name: name})
+
+
+def can_access(user, name):
+    """True if ``user`` may download the stored file ``name``."""
+    # one query per rule in the common (allowed) case
+    for model, field_name, visible in RULES:
+        if visible(user, _referencing(model, field_name, name)).exists():
+            return True
+    if any(_referencing(model, field_name, name).exists() for model, field_name, _ in RULES):
+        return False
+    prefixes = tuple(getattr(settings, "MEDIA_PUBLIC_PREFIXES", ()))
+    return bool(prefixes) and name.startswith(prefixes)
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import Blob
+
+
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    list_display = ("name", "size", "refcount", "created_at", "last_referenced_at")
+    list_filter = ("refcount",)
+    search_fields = ("name", "digest")
+    readonly_fields = ("name", "digest", "size", "refcount", "created_at", "last_referenced_at")
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from mediastore.refs import TRACKED, incref
+from mediastore.storage import CAS_DIR, cas_storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Move files uploaded before the content-addressed store into it, "
+        "so duplicates collapse into one blob. Originals are deleted "
+        "unless --keep-originals is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep-originals", action="store_true")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        moved = missing = 0
+        old_names = set()
+        for model, field_name in TRACKED:
+            rows = (
+                model._default_manager.exclude(**{f"{field_name}__startswith": f"{CAS_DIR}/"})
+                .exclude(**{field_name: ""})
+                .exclude(**{f"{field_name}__isnull": True})
+                .values_list("pk", field_name)
+            )
+            for pk, name in rows.iterator():
+                if not cas_storage.exists(name):
+                    missing += 1
+                    self.stderr.write(f"{model.__name__} {pk}: {name} is missing")
+                    continue
+                moved += 1
+                if options["dry_run"]:
+                    continue
+                with cas_storage.open(name, "rb") as fh:
+                    blob = cas_storage.save(name, fh)
+                # queryset update: no signals, so count the new reference here
+                model._default_manager.filter(pk=pk).update(**{field_name: blob})
+                incref(blob)
+                old_names.add(name)
+
+        if not options["keep_originals"]:
+            for name in old_names:
+                cas_storage.delete(name)
+
+        self.stdout.write(f"Adopted {moved} file(s); {missing} missing.")
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING("Dry run: nothing was changed."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Run gc_blobs to double-check reference counts."))
@@ -0,0 +1,121 @@
+import os
+import re
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from mediastore.models import Blob
+from mediastore.refs import TRACKED, is_referenced
+from mediastore.storage import CAS_DIR, TMP_DIR, cas_storage
+
+BLOB_FILE = re.compile(r"^[0-9a-f]{64}(\.\w+)?$")
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute blob reference counts from the tracked file fields and "
+        "delete blobs (and stray files) nothing refers to any more."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours",
+            type=float,
+            default=24,
+            help="Keep unreferenced blobs younger than this (uploads in flight).",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        started = timezone.now()
+        cutoff = started - timedelta(hours=options["grace_hours"])
+
+        # 1. authoritative counts straight from the tracked columns
+        refs = Counter()
+        for model, field_name in TRACKED:
+            names = (
+                model._default_manager.filter(**{f"{field_name}__startswith": f"{CAS_DIR}/"})
+                .values_list(field_name, flat=True)
+            )
+            refs.update(names.iterator())
+
+        fixed = 0
+        for blob in Blob.objects.only("pk", "name", "refcount").iterator():
+            actual = refs.get(blob.name, 0)
+            if blob.refcount == actual:
+                continue
+            if dry_run:
+                fixed += 1
+                continue
+            # Only while nothing touched the blob since counting began; a
+            # reference added meanwhile is not in ``refs`` and must not be
+            # lost. Skipped blobs are corrected on the next run.
+            fixed += Blob.objects.filter(
+                pk=blob.pk, refcount=blob.refcount, last_referenced_at__lt=started
+            ).update(refcount=actual)
+        self.stdout.write(f"Reference counts corrected: {fixed}")
+
+        # 2. unreferenced blobs past the grace period
+        orphans = Blob.objects.filter(last_referenced_at__lt=cutoff).exclude(name__in=list(refs))
+        if not dry_run:
+            orphans = orphans.filter(refcount=0)
+        removed = freed = 0
+        for blob in orphans.only("pk", "size").iterator():
+            if dry_run or _delete_orphan(blob.pk, cutoff):
+                removed += 1
+                freed += blob.size
+        self.stdout.write(f"Orphaned blobs removed: {removed} ({freed / 1024 / 1024:.1f} MB)")
+
+        # 3. files with no Blob row (crashed uploads, manual copies)
+        known = set(Blob.objects.values_list("name", flat=True))
+        root = cas_storage.path(CAS_DIR)
+        stale_before = cutoff.timestamp()
+        stray = 0
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, cas_storage.location).replace(os.sep, "/")
+                if name in known or os.path.getmtime(path) > stale_before:
+                    continue
+                if not name.startswith(f"{TMP_DIR}/") and not BLOB_FILE.match(filename):
+                    continue  # not a blob; leave it alone
+                stray += 1
+                if not dry_run:
+                    _remove(path)
+        self.stdout.write(f"Stray files removed: {stray}")
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING("Dry run: nothing was changed."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Blob store cleaned."))
+
+
+def _delete_orphan(pk, cutoff):
+    """
+    Delete one blob and its file if it is still unreferenced. The row lock
+    is the one ContentAddressedStorage._save takes, so an upload of the
+    same content either waits for the delete and writes the file again,
+    or marks the blob referenced first and it is skipped here.
+    """
+    with transaction.atomic():
+        blob = (
+            Blob.objects.select_for_update()
+            .filter(pk=pk, refcount=0, last_referenced_at__lt=cutoff)
+            .first()
+        )
+        if blob is None or is_referenced(blob.name):
+            return False
+        _remove(cas_storage.path(blob.name))
+        blob.delete()
+    return True
+
+
+def _remove(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,25 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Blob(models.Model):
+    """
+    One stored file in the content-addressed store (see mediastore.storage).
+
+    ``refcount`` is the number of model fields currently pointing at
+    ``name``. It is maintained by mediastore.refs on save/delete and
+    recomputed from scratch by ``manage.py gc_blobs``, which also removes
+    blobs nothing refers to any more. ``last_referenced_at`` moves whenever
+    the blob is uploaded again or gains a reference; gc_blobs measures its
+    grace period from it, so an old orphan that was just reused is kept.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    digest = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_referenced_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
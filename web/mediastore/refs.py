@@ -0,0 +1,71 @@
+# mediastore/refs.py
+"""
+Reference counting for model fields stored in the content-addressed store.
+
+track(Model, "field") remembers the stored name when an instance is
+loaded and adjusts Blob.refcount when the field changes or the row is
+deleted. Bulk inserts/updates bypass the signals; gc_blobs recomputes
+the counts from the tracked fields, so drift is corrected there.
+"""
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
+from django.utils import timezone
+
+from .models import Blob
+from .storage import is_blob_name
+
+TRACKED = []  # (model, field name)
+
+
+def incref(name):
+    if is_blob_name(name):
+        Blob.objects.filter(name=name).update(
+            refcount=F("refcount") + 1, last_referenced_at=timezone.now()
+        )
+
+
+def decref(name):
+    if is_blob_name(name):
+        Blob.objects.filter(name=name, refcount__gt=0).update(refcount=F("refcount") - 1)
+
+
+def is_referenced(name):
+    """True if any tracked field points at ``name`` right now."""
+    return any(
+        model._default_manager.filter(**{field_name: name}).exists()
+        for model, field_name in TRACKED
+    )
+
+
+def _current(instance, attname):
+    value = instance.__dict__.get(attname)
+    return str(getattr(value, "name", value) or "")
+
+
+def track(model, field_name):
+    attname = model._meta.get_field(field_name).attname
+    memo = f"_blob_ref_{attname}"
+    TRACKED.append((model, field_name))
+
+    def remember(sender, instance, **kwargs):
+        # deferred fields aren't in __dict__; don't load them just for this
+        if attname in instance.__dict__:
+            setattr(instance, memo, _current(instance, attname))
+
+    def saved(sender, instance, created, raw=False, **kwargs):
+        if raw or attname not in instance.__dict__:
+            return
+        new = _current(instance, attname)
+        old = "" if created else getattr(instance, memo, "")
+        if new != old:
+            incref(new)
+            decref(old)
+            setattr(instance, memo, new)
+
+    def deleted(sender, instance, **kwargs):
+        decref(getattr(instance, memo, None) or _current(instance, attname))
+
+    uid = f"mediastore:{model._meta.label}.{field_name}"
+    post_init.connect(remember, sender=model, weak=False, dispatch_uid=uid)
+    post_save.connect(saved, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(deleted, sender=model, weak=False, dispatch_uid=uid)
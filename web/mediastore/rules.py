@@ -0,0 +1,27 @@
+from diagrams.models import Diagram, DiagramRendition
+from grading.models import Evidence
+
+from .access import register
+
+
+def _diagrams(user, qs):
+    # same rules as diagrams.views.can_view_diagram
+    return qs.visible_to(user)
+
+
+def _renditions(user, qs):
+    return qs.filter(diagram__in=Diagram.objects.visible_to(user))
+
+
+def _evidence(user, qs):
+    # the submitting student and staff, as in the grading views
+    if not user.is_authenticated:
+        return qs.none()
+    if user.is_staff:
+        return qs
+    return qs.filter(submission__student=user)
+
+
+register(Diagram, "image", _diagrams)
+register(DiagramRendition, "file", _renditions)
+register(Evidence, "file", _evidence)
@@ -0,0 +1,149 @@
+# mediastore/serving.py
+"""
+Sending a stored file once the view has checked access.
+
+MEDIA_SERVE_MODE picks who moves the bytes:
+  "django"    FileResponse from the worker; with gunicorn the whole file
+              (or a "bytes=N-" tail) goes out through sendfile(), and
+              single Range requests are honoured
+  "nginx"     an empty response with X-Accel-Redirect; nginx serves the
+              file from an ``internal`` location at MEDIA_ACCEL_PREFIX
+  "sendfile"  an empty response with X-Sendfile (Apache mod_xsendfile,
+              lighttpd) carrying the absolute path
+
+With nginx, for example:
+    location /protected-media/ { internal; alias /app/media/; }
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .storage import is_blob_name
+
+MODE_DJANGO = "django"
+MODE_NGINX = "nginx"
+MODE_SENDFILE = "sendfile"
+
+# blobs are named after their content, so they never change
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class _LimitedReader:
+    """Reads at most ``remaining`` bytes of ``fh`` (a closed-ended Range)."""
+
+    def __init__(self, fh, remaining):
+        self.fh = fh
+        self.remaining = remaining
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fh.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.fh.close()
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single satisfiable byte range, else None."""
+    match = _RANGE_RE.match(header.strip()) if header else None
+    if not match or size == 0:
+        return None
+    first, last = match.groups()
+    if first == "":
+        if last == "":
+            return None
+        # suffix range: the last N bytes
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+def _cache_headers(response, name, stat):
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    if is_blob_name(name):
+        response["Cache-Control"] = f"private, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    else:
+        response["Cache-Control"] = "private, no-cache"
+    response["Accept-Ranges"] = "bytes"
+
+
+def send_file(request, storage, name, as_attachment=False, filename=None):
+    """Response delivering ``storage``'s file ``name`` to an allowed user."""
+    try:
+        full_path = storage.path(name)
+        stat = os.stat(full_path)
+    except (OSError, NotImplementedError, ValueError):
+        raise Http404("File not found.")
+
+    if not was_modified_since(request.META.get("HTTP_IF_MODIFIED_SINCE"), stat.st_mtime):
+        response = HttpResponseNotModified()
+        _cache_headers(response, name, stat)
+        return response
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or "application/octet-stream"
+    mode = getattr(settings, "MEDIA_SERVE_MODE", MODE_DJANGO)
+
+    if mode in (MODE_NGINX, MODE_SENDFILE):
+        response = HttpResponse(content_type=content_type)
+        if mode == MODE_NGINX:
+            prefix = getattr(settings, "MEDIA_ACCEL_PREFIX", "/protected-media/")
+            response["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + quote(name)
+        else:
+            response["X-Sendfile"] = full_path
+        # the proxy fills in the body, length and ranges
+    else:
+        response = _file_response(request, full_path, stat.st_size, content_type)
+
+    if encoding:
+        response["Content-Encoding"] = encoding
+    if as_attachment or filename:
+        disposition = "attachment" if as_attachment else "inline"
+        response["Content-Disposition"] = (
+            f"{disposition}; filename*=UTF-8''{quote(filename or os.path.basename(name))}"
+        )
+    _cache_headers(response, name, stat)
+    return response
+
+
+def _file_response(request, full_path, size, content_type):
+    byte_range = parse_range(request.META.get("HTTP_RANGE"), size)
+    if request.META.get("HTTP_RANGE") and byte_range is None and _RANGE_RE.match(
+        request.META["HTTP_RANGE"].strip()
+    ):
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    fh = open(full_path, "rb")
+    if byte_range is None:
+        return FileResponse(fh, content_type=content_type)
+
+    start, end = byte_range
+    length = end - start + 1
+    fh.seek(start)
+    if end == size - 1:
+        # open-ended tail: keep the real file so sendfile() still applies
+        response = FileResponse(fh, content_type=content_type, status=206)
+    else:
+        response = FileResponse(_LimitedReader(fh, length), content_type=content_type, status=206)
+    response["Content-Length"] = str(length)
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return response
@@ -0,0 +1,8 @@
+from diagrams.models import Diagram, DiagramRendition
+from grading.models import Evidence
+
+from .refs import track
+
+track(Evidence, "file")
+track(Diagram, "image")
+track(DiagramRendition, "file")
@@ -0,0 +1,97 @@
+# mediastore/storage.py
+"""
+Content-addressed file storage.
+
+Uploads are hashed (SHA-256) while they are streamed to a temporary file
+under MEDIA_ROOT, then moved to ``cas/<ab>/<cd>/<digest><ext>``. If that
+path already exists the new copy is simply dropped, so the same
+screenshot uploaded by five team members (or resubmitted five times) is
+stored once. Every stored path has a Blob row; deleting a field's file
+never removes a shared blob, garbage collection does (``gc_blobs``).
+Storing content that already exists marks its blob as just referenced.
+
+Files saved before the switch keep their old names and are served as-is.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils import timezone
+
+CAS_DIR = "cas"
+TMP_DIR = f"{CAS_DIR}/tmp"
+
+
+def blob_name(digest, ext=""):
+    return f"{CAS_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{ext.lower()}"
+
+
+def is_blob_name(name):
+    return bool(name) and name.startswith(f"{CAS_DIR}/") and not name.startswith(f"{TMP_DIR}/")
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # the final name comes from the content, not from the upload
+        return name
+
+    def _save(self, name, content):
+        from .models import Blob
+
+        ext = os.path.splitext(name)[1]
+        tmp_dir = self.path(TMP_DIR)
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                if hasattr(content, "seek"):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+
+            final = blob_name(digest.hexdigest(), ext)
+            with transaction.atomic():
+                # Locks the row gc_blobs locks before deleting, so the file
+                # check below never races with its removal.
+                blob, created = Blob.objects.select_for_update().get_or_create(
+                    name=final,
+                    defaults={"digest": digest.hexdigest(), "size": size},
+                )
+                if not created:
+                    blob.last_referenced_at = timezone.now()
+                    blob.save(update_fields=["last_referenced_at"])
+                full_path = self.path(final)
+                if os.path.exists(full_path):
+                    os.unlink(tmp_path)
+                else:
+                    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                    os.chmod(tmp_path, self.file_permissions_mode or 0o644)
+                    os.replace(tmp_path, full_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        return final
+
+    def delete(self, name):
+        # shared blobs are only ever removed by gc_blobs
+        if is_blob_name(name):
+            return
+        super().delete(name)
+
+
+# location/base_url default to MEDIA_ROOT/MEDIA_URL and follow setting changes
+cas_storage = ContentAddressedStorage()
+
+
+def get_cas_storage():
+    """Callable for ``FileField(storage=...)`` so migrations don't bake in paths."""
+    return cas_storage
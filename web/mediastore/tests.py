@@ -0,0 +1,265 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import Profile, Team
+from diagrams.models import Diagram
+from grading.models import Evidence, Milestone, Submission
+from socdocs.testing import LOCMEM_CACHES
+
+from .access import can_access
+from .management.commands.gc_blobs import _delete_orphan
+from .models import Blob
+from .serving import parse_range
+from .storage import cas_storage
+
+PRIVATE = "cas/aa/bb/private.png"
+SHARED = "cas/cc/dd/shared.png"
+EVIDENCE = "cas/ee/ff/evidence.png"
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AccessTests(TestCase):
+    def setUp(self):
+        team = Team.objects.create(name="Blue")
+        self.owner = User.objects.create_user("owner")
+        self.teammate = User.objects.create_user("teammate")
+        self.outsider = User.objects.create_user("outsider")
+        self.staff = User.objects.create_user("prof", is_staff=True)
+        Profile.objects.filter(user__in=[self.owner, self.teammate]).update(team=team)
+
+        Diagram.objects.create(title="Private", image=PRIVATE, owner=self.owner, team=team)
+        Diagram.objects.create(title="Public", image=SHARED, visibility="class", approved=True)
+        submission = Submission.objects.create(
+            milestone=Milestone.objects.create(title="M1", description=""), student=self.owner
+        )
+        Evidence.objects.create(submission=submission, title="shot", file=SHARED)
+        Evidence.objects.create(submission=submission, title="log", file=EVIDENCE)
+
+    def assertAccess(self, name, **expected):
+        users = {
+            "owner": self.owner,
+            "teammate": self.teammate,
+            "outsider": self.outsider,
+            "staff": self.staff,
+            "anon": AnonymousUser(),
+        }
+        actual = {who: can_access(users[who], name) for who in expected}
+        self.assertEqual(actual, expected)
+
+    def test_team_only_diagram(self):
+        self.assertAccess(PRIVATE, owner=True, teammate=True, outsider=False, staff=True, anon=False)
+
+    def test_evidence_is_for_its_student_and_staff(self):
+        self.assertAccess(EVIDENCE, owner=True, teammate=False, outsider=False, staff=True, anon=False)
+
+    def test_blob_shared_with_a_public_diagram_is_public(self):
+        self.assertAccess(SHARED, owner=True, outsider=True, anon=True)
+
+    def test_unreferenced_names(self):
+        self.assertAccess("markdownx/embedded.png", anon=True, outsider=True)
+        self.assertAccess("exports/grades.csv", staff=False, anon=False)
+        self.assertAccess("cas/00/00/nothing.png", staff=False)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ServeMediaTests(TestCase):
+    CONTENT = bytes(range(100))
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        for name in ("markdownx/pic.png", "exports/grades.csv", "secret.txt"):
+            os.makedirs(os.path.dirname(os.path.join(media, name)), exist_ok=True)
+            with open(os.path.join(media, name), "wb") as fh:
+                fh.write(self.CONTENT)
+        self.client.force_login(User.objects.create_user("prof", is_staff=True))
+
+    def get(self, path, **headers):
+        return self.client.get(f"/media/{path}", **headers)
+
+    def test_public_prefix_is_served_and_exports_are_not(self):
+        response = self.get("markdownx/pic.png")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.CONTENT)
+        self.assertEqual(self.get("exports/grades.csv").status_code, 404)
+
+    def test_path_traversal_is_refused(self):
+        for path in (
+            "markdownx/../secret.txt",
+            "markdownx/../../etc/passwd",
+            "markdownx//pic.png",
+            "markdownx/./pic.png",
+            "/markdownx/pic.png",
+        ):
+            self.assertEqual(self.get(path).status_code, 404, path)
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=0-9", 100), (0, 9))
+        self.assertEqual(parse_range("bytes=90-", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=-10", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=95-200", 100), (95, 99))
+        self.assertIsNone(parse_range("bytes=100-", 100))
+        self.assertIsNone(parse_range("bytes=5-1", 100))
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 100))
+        self.assertIsNone(parse_range("bytes=0-9", 0))
+        self.assertIsNone(parse_range("", 100))
+
+    def test_range_responses(self):
+        response = self.get("markdownx/pic.png", HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 10-19/100")
+        self.assertEqual(b"".join(response.streaming_content), self.CONTENT[10:20])
+
+        response = self.get("markdownx/pic.png", HTTP_RANGE="bytes=90-")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), self.CONTENT[90:])
+
+        response = self.get("markdownx/pic.png", HTTP_RANGE="bytes=200-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */100")
+
+    @override_settings(MEDIA_SERVE_MODE="nginx", MEDIA_ACCEL_PREFIX="/protected-media/")
+    def test_nginx_offload(self):
+        response = self.get("markdownx/pic.png")
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/markdownx/pic.png")
+        self.assertEqual(response.content, b"")
+
+    @override_settings(MEDIA_SERVE_MODE="sendfile")
+    def test_sendfile_offload(self):
+        response = self.get("markdownx/pic.png")
+        self.assertEqual(response["X-Sendfile"], default_storage.path("markdownx/pic.png"))
+        self.assertEqual(response.content, b"")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BlobStoreTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.submission = Submission.objects.create(
+            milestone=Milestone.objects.create(title="M1", description=""),
+            student=User.objects.create_user("student"),
+        )
+
+    def evidence(self, content, title="shot"):
+        evidence = Evidence(submission=self.submission, title=title)
+        evidence.file.save("screenshot.png", ContentFile(content))
+        return evidence
+
+    def blob(self, evidence):
+        return Blob.objects.get(name=evidence.file.name)
+
+    def age(self, evidence, hours=48):
+        Blob.objects.filter(name=evidence.file.name).update(
+            created_at=timezone.now() - timedelta(hours=hours),
+            last_referenced_at=timezone.now() - timedelta(hours=hours),
+        )
+
+    def gc(self, *args):
+        call_command("gc_blobs", *args, stdout=StringIO())
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.evidence(b"same bytes")
+        second = self.evidence(b"same bytes", title="again")
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertTrue(first.file.name.startswith("cas/"))
+        self.assertEqual(Blob.objects.count(), 1)
+        self.assertEqual(self.blob(first).refcount, 2)
+        self.assertEqual(os.listdir(os.path.dirname(cas_storage.path(first.file.name))), [
+            os.path.basename(first.file.name)
+        ])
+
+    def test_refcount_follows_changes_and_deletes(self):
+        first = self.evidence(b"one")
+        second = self.evidence(b"one", title="again")
+        old_name = second.file.name
+        second.file.save("other.png", ContentFile(b"two"))
+        self.assertEqual(Blob.objects.get(name=old_name).refcount, 1)
+        self.assertEqual(self.blob(second).refcount, 1)
+
+        first.delete()
+        self.assertEqual(Blob.objects.get(name=old_name).refcount, 0)
+        # deleting a row never removes the shared file; gc does
+        self.assertTrue(cas_storage.exists(old_name))
+
+    def test_reupload_marks_the_blob_referenced(self):
+        evidence = self.evidence(b"old screenshot")
+        evidence.delete()
+        self.age(evidence)
+        before = self.blob(evidence).last_referenced_at
+        cas_storage.save("again.png", ContentFile(b"old screenshot"))
+        self.assertGreater(self.blob(evidence).last_referenced_at, before)
+
+    def test_gc_removes_old_orphans_only(self):
+        kept = self.evidence(b"kept")
+        fresh = self.evidence(b"fresh orphan")
+        old = self.evidence(b"old orphan")
+        fresh.delete()
+        old.delete()
+        self.age(old)
+        self.age(kept)
+
+        self.gc()
+        self.assertEqual(
+            set(Blob.objects.values_list("name", flat=True)), {kept.file.name, fresh.file.name}
+        )
+        self.assertFalse(cas_storage.exists(old.file.name))
+        self.assertTrue(cas_storage.exists(kept.file.name))
+
+    def test_gc_keeps_an_old_orphan_that_was_reused(self):
+        evidence = self.evidence(b"reused")
+        evidence.delete()
+        self.age(evidence, hours=24 * 30)
+        # uploaded again, not yet attached to a row
+        cas_storage.save("again.png", ContentFile(b"reused"))
+        self.gc()
+        self.assertTrue(Blob.objects.filter(name=evidence.file.name).exists())
+        self.assertTrue(cas_storage.exists(evidence.file.name))
+
+    def test_gc_corrects_drifted_counts(self):
+        evidence = self.evidence(b"drift")
+        self.age(evidence)
+        Blob.objects.filter(name=evidence.file.name).update(refcount=0)
+        self.gc("--dry-run")
+        self.assertEqual(self.blob(evidence).refcount, 0)
+        self.gc()
+        self.assertEqual(self.blob(evidence).refcount, 1)
+        self.assertTrue(cas_storage.exists(evidence.file.name))
+
+    def test_gc_leaves_counts_touched_while_it_ran(self):
+        evidence = self.evidence(b"busy")
+        # a reference added after the count started is not in the snapshot
+        Blob.objects.filter(name=evidence.file.name).update(
+            refcount=5, last_referenced_at=timezone.now() + timedelta(minutes=1)
+        )
+        self.gc()
+        self.assertEqual(self.blob(evidence).refcount, 5)
+
+    def test_delete_rechecks_references(self):
+        evidence = self.evidence(b"referenced")
+        self.age(evidence)
+        blob = self.blob(evidence)
+        Blob.objects.filter(pk=blob.pk).update(refcount=0)
+        self.assertFalse(_delete_orphan(blob.pk, timezone.now()))
+        self.assertTrue(cas_storage.exists(blob.name))
+
+        evidence.delete()
+        self.assertTrue(_delete_orphan(blob.pk, timezone.now()))
+        self.assertFalse(Blob.objects.filter(pk=blob.pk).exists())
+        self.assertFalse(cas_storage.exists(blob.name))
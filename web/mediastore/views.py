@@ -0,0 +1,19 @@
+import posixpath
+
+from django.core.files.storage import default_storage
+from django.http import Http404
+
+from .access import can_access
+from .serving import send_file
+
+
+def serve_media(request, path):
+    """
+    Every MEDIA_URL request: check that the user may see a row that uses
+    the file, then hand the transfer off (see mediastore.serving).
+    Refusals are 404s so private file names aren't confirmed.
+    """
+    name = posixpath.normpath(path).lstrip("/")
+    if name.startswith("..") or name != path or not can_access(request.user, name):
+        raise Http404("File not found.")
+    return send_file(request, default_storage, name)
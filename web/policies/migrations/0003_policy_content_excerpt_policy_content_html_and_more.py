@@ -0,0 +1,28 @@
+# Generated by Django 5.1.1 on 2026-10-17 17:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policies', '0002_policy_team_policy_visibility_alter_policy_owner_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='policy',
+            name='content_excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name='policy',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='policy',
+            name='rendered_with',
+            field=models.CharField(blank=True, editable=False, max_length=12),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.1 on 2026-10-17 17:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_classconfig_profile_display_name_profile_role_in_soc'),
+        ('policies', '0003_policy_content_excerpt_policy_content_html_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='policy',
+            index=models.Index(fields=['category', 'title', 'id'], name='policies_po_categor_579ad0_idx'),
+        ),
+    ]
@@ -1,10 +1,59 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import User
 from markdownx.models import MarkdownxField
-from markdownx.utils import markdownify
 from django.utils.text import slugify
 
-from accounts.models import Team   # <-- use the Team model from accounts
+from socdocs.rendering import (
+    EXCERPT_LENGTH,
+    make_excerpt,
+    markdown_config_hash,
+    render_incremental,
+    render_markdown,
+)
+
+from accounts.models import Team, user_team_id   # <-- use the Team model from accounts
+
+
+PUBLISHED_VISIBILITIES = ("class", "global")
+
+
+class PolicyQuerySet(models.QuerySet):
+    """
+    Visibility rules from policies.views.can_view_policy / can_edit_policy
+    compiled to SQL, so lists never have to test rows one by one.
+    """
+
+    def published(self):
+        return self.filter(approved=True, visibility__in=PUBLISHED_VISIBILITIES)
+
+    def unpublished(self):
+        return self.exclude(approved=True, visibility__in=PUBLISHED_VISIBILITIES)
+
+    def editable_by(self, user):
+        """Staff, the owner, or any member of the owning team."""
+        if not user.is_authenticated:
+            return self.none()
+        if user.is_staff:
+            return self
+        return self.filter(self._member_q(user))
+
+    def visible_to(self, user):
+        """Published rows for everyone; drafts/team-only rows for editors."""
+        if user.is_authenticated and user.is_staff:
+            return self
+        allowed = Q(approved=True, visibility__in=PUBLISHED_VISIBILITIES)
+        if user.is_authenticated:
+            allowed |= self._member_q(user)
+        return self.filter(allowed)
+
+    @staticmethod
+    def _member_q(user):
+        q = Q(owner=user)
+        team_id = user_team_id(user)
+        if team_id:
+            q |= Q(team_id=team_id)
+        return q
 
 
 class Policy(models.Model):
@@ -54,6 +103,11 @@ class Policy(models.Model):
 
     content = MarkdownxField()
 
+    # Rendered copies of `content`, refreshed on save (see rerender_markdown)
+    content_html = models.TextField(blank=True, editable=False)
+    content_excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, editable=False)
+    rendered_with = models.CharField(max_length=12, blank=True, editable=False)
+
     # NEW: team/class/global visibility
     visibility = models.CharField(
         max_length=10,
@@ -66,16 +120,36 @@ class Policy(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = PolicyQuerySet.as_manager()
+
+    @property
+    def is_public(self):
+        """Approved and published: visible to everyone, including anonymous users."""
+        return self.approved and self.visibility in PUBLISHED_VISIBILITIES
+
     @property
     def html(self):
-        return markdownify(self.content)
+        # Rows saved before the HTML columns existed fall back to rendering.
+        if self.content_html or not self.content:
+            return self.content_html
+        return render_markdown(self.content)
+
+    def refresh_html(self):
+        self.content_html = render_incremental(self.content)
+        self.content_excerpt = make_excerpt(self.content_html)
+        self.rendered_with = markdown_config_hash()
 
     class Meta:
         ordering = ["category", "title"]
+        indexes = [
+            # keyset pagination on the list page
+            models.Index(fields=["category", "title", "id"]),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        self.refresh_html()
         super().save(*args, **kwargs)
 
     def __str__(self):
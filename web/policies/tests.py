@@ -1,3 +1,62 @@
-from django.test import TestCase
+from itertools import product
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser, User
+from django.test import TestCase, override_settings
+
+from accounts.models import Profile, Team
+from socdocs.testing import LOCMEM_CACHES
+
+from .models import Policy
+from .views import can_edit_policy, can_view_policy
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class VisibilityMatrixTests(TestCase):
+    """visible_to / editable_by must agree with can_view_policy / can_edit_policy."""
+
+    def setUp(self):
+        blue = Team.objects.create(name="Blue")
+        red = Team.objects.create(name="Red")
+        owner = User.objects.create_user("owner")
+        self.users = {
+            "owner": owner,
+            "teammate": User.objects.create_user("teammate"),
+            "outsider": User.objects.create_user("outsider"),
+            "loner": User.objects.create_user("loner"),
+            "staff": User.objects.create_user("prof", is_staff=True),
+        }
+        Profile.objects.filter(user__username__in=["owner", "teammate"]).update(team=blue)
+        Profile.objects.filter(user__username="outsider").update(team=red)
+
+        for n, (visibility, approved, team, has_owner) in enumerate(
+            product(["team", "class", "global"], [False, True], [blue, None], [True, False])
+        ):
+            Policy.objects.create(
+                title=f"Policy {n}", content="x", visibility=visibility, approved=approved,
+                team=team, owner=owner if has_owner else None,
+            )
+
+    def test_querysets_match_object_rules(self):
+        policies = list(Policy.objects.all())
+        for name, user in [*self.users.items(), ("anon", AnonymousUser())]:
+            with self.subTest(user=name):
+                self.assertEqual(
+                    set(Policy.objects.visible_to(user)),
+                    {p for p in policies if can_view_policy(user, p)},
+                )
+                self.assertEqual(
+                    set(Policy.objects.editable_by(user)),
+                    {p for p in policies if can_edit_policy(user, p)},
+                )
+
+    def test_expected_counts(self):
+        published = 8  # approved class/global rows
+        counts = {
+            name: Policy.objects.visible_to(user).count()
+            for name, user in [*self.users.items(), ("anon", AnonymousUser())]
+        }
+        self.assertEqual(
+            counts,
+            # of the 16 unpublished rows, 8 are Blue's and 8 are owned (4 both)
+            {"owner": 20, "teammate": 16, "outsider": published, "loner": published, "staff": 24, "anon": published},
+        )
@@ -4,6 +4,9 @@ from django.forms import ModelForm
 from django.http import Http404
 from django.contrib import messages
 
+from accounts.principal import principal_for
+from socdocs.conditional import conditional_detail, set_content_cache_headers
+from socdocs.pagination import paginate
 from .models import Policy
 
 
@@ -11,10 +14,22 @@ from .models import Policy
 # Helpers
 # -------------------------
 
-def get_user_team(user):
-    """Return the accounts.Team for this user, or None."""
-    prof = getattr(user, "profile", None)
-    return getattr(prof, "team", None) if prof else None
+def _view_rule(principal, policy):
+    if principal.is_staff:
+        return True
+    if not policy.approved or policy.visibility == "team":
+        # drafts and team-only policies: owner or team members
+        return principal.is_member(policy)
+    # approved class/global policies are visible to everyone (even anonymous)
+    return policy.visibility in ("class", "global")
+
+
+def _edit_rule(principal, policy):
+    return principal.is_staff or principal.is_member(policy)
+
+
+def _publish_rule(principal, policy):
+    return principal.is_staff or principal.on_team_of(policy)
 
 
 def can_view_policy(user, policy: Policy) -> bool:
@@ -25,39 +40,7 @@ def can_view_policy(user, policy: Policy) -> bool:
     - Approved + visibility in {"class", "global"} -> anyone can view (even anonymous).
     - Team-only or unapproved -> owner, team members, or staff.
     """
-    # Staff can always see everything
-    if user.is_authenticated and user.is_staff:
-        return True
-
-    # Unapproved drafts
-    if not policy.approved:
-        if not user.is_authenticated:
-            return False
-        if user == policy.owner:
-            return True
-        user_team = get_user_team(user)
-        if policy.team and user_team == policy.team:
-            return True
-        return False
-
-    # Approved: handle by visibility
-    if policy.visibility in ("class", "global"):
-        # class/global are visible to everyone (logged in or not)
-        return True
-
-    # team-only visibility
-    if policy.visibility == "team":
-        if not user.is_authenticated:
-            return False
-        if user == policy.owner:
-            return True
-        user_team = get_user_team(user)
-        if policy.team and user_team == policy.team:
-            return True
-        return False
-
-    # Fallback (shouldn't hit)
-    return False
+    return principal_for(user).decide("view", policy, _view_rule)
 
 
 def can_edit_policy(user, policy: Policy) -> bool:
@@ -67,16 +50,12 @@ def can_edit_policy(user, policy: Policy) -> bool:
     - owner
     - any member of the policy's team
     """
-    if not user.is_authenticated:
-        return False
-    if user.is_staff:
-        return True
-    if user == policy.owner:
-        return True
-    user_team = get_user_team(user)
-    if policy.team and user_team == policy.team:
-        return True
-    return False
+    return principal_for(user).decide("edit", policy, _edit_rule)
+
+
+def can_publish_policy(user, policy: Policy) -> bool:
+    """Staff, or members of the policy's team (not just its owner)."""
+    return principal_for(user).decide("publish", policy, _publish_rule)
 
 
 # -------------------------
@@ -101,58 +80,54 @@ def policy_list(request):
       - Team drafts (unapproved or team-only) for the current user's team.
     """
 
-    # Approved, visible-to-class/global policies
-    published = Policy.objects.filter(
-        approved=True,
-        visibility__in=["class", "global"],
-    ).order_by("category", "title")
+    # One visibility filter in SQL; list pages only need the stored excerpt.
+    visible = (
+        Policy.objects.visible_to(request.user)
+        .select_related("team")
+        .defer("content", "content_html")
+    )
+
+    # Approved, visible-to-class/global policies, one page at a time
+    page = paginate(request, visible.published(), ("category", "title", "id"))
 
     # Group published by category display name for nicer UI
     grouped = {}
-    for p in published:
+    for p in page:
         grouped.setdefault(p.get_category_display(), []).append(p)
 
     # Team drafts if logged in + on a team
     team_drafts = []
-    if request.user.is_authenticated:
-        user_team = get_user_team(request.user)
-        if user_team:
-            team_drafts = (
-                Policy.objects.filter(team=user_team)
-                .exclude(approved=True, visibility__in=["class", "global"])
-                .order_by("-updated_at")
-            )
+    team_id = request.principal.team_id
+    if team_id:
+        team_drafts = (
+            visible.filter(team_id=team_id)
+            .unpublished()
+            .order_by("-updated_at")
+        )
 
     return render(
         request,
         "policies/list.html",
         {
+            "page": page,
             "grouped": grouped,        # { "Incident Response": [policies…], ... }
             "team_drafts": team_drafts # drafts for this user's team
         },
     )
 
 
+@conditional_detail("policy", lambda request: Policy.objects.visible_to(request.user))
 def policy_detail(request, slug):
-    policy = get_object_or_404(Policy, slug=slug)
-
-    if not can_view_policy(request.user, policy):
-        raise Http404("Policy not found")
+    # same rules as can_view_policy, applied in the query
+    policy = get_object_or_404(
+        Policy.objects.visible_to(request.user).select_related("team", "owner"),
+        slug=slug,
+    )
 
-    # Can this user edit?
     can_edit = can_edit_policy(request.user, policy)
+    can_publish = can_publish_policy(request.user, policy)
 
-    # Can this user publish to class?
-    can_publish = False
-    if request.user.is_authenticated:
-        if request.user.is_staff:
-            can_publish = True
-        else:
-            user_team = get_user_team(request.user)
-            if policy.team and user_team == policy.team:
-                can_publish = True
-
-    return render(
+    response = render(
         request,
         "policies/detail.html",
         {
@@ -161,6 +136,7 @@ def policy_detail(request, slug):
             "can_publish": can_publish,
         },
     )
+    return set_content_cache_headers(request, response, policy.is_public)
 
 
 
@@ -173,7 +149,7 @@ def policy_create(request):
     - Team = user's team (if any)
     - Starts as visibility="team", approved=False
     """
-    user_team = get_user_team(request.user)
+    user_team = request.principal.team
 
     if request.method == "POST":
         form = PolicyForm(request.POST)
@@ -235,10 +211,8 @@ def policy_publish(request, slug):
     policy = get_object_or_404(Policy, slug=slug)
 
     # Only staff OR members of the policy's team may publish
-    if not request.user.is_staff:
-        user_team = get_user_team(request.user)
-        if not (policy.team and user_team == policy.team):
-            raise Http404("Policy not found")
+    if not can_publish_policy(request.user, policy):
+        raise Http404("Policy not found")
 
     if request.method == "POST":
         policy.visibility = "class"
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import SearchEntry
+
+
+@admin.register(SearchEntry)
+class SearchEntryAdmin(admin.ModelAdmin):
+    list_display = ("title", "kind", "public", "team", "updated_at")
+    list_filter = ("kind", "public")
+    search_fields = ("title",)
@@ -0,0 +1,173 @@
+# search/backends.py
+"""
+Full-text backends for SearchEntry.
+
+PostgreSQL uses a tsvector column with a GIN index; SQLite uses an FTS5
+table keyed on the entry id. Anything else (or SQLite without FTS5) falls
+back to icontains so dev setups still work, just slower.
+"""
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db import connection
+from django.db.models import F, Q
+from django.utils.html import escape
+
+from .models import SearchEntry
+
+FTS_TABLE = "search_searchentry_fts"
+
+# Sentinels wrapped around matches by the database, swapped for <mark>
+# after the snippet has been HTML-escaped.
+MARK_START = "\x02"
+MARK_END = "\x03"
+
+
+def search_config():
+    return getattr(settings, "SEARCH_CONFIG", "english")
+
+
+def highlight(snippet):
+    """Escape a raw snippet and turn the sentinels into <mark> tags."""
+    return (
+        escape(snippet)
+        .replace(MARK_START, "<mark>")
+        .replace(MARK_END, "</mark>")
+    )
+
+
+def query_terms(q):
+    return re.findall(r"\w+", q or "")
+
+
+class PostgresBackend:
+    def index(self, entry):
+        vector = (
+            SearchVector("title", weight="A", config=search_config())
+            + SearchVector("body", weight="B", config=search_config())
+        )
+        SearchEntry.objects.filter(pk=entry.pk).update(search_vector=vector)
+
+    def remove(self, entry_id):
+        pass  # the vector lives on the entry row itself
+
+    def clear(self):
+        pass
+
+    def search(self, entries, q, limit):
+        query = SearchQuery(q, search_type="websearch", config=search_config())
+        qs = (
+            entries.filter(search_vector=query)
+            .annotate(
+                rank=SearchRank(F("search_vector"), query),
+                snippet=SearchHeadline(
+                    "body",
+                    query,
+                    config=search_config(),
+                    start_sel=MARK_START,
+                    stop_sel=MARK_END,
+                    max_words=30,
+                    min_words=12,
+                ),
+            )
+            .defer("body", "search_vector")
+            .order_by("-rank")[:limit]
+        )
+        return [(entry, entry.snippet) for entry in qs]
+
+
+class SqliteFtsBackend:
+    def index(self, entry):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [entry.pk])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)",
+                [entry.pk, entry.title, entry.body],
+            )
+
+    def remove(self, entry_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [entry_id])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+    def search(self, entries, q, limit):
+        terms = query_terms(q)
+        if not terms:
+            return []
+        # quote every term (no FTS syntax from users), prefix-match the last one
+        match = " ".join(f'"{t}"' for t in terms[:-1])
+        match = f'{match} "{terms[-1]}"*'.strip()
+
+        visible_sql, visible_params = entries.values("pk").query.sql_with_params()
+        sql = (
+            f"SELECT {FTS_TABLE}.rowid, "
+            f"snippet({FTS_TABLE}, 1, %s, %s, '…', 24), "
+            f"bm25({FTS_TABLE}, 10.0, 1.0) AS rank "
+            f"FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid IN ({visible_sql}) "
+            f"ORDER BY rank LIMIT %s"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [MARK_START, MARK_END, match, *visible_params, limit])
+            hits = cursor.fetchall()
+
+        by_id = SearchEntry.objects.defer("body").in_bulk([h[0] for h in hits])
+        return [(by_id[pk], snippet) for pk, snippet, _ in hits if pk in by_id]
+
+
+class BasicBackend:
+    def index(self, entry):
+        pass
+
+    def remove(self, entry_id):
+        pass
+
+    def clear(self):
+        pass
+
+    def search(self, entries, q, limit):
+        terms = query_terms(q)
+        if not terms:
+            return []
+        for term in terms:
+            entries = entries.filter(Q(title__icontains=term) | Q(body__icontains=term))
+        results = []
+        for entry in entries.order_by("-updated_at")[:limit]:
+            start = entry.body.lower().find(terms[0].lower())
+            start = max(start - 80, 0)
+            snippet = entry.body[start:start + 200]
+            snippet = re.sub(
+                "(%s)" % "|".join(re.escape(t) for t in terms),
+                lambda m: MARK_START + m.group(1) + MARK_END,
+                snippet,
+                flags=re.IGNORECASE,
+            )
+            results.append((entry, snippet))
+        return results
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        if connection.vendor == "postgresql":
+            _backend = PostgresBackend()
+        elif (
+            connection.vendor == "sqlite"
+            and FTS_TABLE in connection.introspection.table_names()
+        ):
+            _backend = SqliteFtsBackend()
+        else:
+            _backend = BasicBackend()
+    return _backend
@@ -0,0 +1,84 @@
+# search/index.py
+"""Keep SearchEntry rows in sync with DocPage / Policy / Diagram."""
+from html import unescape
+
+from django.urls import reverse
+from django.utils.html import strip_tags
+
+from diagrams.models import Diagram
+from docs.models import DocPage
+from policies.models import Policy
+
+from .backends import get_backend
+from .models import SearchEntry
+
+
+def _plain(html):
+    # bodies are plain text; snippets are escaped again when highlighted
+    return " ".join(unescape(strip_tags(html)).split())
+
+
+def entry_fields(obj):
+    """
+    Kind + denormalized fields for a source object. ``public`` is the
+    object's is_public; everything else is limited to the owning team (and
+    owner) plus staff.
+    """
+    if isinstance(obj, DocPage):
+        return SearchEntry.KIND_DOC, {
+            "title": obj.title,
+            "body": _plain(obj.html),
+            "url": reverse("docs:detail", args=[obj.slug]),
+            "public": obj.is_public,
+            "team_id": obj.team_id,
+            "owner_id": None,  # doc authors get no extra access
+            "updated_at": obj.updated_at,
+        }
+    if isinstance(obj, Policy):
+        return SearchEntry.KIND_POLICY, {
+            "title": obj.title,
+            "body": _plain(obj.html),
+            "url": reverse("policies:detail", args=[obj.slug]),
+            "public": obj.is_public,
+            "team_id": obj.team_id,
+            "owner_id": obj.owner_id,
+            "updated_at": obj.updated_at,
+        }
+    if isinstance(obj, Diagram):
+        return SearchEntry.KIND_DIAGRAM, {
+            "title": obj.title,
+            "body": _plain(obj.html_notes),
+            "url": reverse("diagrams:detail", args=[obj.slug]),
+            "public": obj.is_public,
+            "team_id": obj.team_id,
+            "owner_id": obj.owner_id,
+            "updated_at": obj.updated_at,
+        }
+    raise TypeError(f"{type(obj).__name__} is not searchable")
+
+
+KIND_BY_MODEL = {
+    DocPage: SearchEntry.KIND_DOC,
+    Policy: SearchEntry.KIND_POLICY,
+    Diagram: SearchEntry.KIND_DIAGRAM,
+}
+
+
+def index_object(obj):
+    kind, fields = entry_fields(obj)
+    entry, _ = SearchEntry.objects.update_or_create(
+        kind=kind, object_id=obj.pk, defaults=fields
+    )
+    get_backend().index(entry)
+    return entry
+
+
+def remove_object(obj):
+    remove_entry(KIND_BY_MODEL[type(obj)], obj.pk)
+
+
+def remove_entry(kind, object_id):
+    entries = SearchEntry.objects.filter(kind=kind, object_id=object_id)
+    for entry_id in entries.values_list("pk", flat=True):
+        get_backend().remove(entry_id)
+    entries.delete()
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from diagrams.models import Diagram
+from docs.models import DocPage
+from policies.models import Policy
+from search.backends import get_backend
+from search.index import index_object
+from search.models import SearchEntry
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for docs, policies and diagrams."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        SearchEntry.objects.all().delete()
+        get_backend().clear()
+
+        for model in (DocPage, Policy, Diagram):
+            count = 0
+            for obj in model.objects.iterator(chunk_size=options["batch_size"]):
+                index_object(obj)
+                count += 1
+            self.stdout.write(f"{model.__name__}: indexed {count}")
+
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
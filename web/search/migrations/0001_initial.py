@@ -0,0 +1,67 @@
+# Generated by Django 5.1.1 on 2026-10-17 17:36
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.utils import OperationalError
+
+
+def create_fulltext_index(apps, schema_editor):
+    """GIN index on PostgreSQL, FTS5 table on SQLite (if compiled in)."""
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX search_searchentry_vector_gin "
+            "ON search_searchentry USING GIN (search_vector)"
+        )
+    elif vendor == "sqlite":
+        try:
+            schema_editor.execute(
+                "CREATE VIRTUAL TABLE search_searchentry_fts "
+                "USING fts5(title, body, tokenize='porter unicode61')"
+            )
+        except OperationalError:
+            pass  # no FTS5: search falls back to icontains
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS search_searchentry_vector_gin")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS search_searchentry_fts")
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accounts', '0002_classconfig_profile_display_name_profile_role_in_soc'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('doc', 'Doc'), ('policy', 'Policy'), ('diagram', 'Diagram')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('body', models.TextField(blank=True)),
+                ('url', models.CharField(max_length=300)),
+                ('public', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField()),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+                ('owner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('team', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='accounts.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['public'], name='search_sear_public_cb576e_idx')],
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
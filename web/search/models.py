@@ -0,0 +1,56 @@
+from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models
+
+from accounts.models import Team
+
+
+class SearchEntry(models.Model):
+    """
+    One row per searchable DocPage / Policy / Diagram, kept in sync on save
+    (see search.signals). The visibility columns are denormalized from the
+    source object so results can be filtered in the same query.
+
+    The full-text index itself is backend specific and created by the
+    migration: a GIN index on ``search_vector`` for PostgreSQL, or an FTS5
+    table (``search_searchentry_fts``) for SQLite.
+    """
+
+    KIND_DOC = "doc"
+    KIND_POLICY = "policy"
+    KIND_DIAGRAM = "diagram"
+
+    KIND_CHOICES = [
+        (KIND_DOC, "Doc"),
+        (KIND_POLICY, "Policy"),
+        (KIND_DIAGRAM, "Diagram"),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True)
+    url = models.CharField(max_length=300)
+
+    # visibility, mirrored from the source object
+    public = models.BooleanField(default=False)
+    team = models.ForeignKey(
+        Team, null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+    owner = models.ForeignKey(
+        User, null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+
+    updated_at = models.DateTimeField()
+
+    # Only populated on PostgreSQL
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        unique_together = [("kind", "object_id")]
+        indexes = [
+            models.Index(fields=["public"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.title}"
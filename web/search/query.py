@@ -0,0 +1,62 @@
+# search/query.py
+from django.db.models import Q
+
+from accounts.models import user_team_id
+from docs.models import DocHeading
+
+from .backends import get_backend, highlight
+from .models import SearchEntry
+
+DEFAULT_LIMIT = 20
+SECTION_LIMIT = 8
+
+
+def visible_entries(user):
+    """Entries this user may see, as one WHERE clause (same rules as the views)."""
+    qs = SearchEntry.objects.all()
+    if user.is_authenticated and user.is_staff:
+        return qs
+
+    allowed = Q(public=True)
+    if user.is_authenticated:
+        allowed |= Q(owner=user)
+        team_id = user_team_id(user)
+        if team_id:
+            allowed |= Q(team_id=team_id)
+    return qs.filter(allowed)
+
+
+def search(user, q, kind=None, limit=DEFAULT_LIMIT):
+    """
+    Ranked hits for ``q`` visible to ``user``.
+    Returns a list of (SearchEntry, highlighted snippet HTML).
+    """
+    q = (q or "").strip()
+    if not q:
+        return []
+    entries = visible_entries(user)
+    if kind:
+        entries = entries.filter(kind=kind)
+    return [
+        (entry, highlight(snippet or ""))
+        for entry, snippet in get_backend().search(entries, q, limit)
+    ]
+
+
+def search_sections(user, q, limit=SECTION_LIMIT):
+    """
+    Doc headings whose text contains ``q``, from the DocHeading table
+    rather than the full-text entries, so a hit can link straight to the
+    section.
+    """
+    q = (q or "").strip()
+    if not q:
+        return []
+    headings = (
+        DocHeading.objects.visible_to(user)
+        .matching(q)
+        .select_related("page")
+        .only("level", "anchor", "text", "page__slug", "page__title")
+        .order_by("level", "page__title", "position")
+    )
+    return list(headings[:limit])
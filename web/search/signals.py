@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from diagrams.models import Diagram
+from docs.models import DocPage
+from policies.models import Policy
+
+from .index import KIND_BY_MODEL
+from .tasks import reindex, unindex
+
+# Indexing renders the object's HTML, so it runs as a background job.
+
+
+@receiver(post_save, sender=DocPage)
+@receiver(post_save, sender=Policy)
+@receiver(post_save, sender=Diagram)
+def queue_reindex(sender, instance, raw=False, **kwargs):
+    if raw:  # loaddata
+        return
+    label = sender._meta.label
+    reindex.enqueue(label, instance.pk, _key=f"search:{label}:{instance.pk}")
+
+
+@receiver(post_delete, sender=DocPage)
+@receiver(post_delete, sender=Policy)
+@receiver(post_delete, sender=Diagram)
+def queue_unindex(sender, instance, **kwargs):
+    unindex.enqueue(KIND_BY_MODEL[sender], instance.pk)
@@ -0,0 +1,19 @@
+# search/tasks.py
+from django.apps import apps
+
+from jobs.queue import task
+
+from .index import index_object, remove_entry
+
+
+@task
+def reindex(model_label, pk):
+    """Refresh the entry for one object (gone by now? the delete job handles it)."""
+    obj = apps.get_model(model_label)._default_manager.filter(pk=pk).first()
+    if obj is not None:
+        index_object(obj)
+
+
+@task
+def unindex(kind, object_id):
+    remove_entry(kind, object_id)
@@ -0,0 +1,140 @@
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from accounts.models import Profile, Team
+from diagrams.models import Diagram
+from docs.models import DocPage
+from policies.models import Policy
+from socdocs.testing import LOCMEM_CACHES
+
+from .backends import FTS_TABLE, MARK_END, MARK_START, BasicBackend, SqliteFtsBackend, highlight
+from .index import index_object
+from .models import SearchEntry
+from .query import search
+
+
+class BackendSearchMixin:
+    """Shared checks, run once per backend."""
+
+    backend_class = None
+
+    def setUp(self):
+        backend = self.backend_class()
+        for target in ("search.index.get_backend", "search.query.get_backend"):
+            patcher = mock.patch(target, return_value=backend)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        blue = Team.objects.create(name="Blue")
+        red = Team.objects.create(name="Red")
+        self.owner = User.objects.create_user("owner")
+        self.teammate = User.objects.create_user("teammate")
+        self.outsider = User.objects.create_user("outsider")
+        self.staff = User.objects.create_user("prof", is_staff=True)
+        Profile.objects.filter(user__in=[self.owner, self.teammate]).update(team=blue)
+        Profile.objects.filter(user=self.outsider).update(team=red)
+
+        for obj in (
+            Policy.objects.create(title="Firewall runbook", content="Close the firewall port.", owner=self.owner, team=blue),
+            Policy.objects.create(title="Firewall baseline", content="Default firewall rules.", visibility="class", approved=True),
+            Policy.objects.create(title="Firewall draft", content="Unapproved firewall ideas.", visibility="class", team=blue),
+            DocPage.objects.create(title="Firewall notes", body="Red team firewall notes.", team=red),
+            Diagram.objects.create(title="Firewall topology", notes="Where the firewall sits.", visibility="global", approved=True),
+            Policy.objects.create(title="Backups", content="Nightly tapes."),
+        ):
+            index_object(obj)
+
+    def titles(self, user, q="firewall", **kwargs):
+        return sorted(entry.title for entry, _ in search(user, q, **kwargs))
+
+    def test_visibility(self):
+        public = ["Firewall baseline", "Firewall topology"]
+        blue = sorted(public + ["Firewall draft", "Firewall runbook"])
+        self.assertEqual(self.titles(AnonymousUser()), public)
+        self.assertEqual(self.titles(self.owner), blue)
+        self.assertEqual(self.titles(self.teammate), blue)
+        self.assertEqual(self.titles(self.outsider), sorted(public + ["Firewall notes"]))
+        self.assertEqual(len(self.titles(self.staff)), 5)
+
+    def test_kind_filter_and_empty_query(self):
+        self.assertEqual(self.titles(self.staff, kind=SearchEntry.KIND_DOC), ["Firewall notes"])
+        self.assertEqual(self.titles(self.staff, q="  "), [])
+        self.assertEqual(self.titles(self.staff, q="*"), [])
+
+    def test_snippet_is_escaped_and_highlighted(self):
+        policy = Policy.objects.create(
+            title="Markup", content='Use `<script>alert("firewall")</script>` carefully.',
+            visibility="global", approved=True,
+        )
+        index_object(policy)
+        (snippet,) = [s for entry, s in search(AnonymousUser(), "alert") if entry.title == "Markup"]
+        self.assertNotIn("<script>", snippet)
+        self.assertIn("&lt;script&gt;", snippet)
+        self.assertIn("<mark>alert</mark>", snippet)
+
+    def test_reindex_replaces_old_text(self):
+        policy = Policy.objects.get(title="Backups")
+        policy.content = "Offsite firewall logs."
+        policy.save()
+        index_object(policy)
+        self.assertIn("Backups", self.titles(self.staff))
+        self.assertEqual(self.titles(self.staff, q="tapes"), [])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SqliteFtsSearchTests(BackendSearchMixin, TestCase):
+    backend_class = SqliteFtsBackend
+
+    def setUp(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite FTS5 only")
+        super().setUp()
+
+    def test_prefix_match_on_last_term(self):
+        self.assertEqual(self.titles(AnonymousUser(), q="firew"), ["Firewall baseline", "Firewall topology"])
+
+    def test_fts_syntax_is_quoted(self):
+        self.assertEqual(self.titles(self.staff, q='firewall OR "tapes'), [])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BasicSearchTests(BackendSearchMixin, TestCase):
+    backend_class = BasicBackend
+
+
+@override_settings(CACHES=LOCMEM_CACHES, JOBS_IMMEDIATE=True)
+class IndexSignalTests(TestCase):
+    def fts_rows(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT rowid FROM {FTS_TABLE}")
+            return [row[0] for row in cursor.fetchall()]
+
+    def test_save_indexes_and_delete_unindexes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            policy = Policy.objects.create(title="Incident plan", content="Call the <b>on-call</b> lead.")
+        entry = SearchEntry.objects.get(kind=SearchEntry.KIND_POLICY, object_id=policy.pk)
+        self.assertEqual((entry.title, entry.body, entry.public), ("Incident plan", "Call the on-call lead.", False))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            policy.title = "Incident response plan"
+            policy.visibility, policy.approved = "global", True
+            policy.save()
+        entry.refresh_from_db()
+        self.assertEqual((entry.title, entry.public), ("Incident response plan", True))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            policy.delete()
+        self.assertFalse(SearchEntry.objects.exists())
+        if connection.vendor == "sqlite":
+            self.assertNotIn(entry.pk, self.fts_rows())
+
+
+class HighlightTests(TestCase):
+    def test_highlight_escapes_before_marking(self):
+        self.assertEqual(
+            highlight(f"a <b> {MARK_START}c & d{MARK_END}"),
+            "a &lt;b&gt; <mark>c &amp; d</mark>",
+        )
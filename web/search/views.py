@@ -0,0 +1,26 @@
+from django.shortcuts import render
+
+from .models import SearchEntry
+from .query import search, search_sections
+
+
+def search_view(request):
+    q = request.GET.get("q", "").strip()
+    kind = request.GET.get("kind", "")
+    if kind not in dict(SearchEntry.KIND_CHOICES):
+        kind = ""
+
+    results = search(request.user, q, kind=kind or None) if q else []
+    sections = search_sections(request.user, q) if q and kind in ("", SearchEntry.KIND_DOC) else []
+
+    return render(
+        request,
+        "search/results.html",
+        {
+            "q": q,
+            "kind": kind,
+            "kinds": SearchEntry.KIND_CHOICES,
+            "results": results,
+            "sections": sections,
+        },
+    )
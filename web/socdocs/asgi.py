@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'socdocs.settings')
+# Requests get a statement timeout unless the environment sets one;
+# management commands (migrate, run_jobs, rebuilds) default to none.
+os.environ.setdefault('DB_STATEMENT_TIMEOUT', '30000')
 
 application = get_asgi_application()
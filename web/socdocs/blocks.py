@@ -0,0 +1,197 @@
+# socdocs/blocks.py
+"""
+Splitting a markdown document into chunks that render independently.
+
+Python-Markdown's output for a whole document equals the outputs of its
+top-level blocks joined with "\n", as long as no construct reaches
+across a block boundary. Those that do, and how they are handled:
+  - lists, block quotes and indented code merge with a following block
+    of the same kind, and indented lines continue the previous block:
+    a chunk never starts on a line that is indented, a quote (">") or a
+    list item
+  - fenced code (fenced_code extension) may contain blank lines: no
+    boundary inside a fence, found with the extension's own regex
+  - reference-style link definitions apply to the whole document: they
+    are collected and rendered along with every chunk
+  - raw block-level HTML is stashed by a whole-document pass and can
+    span blank lines: documents containing any are not split at all
+Extensions that keep document-wide state (toc ids, footnotes, abbr, ...)
+are not in SAFE_EXTENSIONS, and with any of those enabled nothing is split.
+
+Blocks are grouped into chunks of a few KB. Where a chunk ends depends
+on the content of its last block (not on offsets from the start of the
+document), so an edit changes only the chunk it lands in and, at worst,
+the one after it.
+"""
+import re
+import zlib
+
+from markdown import Markdown
+from markdown.blockprocessors import ReferenceProcessor
+from markdown.extensions.fenced_code import FencedBlockPreprocessor
+
+SAFE_EXTENSIONS = {
+    "fenced_code",
+    "tables",
+    "nl2br",
+    "sane_lists",
+    "codehilite",
+}
+
+# a chunk closes after a block whose checksum is 0 mod CHUNK_SPREAD, once
+# it has CHUNK_MIN_CHARS, and always once it reaches CHUNK_MAX_CHARS
+CHUNK_MIN_CHARS = 4096
+CHUNK_MAX_CHARS = 16384
+CHUNK_SPREAD = 4
+
+_BLANK_RE = re.compile(r"^[ \t]*$")
+_CONTINUATION_RE = re.compile(r"^(?:[ \t]|>|[*+-][ \t]|\d+\.[ \t])")
+_SETEXT_UNDERLINE_RE = re.compile(r"[=-]+[ ]*(?:\n|$)")
+_REFERENCE_ANYWHERE_RE = re.compile(r"\[[^\[\]]*\]:")
+_BLOCK_TAGS = "|".join(sorted(Markdown().block_level_elements, key=len, reverse=True))
+_RAW_HTML_RE = re.compile(
+    rf"^[ ]{{0,3}}<(?:[!?]|/?(?:{_BLOCK_TAGS})(?![\w-]))", re.MULTILINE | re.IGNORECASE
+)
+
+
+def _extension_name(ext):
+    return ext.rsplit(".", 1)[-1].split(":", 1)[0]
+
+
+def extensions_are_safe(extensions):
+    """True if no extension in the list carries state across blocks."""
+    return all(
+        isinstance(ext, str) and _extension_name(ext) in SAFE_EXTENSIONS for ext in extensions
+    )
+
+
+def normalize(text):
+    """Line endings as Python-Markdown sees them."""
+    return (text or "").replace("\r\n", "\n").replace("\r", "\n")
+
+
+def fenced_lines(text, extensions=()):
+    """
+    Indexes of the lines of ``text`` inside fenced code blocks (fences
+    included), as the fenced_code extension finds them; empty without it.
+    """
+    if "fenced_code" not in {_extension_name(ext) for ext in extensions}:
+        return set()
+    # the preprocessor sees tabs expanded and whitespace-only lines emptied;
+    # neither changes the line count
+    text = re.sub(r"(?<=\n) +\n", "\n", text.expandtabs(4))
+    lines = set()
+    for match in FencedBlockPreprocessor.FENCED_BLOCK_RE.finditer(text):
+        first = text.count("\n", 0, match.start())
+        last = text.count("\n", 0, match.end())
+        lines.update(range(first, last + 1))
+    return lines
+
+
+def split_blocks(text, fenced=frozenset()):
+    """
+    Top-level blocks of ``text``: runs of lines separated by blank lines,
+    merged wherever the second could attach to the first. ``fenced`` is
+    the set of line indexes inside fenced code. Each block keeps the blank
+    lines that follow it, so "\n".join(blocks) is the document again
+    (less trailing blank lines).
+    """
+    blocks, current = [], []
+    pending_blank = False
+    for number, line in enumerate(normalize(text).split("\n")):
+        inside_fence = number in fenced
+        if not inside_fence and _BLANK_RE.match(line):
+            pending_blank = bool(current)
+            if pending_blank:
+                current.append("")
+            continue
+        if pending_blank and not inside_fence and not _CONTINUATION_RE.match(line):
+            blocks.append("\n".join(current))
+            current = []
+        pending_blank = False
+        current.append(line)
+    while current and current[-1] == "":
+        current.pop()
+    if current:
+        blocks.append("\n".join(current))
+    return blocks
+
+
+def reference_definitions(text, fenced=frozenset()):
+    """
+    Every reference-style link definition in ``text``, in document order,
+    as one string that can be appended to any chunk. Only definitions at
+    the start of a block are taken; None if anything else looks like one
+    (mid-paragraph, in a table, a quote or indented code), since the
+    parser may not see those as definitions.
+    """
+    lines = normalize(text).split("\n")
+    text = "\n".join("" if i in fenced else line for i, line in enumerate(lines))
+    candidates = len(_REFERENCE_ANYWHERE_RE.findall(text))
+    if not candidates:
+        return ""
+    found = []
+    for block in re.split(r"\n[ \t]*\n", text):
+        match = ReferenceProcessor.RE.match(block)
+        while match:
+            if _SETEXT_UNDERLINE_RE.match(block, match.end() + 1):
+                return None  # "[id]: url" underlined is a heading
+            found.append(match.group(0))
+            block = block[match.end():].lstrip("\n")
+            match = ReferenceProcessor.RE.match(block)
+    if len(found) != candidates:
+        return None
+    return "\n\n".join(found)
+
+
+def _glue_definitions(blocks):
+    """
+    Join blocks that start with a link definition to the block before:
+    the parser drops the definition, and what follows it (say, indented
+    list items) may then continue the previous block.
+    """
+    glued = []
+    for block in blocks:
+        if glued and ReferenceProcessor.RE.match(block):
+            glued[-1] = f"{glued[-1]}\n{block}"
+        else:
+            glued.append(block)
+    return glued
+
+
+def has_raw_html(text):
+    return bool(_RAW_HTML_RE.search(text))
+
+
+def _closes_chunk(block):
+    return zlib.crc32(block.encode("utf-8")) % CHUNK_SPREAD == 0
+
+
+def split_document(text, extensions=()):
+    """
+    (chunks, references) for ``text`` rendered with ``extensions``: chunks
+    that render independently once ``references`` is appended to each. A
+    document that can't be split safely comes back as a single chunk.
+    """
+    text = normalize(text)
+    first_line = text.split("\n", 1)[0]
+    if has_raw_html(text) or (first_line and _BLANK_RE.match(first_line)):
+        # (Python-Markdown keeps a whitespace-only first line as text)
+        return [text], ""
+    fenced = fenced_lines(text, extensions)
+    references = reference_definitions(text, fenced)
+    if references is None:
+        return [text], ""
+    blocks = split_blocks(text, fenced)
+    if references:
+        blocks = _glue_definitions(blocks)
+    chunks, current, size = [], [], 0
+    for block in blocks:
+        current.append(block)
+        size += len(block) + 1
+        if size >= CHUNK_MAX_CHARS or (size >= CHUNK_MIN_CHARS and _closes_chunk(block)):
+            chunks.append("\n".join(current).rstrip("\n"))
+            current, size = [], 0
+    if current:
+        chunks.append("\n".join(current).rstrip("\n"))
+    return chunks, references
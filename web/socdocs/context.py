@@ -1,17 +1,21 @@
 # socdocs/context.py
-from . import settings as project_settings  # if you need; or just import directly
-from accounts.models import Profile, ClassConfig
+from accounts.badges import get_team_badge
+from accounts.models import ClassConfig
 
 
 def team_badge(request):
+    # Both lookups are cached, so the navbar costs no queries once warm.
     team = None
+    avatar_url = ""
     if request.user.is_authenticated:
-        prof, _ = Profile.objects.get_or_create(user=request.user)
-        team = prof.team
+        badge = get_team_badge(request.user)
+        team = badge["team"]
+        avatar_url = badge["avatar_url"]
 
     config = ClassConfig.get_solo()
 
     return {
         "CURRENT_TEAM": team,
+        "CURRENT_AVATAR_URL": avatar_url,
         "CLASS_CONFIG": config,
     }
@@ -0,0 +1,136 @@
+# socdocs/instrumentation.py
+"""
+Opt-in per-request performance instrumentation.
+
+Enable with INSTRUMENTATION_ENABLED=True. Each request then records:
+  - SQL query count and time (all database aliases)
+  - template render time (outermost Template.render calls only)
+  - markdown render time (reported by socdocs.rendering)
+and reports them as a Server-Timing header plus one JSON log line on the
+"socdocs.perf" logger. Requests over INSTRUMENTATION_SLOW_MS or
+INSTRUMENTATION_MAX_QUERIES are logged at WARNING with a "flags" list.
+"""
+import contextvars
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import Template as DjangoBackendTemplate
+
+logger = logging.getLogger("socdocs.perf")
+
+_current = contextvars.ContextVar("socdocs_request_metrics", default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.template_depth = 0
+        self.markdown_ms = 0.0
+        self.markdown_calls = 0
+
+
+def record_markdown(seconds):
+    """Called by socdocs.rendering after each markdown render."""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.markdown_ms += seconds * 1000
+        metrics.markdown_calls += 1
+
+
+def _install_template_timer():
+    """Wrap the Django template backend once so renders are timed."""
+    if getattr(DjangoBackendTemplate.render, "_socdocs_timed", False):
+        return
+    original = DjangoBackendTemplate.render
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return original(self, context, request)
+        # forms/widgets render nested templates; only time the outermost one
+        metrics.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            metrics.template_depth -= 1
+            if metrics.template_depth == 0:
+                metrics.template_ms += (time.perf_counter() - start) * 1000
+
+    render._socdocs_timed = True
+    DjangoBackendTemplate.render = render
+
+
+class InstrumentationMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "INSTRUMENTATION_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, "INSTRUMENTATION_SLOW_MS", 500)
+        self.max_queries = getattr(settings, "INSTRUMENTATION_MAX_QUERIES", 50)
+        self.send_header = getattr(settings, "INSTRUMENTATION_SERVER_TIMING", True)
+        _install_template_timer()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+
+        def timed_execute(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                metrics.queries += 1
+                metrics.db_ms += (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(timed_execute))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        if self.send_header:
+            response["Server-Timing"] = ", ".join([
+                f'db;dur={metrics.db_ms:.1f};desc="{metrics.queries} queries"',
+                f"tpl;dur={metrics.template_ms:.1f}",
+                f'md;dur={metrics.markdown_ms:.1f};desc="{metrics.markdown_calls} renders"',
+                f"total;dur={total_ms:.1f}",
+            ])
+
+        self.log(request, response, metrics, total_ms)
+        return response
+
+    def log(self, request, response, metrics, total_ms):
+        flags = []
+        if total_ms >= self.slow_ms:
+            flags.append("slow")
+        if metrics.queries >= self.max_queries:
+            flags.append("query_heavy")
+
+        match = getattr(request, "resolver_match", None)
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "view": match.view_name if match else None,
+            "status": response.status_code,
+            "total_ms": round(total_ms, 1),
+            "queries": metrics.queries,
+            "db_ms": round(metrics.db_ms, 1),
+            "template_ms": round(metrics.template_ms, 1),
+            "markdown_ms": round(metrics.markdown_ms, 1),
+            "markdown_calls": metrics.markdown_calls,
+            "flags": flags,
+        }
+        level = logging.WARNING if flags else logging.INFO
+        logger.log(level, json.dumps(record), extra={"perf": record})
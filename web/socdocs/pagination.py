@@ -0,0 +1,129 @@
+# socdocs/pagination.py
+"""
+Keyset (cursor) pagination for the list pages.
+
+Instead of OFFSET, each page remembers the sort key of its first and last
+row and the next query asks for rows strictly after (or before) it, so
+page 200 costs the same as page 1 as long as the sort keys are indexed.
+
+``keys`` are field lookups the queryset is ordered by, ascending, ending
+in a unique column (usually ``id``) so ties never skip rows. Values are
+read back off each row by following ``__`` through attributes, so related
+keys need select_related (or an annotation).
+
+Cursors come from the query string, so a garbled one (bad base64 or
+JSON, the wrong number of values, values of the wrong type for their
+field) is treated as no cursor: the first page.
+"""
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+NEXT = "n"
+PREV = "p"
+
+
+def encode_cursor(direction, values):
+    raw = json.dumps([direction, list(values)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, n_keys):
+    """(direction, values) or None for a missing/garbled cursor."""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        return None
+    if direction not in (NEXT, PREV) or not isinstance(values, list) or len(values) != n_keys:
+        return None
+    if not all(isinstance(v, (str, int, float)) and not isinstance(v, bool) for v in values):
+        return None
+    return direction, values
+
+
+def key_values(obj, keys):
+    values = []
+    for key in keys:
+        value = obj
+        for part in key.split("__"):
+            value = getattr(value, part) if value is not None else None
+        values.append(value)
+    return values
+
+
+def seek(keys, values, before=False):
+    """
+    Q for rows after (or before) ``values`` in ``keys`` order:
+    (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z) ...
+    """
+    op = "lt" if before else "gt"
+    q = Q()
+    for i, key in enumerate(keys):
+        term = Q(**{f"{key}__{op}": values[i]})
+        for prev_key, prev_value in zip(keys[:i], values[:i]):
+            term &= Q(**{prev_key: prev_value})
+        q |= term
+    return q
+
+
+class KeysetPage:
+    def __init__(self, items, keys, has_next, has_prev):
+        self.items = items
+        self.has_next = bool(items) and has_next
+        self.has_prev = bool(items) and has_prev
+        self.next_cursor = encode_cursor(NEXT, key_values(items[-1], keys)) if self.has_next else None
+        self.prev_cursor = encode_cursor(PREV, key_values(items[0], keys)) if self.has_prev else None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_prev
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+
+def keyset_page(qs, keys, cursor=None, page_size=None):
+    """One page of ``qs`` ordered by ``keys``, starting from ``cursor``."""
+    page_size = page_size or getattr(settings, "LIST_PAGE_SIZE", 50)
+    state = decode_cursor(cursor, len(keys))
+
+    if state is None:
+        rows = list(qs.order_by(*keys)[:page_size + 1])
+        return KeysetPage(rows[:page_size], keys, len(rows) > page_size, False)
+
+    direction, values = state
+    try:
+        if direction == NEXT:
+            rows = list(qs.filter(seek(keys, values)).order_by(*keys)[:page_size + 1])
+        else:
+            # walk backwards from the cursor, then flip back into display order
+            descending = [f"-{k}" for k in keys]
+            rows = list(qs.filter(seek(keys, values, before=True)).order_by(*descending)[:page_size + 1])
+    except (ValueError, TypeError, ValidationError):
+        # a value the key's field can't take, e.g. "x" for an id
+        return keyset_page(qs, keys, None, page_size)
+
+    if direction == NEXT:
+        return KeysetPage(rows[:page_size], keys, len(rows) > page_size, True)
+    if not rows:
+        return keyset_page(qs, keys, None, page_size)
+    items = rows[:page_size][::-1]
+    return KeysetPage(items, keys, True, len(rows) > page_size)
+
+
+def paginate(request, qs, keys, page_size=None):
+    """keyset_page() driven by ``?cursor=`` (see templates/_pager.html)."""
+    return keyset_page(qs, keys, request.GET.get("cursor"), page_size)
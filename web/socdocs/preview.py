@@ -0,0 +1,103 @@
+# socdocs/preview.py
+"""
+Live markdown preview for the editors, mounted over markdownx's own
+/markdownx/markdownify/ so the markdownx widget uses it too.
+
+Three things keep a room full of people typing from turning into a
+stream of full renders:
+  - the rendered HTML is cached by a hash of the content (in the
+    markdown_fragments cache, away from saved renders), so identical
+    bodies (undo, toggling the preview, a shared template) are renders
+    already done
+  - a miss goes through render_incremental(), so a large body only
+    re-renders the chunks the edit touched
+  - the client (static/js/md-preview.js) debounces typing and sends an
+    ``editor`` id and a rising ``seq`` with each request. A request
+    whose seq is older than the newest one seen for that editor is
+    answered 409 without rendering; the client has already moved on.
+Requests without editor/seq (markdownx's widget) skip the last check.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.views.decorators.http import require_POST
+
+from .rendering import get_fragment_cache, markdown_config_hash, render_incremental
+
+SEQUENCE_TIMEOUT = 60 * 60
+
+
+def preview_cache_key(content):
+    digest = hashlib.sha1(content.encode("utf-8")).hexdigest()
+    return f"mdp:{markdown_config_hash()}:{digest}"
+
+
+def _sequence_key(request, editor):
+    return f"mdp-seq:{request.user.pk}:{editor[:64]}"
+
+
+def is_superseded(request, editor, seq):
+    """True if a newer request from this editor has already arrived."""
+    return seq < (cache.get(_sequence_key(request, editor)) or 0)
+
+
+def claim_sequence(request, editor, seq):
+    """
+    Record ``seq`` as this editor's newest request. Returns False if a
+    newer one got there first.
+    """
+    key = _sequence_key(request, editor)
+    newest = cache.get(key) or 0
+    if seq < newest:
+        return False
+    if seq > newest:
+        cache.set(key, seq, SEQUENCE_TIMEOUT)
+    return True
+
+
+def render_preview(content):
+    """(html, hit) for ``content``, from the preview cache when possible."""
+    md_cache = get_fragment_cache()
+    key = preview_cache_key(content)
+    html = md_cache.get(key)
+    if html is not None:
+        return html, True
+    html = render_incremental(content)
+    md_cache.set(key, html, settings.MARKDOWN_PREVIEW_CACHE_SECONDS)
+    return html, False
+
+
+def _superseded():
+    response = HttpResponse(status=409)
+    response["X-Preview-Superseded"] = "1"
+    return response
+
+
+@require_POST
+def markdown_preview(request):
+    if not request.user.is_authenticated:
+        return HttpResponse(status=403)
+    content = request.POST.get("content", "")
+    if len(content) > settings.MARKDOWN_PREVIEW_MAX_CHARS:
+        return HttpResponse("Too long to preview.", status=413)
+
+    editor = request.POST.get("editor", "")
+    try:
+        seq = int(request.POST.get("seq", ""))
+    except ValueError:
+        seq = None
+    tracked = bool(editor) and seq is not None
+    if tracked and not claim_sequence(request, editor, seq):
+        return _superseded()
+
+    html, hit = render_preview(content)
+    if tracked and not hit and is_superseded(request, editor, seq):
+        # rendered (and cached) for nothing: a newer body is on its way
+        return _superseded()
+
+    response = HttpResponse(html)
+    response["Cache-Control"] = "private, no-store"
+    response["X-Preview-Cache"] = "hit" if hit else "miss"
+    return response
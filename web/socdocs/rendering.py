@@ -0,0 +1,211 @@
+# socdocs/rendering.py
+"""
+Shared markdown rendering helpers.
+
+Everything that turns stored markdown into HTML should go through here so
+the cache keys stay in sync with the markdownx extension settings.
+
+Saved documents are rendered with render_incremental(): large bodies are
+split into chunks (see socdocs.blocks) whose HTML is cached by content,
+so after a small edit only the chunks that changed are rendered again.
+The result is the same string render_markdown() returns.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from html import unescape
+
+import markdown
+from django.core.cache import caches
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+from markdownx.settings import (
+    MARKDOWNX_MARKDOWN_EXTENSIONS,
+    MARKDOWNX_MARKDOWN_EXTENSION_CONFIGS,
+)
+from markdownx.utils import markdownify
+
+from .blocks import extensions_are_safe, split_document
+from .instrumentation import record_markdown
+
+CACHE_ALIAS = "markdown"
+# chunk and preview HTML: written while people type, evicted freely
+FRAGMENT_CACHE_ALIAS = "markdown_fragments"
+EXCERPT_LENGTH = 300
+# below this a single render is cheaper than the chunk cache round trip
+INCREMENTAL_MIN_CHARS = 8 * 1024
+# chunk HTML also kept in each process, in front of the shared cache
+CHUNK_MEMO_ENTRIES = 1024
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def get_fragment_cache():
+    return caches[FRAGMENT_CACHE_ALIAS]
+
+
+@lru_cache(maxsize=1)
+def markdown_config_hash():
+    """
+    Short hash of everything that changes markdown output: the markdown
+    library version plus the markdownx extension list/configs.
+    """
+    config = {
+        "version": markdown.__version__,
+        "extensions": [str(ext) for ext in MARKDOWNX_MARKDOWN_EXTENSIONS],
+        "configs": MARKDOWNX_MARKDOWN_EXTENSION_CONFIGS,
+    }
+    raw = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def render_markdown(text):
+    """Render markdown exactly like markdownx does."""
+    start = time.perf_counter()
+    html = markdownify(text or "")
+    record_markdown(time.perf_counter() - start)
+    return html
+
+
+def chunk_cache_key(chunk, references=""):
+    """Cache key for one chunk's HTML, by content."""
+    digest = hashlib.sha1(references.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(chunk.encode("utf-8"))
+    return f"mdc:{markdown_config_hash()}:{digest.hexdigest()}"
+
+
+class ChunkMemo:
+    """
+    Small per-process LRU of chunk HTML. Keys are content hashes, so an
+    entry never goes stale; it just saves the shared cache's file reads
+    for the chunks of documents being edited right now.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_many(self, keys):
+        found = {}
+        with self.lock:
+            for key in keys:
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    found[key] = self.entries[key]
+        return found
+
+    def set_many(self, mapping):
+        with self.lock:
+            self.entries.update(mapping)
+            for key in mapping:
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+chunk_memo = ChunkMemo(CHUNK_MEMO_ENTRIES)
+
+
+def render_chunks(chunks, references=""):
+    """
+    HTML for a document split by socdocs.blocks.split_document(), reading
+    unchanged chunks from this process' memo or the fragment cache.
+    Returns (html, number rendered).
+    """
+    cache = get_fragment_cache()
+    keys = [chunk_cache_key(chunk, references) for chunk in chunks]
+    found = chunk_memo.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        shared = cache.get_many(missing)
+        chunk_memo.set_many(shared)
+        found.update(shared)
+    fresh = {}
+    for key, chunk in zip(keys, chunks):
+        if key not in found and key not in fresh:
+            source = f"{chunk}\n\n{references}" if references else chunk
+            fresh[key] = markdownify(source)
+    if fresh:
+        cache.set_many(fresh)
+        chunk_memo.set_many(fresh)
+        found.update(fresh)
+    html = "\n".join(found[key] for key in keys if found[key])
+    return html, len(fresh)
+
+
+def render_incremental(text):
+    """
+    Render markdown exactly like render_markdown(), re-rendering only the
+    parts of a large document that aren't already in the chunk cache.
+    """
+    text = text or ""
+    if len(text) < INCREMENTAL_MIN_CHARS or not extensions_are_safe(
+        MARKDOWNX_MARKDOWN_EXTENSIONS
+    ):
+        return render_markdown(text)
+    start = time.perf_counter()
+    chunks, references = split_document(text, MARKDOWNX_MARKDOWN_EXTENSIONS)
+    if len(chunks) == 1:
+        html = markdownify(text)
+    else:
+        html, _ = render_chunks(chunks, references)
+    record_markdown(time.perf_counter() - start)
+    return html
+
+
+def object_cache_key(kind, pk, updated_at):
+    """Cache key for one object's rendered HTML at a given revision."""
+    stamp = updated_at.timestamp() if updated_at else 0
+    return f"md:{kind}:{pk}:{stamp:.6f}:{markdown_config_hash()}"
+
+
+def cached_render(kind, pk, updated_at, text, postprocess=None):
+    """
+    Return rendered HTML for an object, rendering and storing it on a miss.
+    The key includes updated_at, so a saved object never hits stale HTML.
+    ``postprocess`` (html -> html) runs on a miss before the HTML is stored.
+    """
+    cache = get_cache()
+    key = object_cache_key(kind, pk, updated_at)
+    html = cache.get(key)
+    if html is None:
+        html = render_incremental(text)
+        if postprocess is not None:
+            html = postprocess(html)
+        cache.set(key, html)
+    return html
+
+
+def store_render(kind, pk, updated_at, text, previous_updated_at=None, html=None):
+    """
+    Render and store HTML for a freshly saved object, dropping the entry
+    for the revision it replaces. Pass ``html`` if the caller has already
+    rendered (and post-processed) ``text``.
+    """
+    cache = get_cache()
+    if previous_updated_at is not None:
+        cache.delete(object_cache_key(kind, pk, previous_updated_at))
+    if html is None:
+        html = render_incremental(text)
+    cache.set(object_cache_key(kind, pk, updated_at), html)
+    return html
+
+
+def make_excerpt(html, words=40):
+    """
+    Plain-text teaser built from already-rendered HTML. Entities are
+    decoded so the templates' autoescape shows ``A & B``, not ``A &amp; B``.
+    """
+    text = " ".join(unescape(strip_tags(html)).split())
+    return Truncator(text).words(words)[:EXCERPT_LENGTH]
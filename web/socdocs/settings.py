@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from urllib.parse import urlparse
+from urllib.parse import parse_qsl, urlparse
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -49,6 +49,10 @@ INSTALLED_APPS = [
     "grading",
     "accounts.apps.AccountsConfig",
     "moderation",
+    "search",
+    "mediastore",
+    "jobs",
+    "benchmarks",
 ]
 
 MIDDLEWARE = [
@@ -61,10 +65,15 @@ MIDDLEWARE = [
     # must come before our gate so request.user exists
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "allauth.account.middleware.AccountMiddleware",
+    # request.principal: user/team/permission lookups, once per request
+    "accounts.principal.PrincipalMiddleware",
 
     # now gate
     "accounts.middleware.ClassCodeGateMiddleware",
 
+    # opt-in query/render timing (INSTRUMENTATION_ENABLED), see socdocs/instrumentation.py
+    "socdocs.instrumentation.InstrumentationMiddleware",
+
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -93,9 +102,41 @@ TEMPLATES = [
 WSGI_APPLICATION = "socdocs.wsgi.application"
 
 # DATABASE via DATABASE_URL
+#
+# Connection management (PostgreSQL):
+#   DB_CONN_MAX_AGE       seconds to keep a connection between requests
+#                         (0 = close after every request, "None" = forever)
+#   DB_CONN_HEALTH_CHECKS ping a reused connection before the request uses it
+#   DB_POOL               use psycopg 3's connection pool instead; pooled
+#                         connections are returned after each request, so
+#                         DB_CONN_MAX_AGE is forced to 0
+#   DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE / DB_POOL_TIMEOUT (seconds to wait)
+#   DB_CONNECT_TIMEOUT    seconds to wait for a new connection
+#   DB_STATEMENT_TIMEOUT  milliseconds before a query is cancelled (0 = off,
+#                         the default). socdocs/wsgi.py and asgi.py default
+#                         it to 30000 for the web process only, so migrate,
+#                         run_jobs and the rebuild commands are never cut off.
+# `manage.py benchmark_connections` compares the modes under load.
 db_url = os.getenv("DATABASE_URL")
 if db_url:
     p = urlparse(db_url)
+    db_options = dict(parse_qsl(p.query))  # e.g. ?sslmode=require
+    db_options.setdefault("connect_timeout", int(os.getenv("DB_CONNECT_TIMEOUT", "5")))
+    statement_timeout = int(os.getenv("DB_STATEMENT_TIMEOUT", "0"))
+    if statement_timeout:
+        # keep any ?options=... from DATABASE_URL
+        db_options["options"] = " ".join(
+            filter(None, [db_options.get("options", ""), f"-c statement_timeout={statement_timeout}"])
+        )
+    conn_max_age = os.getenv("DB_CONN_MAX_AGE", "60")
+    conn_max_age = None if conn_max_age == "None" else int(conn_max_age)
+    if os.getenv("DB_POOL", "False") == "True":
+        db_options["pool"] = {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        }
+        conn_max_age = 0  # Django refuses persistent connections with a pool
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.postgresql",
@@ -104,6 +145,9 @@ if db_url:
             "PASSWORD": p.password,
             "HOST": p.hostname,
             "PORT": p.port or "5432",
+            "CONN_MAX_AGE": conn_max_age,
+            "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", "True") == "True",
+            "OPTIONS": db_options,
         }
     }
 else:
@@ -122,8 +166,55 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Uploads are served by mediastore.views.serve_media after a permission
+# check. MEDIA_SERVE_MODE decides who sends the bytes: "django"
+# (FileResponse, Range support), "nginx" (X-Accel-Redirect to an internal
+# location at MEDIA_ACCEL_PREFIX aliased to MEDIA_ROOT) or "sendfile"
+# (X-Sendfile). Files no row references are only public under
+# MEDIA_PUBLIC_PREFIXES (markdownx's image uploads).
+MEDIA_SERVE_MODE = os.getenv("MEDIA_SERVE_MODE", "django")
+MEDIA_ACCEL_PREFIX = os.getenv("MEDIA_ACCEL_PREFIX", "/protected-media/")
+MEDIA_PUBLIC_PREFIXES = ("markdownx/",)
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Caches. All are file-backed so every gunicorn worker sees the same
+# entries (and the same invalidations). They survive restarts only if
+# CACHE_DIR does: docker-compose.yml mounts a named volume there, shared
+# by the web and worker containers.
+# Once a cache passes MAX_ENTRIES, Django deletes a third of its entries
+# at random, so churny data gets its own alias.
+CACHE_DIR = Path(os.getenv("CACHE_DIR", str(BASE_DIR / ".cache")))
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": str(CACHE_DIR / "default"),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", "10000")),
+        },
+    },
+    # Rendered markdown, see socdocs/rendering.py
+    "markdown": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("MARKDOWN_CACHE_DIR", str(CACHE_DIR / "markdown")),
+        "TIMEOUT": None,
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("MARKDOWN_CACHE_MAX_ENTRIES", "5000")),
+        },
+    },
+    # Chunk and editor-preview HTML (socdocs/rendering.py, preview.py):
+    # content-addressed and written on every edit, kept apart so typing
+    # never evicts the saved renders above.
+    "markdown_fragments": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("MARKDOWN_FRAGMENT_CACHE_DIR", str(CACHE_DIR / "markdown_fragments")),
+        "TIMEOUT": int(os.getenv("MARKDOWN_FRAGMENT_CACHE_SECONDS", str(60 * 60 * 24 * 7))),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("MARKDOWN_FRAGMENT_CACHE_MAX_ENTRIES", "10000")),
+        },
+    },
+}
+
 AUTHENTICATION_BACKENDS = [
     "django.contrib.auth.backends.ModelBackend",    # keep Django auth
     "allauth.account.auth_backends.AuthenticationBackend",  # allauth
@@ -152,4 +243,42 @@ SOCIALACCOUNT_FORMS = {
 }
 ACCOUNT_SESSION_REMEMBER = True    # nicer “stay logged in” behavior
 
+# Per-request instrumentation (Server-Timing header + "socdocs.perf" log)
+INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "False") == "True"
+INSTRUMENTATION_SLOW_MS = float(os.getenv("INSTRUMENTATION_SLOW_MS", "500"))
+INSTRUMENTATION_MAX_QUERIES = int(os.getenv("INSTRUMENTATION_MAX_QUERIES", "50"))
+INSTRUMENTATION_SERVER_TIMING = os.getenv("INSTRUMENTATION_SERVER_TIMING", "True") == "True"
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "socdocs.perf": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
+
+# Editor live preview (socdocs/preview.py): rendered previews are kept by
+# content hash for MARKDOWN_PREVIEW_CACHE_SECONDS; longer bodies get a 413.
+MARKDOWN_PREVIEW_CACHE_SECONDS = int(os.getenv("MARKDOWN_PREVIEW_CACHE_SECONDS", "900"))
+MARKDOWN_PREVIEW_MAX_CHARS = int(os.getenv("MARKDOWN_PREVIEW_MAX_CHARS", "1000000"))
+
+# Cache-Control max-age for published content served to anonymous users
+PUBLIC_CONTENT_MAX_AGE = int(os.getenv("PUBLIC_CONTENT_MAX_AGE", "300"))
+
+# Rows per page on the keyset-paginated list pages
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "50"))
+
+# Text search configuration used for the PostgreSQL search index
+SEARCH_CONFIG = os.getenv("SEARCH_CONFIG", "english")
+
+# Background jobs (jobs app, run by `manage.py run_jobs`). With
+# JOBS_IMMEDIATE the job runs in-process right after commit, no worker needed.
+JOBS_IMMEDIATE = os.getenv("JOBS_IMMEDIATE", str(DEBUG)) == "True"
+JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "3"))
+JOBS_RETRY_DELAY = int(os.getenv("JOBS_RETRY_DELAY", "30"))  # seconds, doubles per attempt
+JOBS_LEASE_SECONDS = int(os.getenv("JOBS_LEASE_SECONDS", "600"))  # then a running job counts as crashed
+
 FOSSFLOW_URL = os.environ.get("FOSSFLOW_URL", "http://fossflow")
\ No newline at end of file
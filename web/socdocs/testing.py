@@ -0,0 +1,9 @@
+# socdocs/testing.py
+"""
+Shared test settings. Tests run against in-memory caches, so nothing is
+read from or left behind in the file caches under CACHE_DIR.
+"""
+LOCMEM_CACHES = {
+    alias: {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": alias}
+    for alias in ("default", "markdown", "markdown_fragments")
+}
@@ -0,0 +1,168 @@
+import base64
+import json
+import os
+import re
+import runpy
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from docs.models import DocPage
+
+from .pagination import NEXT, encode_cursor, keyset_page
+from .testing import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES, INSTRUMENTATION_ENABLED=True, INSTRUMENTATION_SLOW_MS=60_000)
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        page = DocPage.objects.create(title="Runbook", body="## Restart\n\nSteps.", visibility="class")
+        self.url = reverse("docs:detail", args=[page.slug])
+
+    def timings(self, response):
+        return {
+            name: (float(dur), desc)
+            for name, dur, desc in re.findall(
+                r'(\w+);dur=([\d.]+)(?:;desc="([^"]*)")?', response["Server-Timing"]
+            )
+        }
+
+    def test_server_timing_header_and_log_line(self):
+        caches["markdown"].clear()  # force a render
+        with self.assertLogs("socdocs.perf", "INFO") as logs:
+            response = self.client.get(self.url)
+        timings = self.timings(response)
+        self.assertEqual(set(timings), {"db", "tpl", "md", "total"})
+        self.assertEqual(timings["md"][1], "1 renders")
+        self.assertGreater(timings["tpl"][0], 0)
+
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual((record["view"], record["status"], record["flags"]), ("docs:detail", 200, []))
+        self.assertEqual(timings["db"][1], f"{record['queries']} queries")
+        self.assertGreater(record["queries"], 0)
+
+        # the rendered HTML is cached now
+        with self.assertLogs("socdocs.perf", "INFO"):
+            response = self.client.get(self.url)
+        self.assertEqual(self.timings(response)["md"][1], "0 renders")
+
+    @override_settings(INSTRUMENTATION_MAX_QUERIES=1, INSTRUMENTATION_SERVER_TIMING=False)
+    def test_heavy_requests_are_flagged_without_header(self):
+        with self.assertLogs("socdocs.perf", "WARNING") as logs:
+            response = self.client.get(self.url)
+        self.assertFalse(response.has_header("Server-Timing"))
+        self.assertIn("query_heavy", json.loads(logs.records[-1].getMessage())["flags"])
+
+    @override_settings(INSTRUMENTATION_ENABLED=False)
+    def test_disabled_by_default(self):
+        self.assertFalse(self.client.get(self.url).has_header("Server-Timing"))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class KeysetPaginationTests(TestCase):
+    KEYS = ("title", "id")
+
+    def setUp(self):
+        # ties on title, so the id tie-breaker decides the order
+        for n, title in enumerate(["Beta", "Alpha", "Beta", "Alpha", "Gamma", "Beta", "Alpha", "Delta"]):
+            DocPage.objects.create(title=title, slug=f"doc-{n}", body="x", visibility="class")
+        self.qs = DocPage.objects.defer("body", "toc")
+        self.expected = list(self.qs.order_by(*self.KEYS).values_list("pk", flat=True))
+
+    def pks(self, page):
+        return [p.pk for p in page]
+
+    def test_forward_then_back(self):
+        pages = [keyset_page(self.qs, self.KEYS, None, 3)]
+        while pages[-1].has_next:
+            pages.append(keyset_page(self.qs, self.KEYS, pages[-1].next_cursor, 3))
+        self.assertEqual([len(p) for p in pages], [3, 3, 2])
+        self.assertEqual([pk for p in pages for pk in self.pks(p)], self.expected)
+        self.assertFalse(pages[0].has_prev)
+
+        back = keyset_page(self.qs, self.KEYS, pages[2].prev_cursor, 3)
+        self.assertEqual(self.pks(back), self.pks(pages[1]))
+        self.assertEqual((back.has_prev, back.has_next), (True, True))
+        first = keyset_page(self.qs, self.KEYS, back.prev_cursor, 3)
+        self.assertEqual(self.pks(first), self.pks(pages[0]))
+        self.assertFalse(first.has_prev)
+
+    def test_rows_added_behind_the_cursor_are_not_repeated(self):
+        page = keyset_page(self.qs, self.KEYS, None, 3)
+        DocPage.objects.create(title="Aardvark", slug="new", body="x", visibility="class")
+        rest = keyset_page(self.qs, self.KEYS, page.next_cursor, 10)
+        self.assertEqual(self.pks(page) + self.pks(rest), self.expected)
+
+    def test_malformed_cursors_give_the_first_page(self):
+        first = self.pks(keyset_page(self.qs, self.KEYS, None, 3))
+
+        def raw(data):
+            return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+        for cursor in (
+            "!!!",
+            raw("not json"),
+            raw('{"n": 1}'),
+            raw('["x", ["Alpha", 1]]'),
+            encode_cursor(NEXT, ["Alpha"]),
+            encode_cursor(NEXT, ["Alpha", "x"]),
+            encode_cursor(NEXT, ["Alpha", [1]]),
+            encode_cursor(NEXT, ["Alpha", {"id": 1}]),
+            encode_cursor(NEXT, ["Alpha", None]),
+            encode_cursor(NEXT, [True, 1]),
+        ):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.pks(keyset_page(self.qs, self.KEYS, cursor, 3)), first)
+
+    @override_settings(LIST_PAGE_SIZE=3)
+    def test_list_pages_survive_garbled_cursors(self):
+        # one string per sort key, so only the types are wrong
+        n_keys = {"docs:index": 4, "policies:list": 3, "diagrams:list": 2}
+        for name, n in n_keys.items():
+            for cursor in (encode_cursor(NEXT, ["x"] * n), "%%%"):
+                with self.subTest(url=name, cursor=cursor):
+                    self.assertEqual(self.client.get(reverse(name), {"cursor": cursor}).status_code, 200)
+
+        url = reverse("docs:index")
+        first = self.client.get(url).context["page"]
+        second = self.client.get(url, {"cursor": first.next_cursor}).context["page"]
+        self.assertEqual(self.pks(first) + self.pks(second), self.expected[:6])
+
+
+class DatabaseSettingsTests(SimpleTestCase):
+    URL = "postgres://soc:pw@db:5433/socdocs?sslmode=require&options=-c%20search_path%3Dapp"
+
+    def databases_for(self, **env):
+        """DATABASES as settings.py builds it from ``env`` alone."""
+        clean = {k: v for k, v in os.environ.items() if not k.startswith(("DB_", "DATABASE_URL"))}
+        with mock.patch.dict(os.environ, {**clean, **env}, clear=True):
+            return runpy.run_path(os.path.join(os.path.dirname(__file__), "settings.py"))["DATABASES"]["default"]
+
+    def test_sqlite_without_database_url(self):
+        self.assertEqual(self.databases_for()["ENGINE"], "django.db.backends.sqlite3")
+
+    def test_persistent_connections_by_default(self):
+        db = self.databases_for(DATABASE_URL=self.URL)
+        self.assertEqual((db["HOST"], db["PORT"], db["NAME"]), ("db", 5433, "socdocs"))
+        self.assertEqual((db["CONN_MAX_AGE"], db["CONN_HEALTH_CHECKS"]), (60, True))
+        self.assertEqual(
+            db["OPTIONS"],
+            {"sslmode": "require", "options": "-c search_path=app", "connect_timeout": 5},
+        )
+
+    def test_statement_timeout_keeps_url_options(self):
+        db = self.databases_for(DATABASE_URL=self.URL, DB_STATEMENT_TIMEOUT="30000")
+        self.assertEqual(db["OPTIONS"]["options"], "-c search_path=app -c statement_timeout=30000")
+
+    def test_pool_forces_conn_max_age_to_zero(self):
+        db = self.databases_for(
+            DATABASE_URL=self.URL, DB_POOL="True", DB_POOL_MAX_SIZE="20", DB_CONN_MAX_AGE="None"
+        )
+        self.assertEqual(db["OPTIONS"]["pool"], {"min_size": 2, "max_size": 20, "timeout": 10.0})
+        self.assertEqual(db["CONN_MAX_AGE"], 0)
+
+    def test_conn_max_age_none_means_forever(self):
+        db = self.databases_for(DATABASE_URL=self.URL, DB_CONN_MAX_AGE="None", DB_CONN_HEALTH_CHECKS="False")
+        self.assertEqual((db["CONN_MAX_AGE"], db["CONN_HEALTH_CHECKS"]), (None, False))
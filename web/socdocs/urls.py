@@ -1,8 +1,10 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.views.generic import TemplateView
 from django.conf import settings
-from django.conf.urls.static import static
+
+from mediastore.views import serve_media
+from socdocs.preview import markdown_preview
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -13,14 +15,21 @@ urlpatterns = [
     # Allauth handles login/signup/logout + Discord
     path("accounts/", include("allauth.urls")),
 
+    # cached preview in place of markdownx's own markdownify view
+    path("markdownx/markdownify/", markdown_preview, name="markdown_preview"),
     path("markdownx/", include("markdownx.urls")),
     path("docs/", include("docs.urls")),
     path("policies/", include("policies.urls")),
     path("diagrams/", include("diagrams.urls")),
     path("grading/", include("grading.urls")),
     path("moderation/", include("moderation.urls")),
+    path("search/", include("search.urls")),
+    path("jobs/", include("jobs.urls")),
 
     path("", TemplateView.as_view(template_name="home.html"), name="home"),
 ]
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# uploads go through a permission check (mediastore.views.serve_media)
+urlpatterns += [
+    re_path(rf"^{settings.MEDIA_URL.lstrip('/')}(?P<path>.+)$", serve_media, name="media"),
+]
@@ -0,0 +1,63 @@
+/* static/js/md-preview.js
+   Server-rendered live preview for the markdown editors, so the preview
+   matches what is saved (see socdocs/preview.py).
+
+   mdPreview(textarea, target) returns {schedule, now}: call schedule() on
+   every input (it waits until typing pauses) and now() to render at once.
+   Each request carries this editor's id and a rising sequence number; a
+   newer request aborts the one in flight, and answers to superseded
+   requests (409, or arriving late) are dropped. */
+(function () {
+  function csrfToken() {
+    const input = document.querySelector('input[name="csrfmiddlewaretoken"]');
+    if (input) return input.value;
+    const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+    return match ? decodeURIComponent(match[1]) : '';
+  }
+
+  window.mdPreview = function (textarea, target, options) {
+    options = options || {};
+    const url = options.url || '/markdownx/markdownify/';
+    const delay = options.delay || 300;
+    const editor = Math.random().toString(36).slice(2) + Date.now().toString(36);
+    let seq = 0;
+    let timer = null;
+    let controller = null;
+    let shown = null;  // the content currently in the preview
+
+    function now() {
+      clearTimeout(timer);
+      const content = textarea.value || '';
+      if (content === shown && !controller) return;
+      if (controller) controller.abort();
+      controller = new AbortController();
+      const mine = ++seq;
+      const body = new URLSearchParams({ content: content, editor: editor, seq: String(mine) });
+      fetch(url, {
+        method: 'POST',
+        headers: { 'X-CSRFToken': csrfToken(), 'X-Requested-With': 'XMLHttpRequest' },
+        body: body,
+        credentials: 'same-origin',
+        signal: controller.signal,
+      })
+        .then(function (response) { return response.ok ? response.text() : null; })
+        .then(function (html) {
+          if (mine !== seq) return;
+          controller = null;
+          if (html === null) return;
+          shown = content;
+          target.innerHTML = html;
+        })
+        .catch(function () {
+          if (mine === seq) controller = null;
+        });
+    }
+
+    function schedule() {
+      clearTimeout(timer);
+      timer = setTimeout(now, delay);
+    }
+
+    return { schedule: schedule, now: now };
+  };
+})();